@@ -0,0 +1,91 @@
+"""
+Nhân tổng hợp theo nhóm trên mã nguyên (src/analytics/dimensions.py).
+
+Mọi phép group-by của analyzer quy về vài lượt np.bincount trên mảng mã: số dòng,
+số giá trị hợp lệ, tổng và tổng bình phương của từng nhóm; trung bình / phương sai /
+tỷ lệ suy ra từ các mảng k phần tử đó. Mã -1 (thiếu nhóm) và giá trị NaN bị bỏ qua.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# rows: số dòng của nhóm; count / sums / sumsq: số giá trị khác NaN, tổng, tổng bình phương
+# (mảng k phần tử, hoặc k × m khi values có m cột)
+GroupStats = namedtuple("GroupStats", ["rows", "count", "sums", "sumsq"])
+
+
+def group_sizes(codes, n_groups):
+    return np.bincount(codes[codes >= 0], minlength=n_groups)
+
+
+def group_stats(codes, n_groups, values):
+    """Thống kê theo nhóm của `values` (mảng / Series n phần tử hoặc DataFrame n × m)."""
+    values = np.asarray(values, dtype=np.float64)
+    flat = values.ndim == 1
+    values = values.reshape(len(codes), -1)
+    member = codes >= 0
+    rows = np.bincount(codes[member], minlength=n_groups)
+    count = np.zeros((n_groups, values.shape[1]), dtype=np.int64)
+    sums = np.zeros((n_groups, values.shape[1]))
+    sumsq = np.zeros((n_groups, values.shape[1]))
+    for c in range(values.shape[1]):
+        column = values[:, c]
+        valid = member & ~np.isnan(column)
+        group, column = codes[valid], column[valid]
+        count[:, c] = np.bincount(group, minlength=n_groups)
+        sums[:, c] = np.bincount(group, weights=column, minlength=n_groups)
+        sumsq[:, c] = np.bincount(group, weights=column * column, minlength=n_groups)
+    if flat:
+        count, sums, sumsq = count[:, 0], sums[:, 0], sumsq[:, 0]
+    return GroupStats(rows, count, sums, sumsq)
+
+
+def group_means(stats):
+    """Trung bình theo nhóm (bỏ NaN như pandas); nhóm không có giá trị hợp lệ nhận NaN."""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return stats.sums / stats.count
+
+
+def group_rates(codes, n_groups, condition):
+    """Số dòng thỏa `condition` (mảng bool) trong từng nhóm."""
+    member = codes >= 0
+    return np.bincount(codes[member], weights=np.asarray(condition, dtype=np.float64)[member], minlength=n_groups)
+
+
+def first_seen(codes):
+    """Các mã nhóm theo thứ tự xuất hiện đầu tiên (như Series.unique())."""
+    return pd.unique(codes[codes >= 0])
+
+
+def by_count(labels, counts):
+    """[(nhãn, số lượng)] của các nhóm khác rỗng, nhiều nhất trước (như value_counts())."""
+    order = np.argsort(-counts, kind="stable")
+    return [(labels[g], int(counts[g])) for g in order if counts[g] > 0]
+
+
+def binned_pairs(x, y, x_step, y_step):
+    """
+    Đếm các cặp (x, y) theo lưới ô x_step × y_step (bỏ cặp có NaN): (x, y, số cặp) của các ô
+    khác rỗng. Kích thước kết quả bị chặn bởi số ô của lưới, không tăng theo số dòng.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    cells = np.column_stack([np.round(x[valid] / x_step), np.round(y[valid] / y_step)]).astype(np.int64)
+    if not len(cells):
+        return np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64)
+    cells, counts = np.unique(cells, axis=0, return_counts=True)
+    return np.round(cells[:, 0] * x_step, 3), np.round(cells[:, 1] * y_step, 3), counts
+
+
+def linear_trend(x, y):
+    """Đường hồi quy OLS y = slope * x + intercept trên các cặp không NaN; None nếu x không đổi."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if len(x) < 2 or np.ptp(x) == 0:
+        return None
+    slope, intercept = np.polyfit(x, y, 1)
+    return {"slope": round(float(slope), 4), "intercept": round(float(intercept), 4)}
@@ -1,11 +1,19 @@
 import pandas as pd
 import numpy as np
-from underthesea import word_tokenize
-from collections import Counter
-import os
+import time
 
 import statsmodels.api as sm
 
+from src.analytics.aggregate import (
+    binned_pairs, by_count, first_seen, group_means, group_rates, group_sizes, group_stats, linear_trend,
+)
+from src.analytics.dimensions import group_codes
+from src.analytics.keywords import KeywordIndex
+from src.analytics.reliability import segment_reliability
+from src.analytics.significance import segment_significance, significant_gaps
+from src.analytics.text import stopwords
+from src.config import Config
+
 # Mapping chuyên ngành tiếng Việt → mã ngắn cho biểu đồ
 MAJOR_LABELS = {
     "Ngành Công Nghệ Thông Tin": "CNTT",
@@ -19,30 +27,54 @@ MAJOR_LABELS = {
 }
 
 
+def _round2(value):
+    return None if pd.isna(value) else round(float(value), 2)
+
+
+def _section_timer(timings):
+    """Trả về hàm mark(name) ghi thời gian kể từ lần mark trước vào `timings` (nếu có)."""
+    last = [time.perf_counter()]
+
+    def mark(name):
+        now = time.perf_counter()
+        if timings is not None:
+            timings[name] = now - last[0]
+        last[0] = now
+    return mark
+
+
 class DataAnalyzer:
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str = None, df: pd.DataFrame = None, keyword_index: KeywordIndex = None):
         """
         Khởi tạo với DataFrame đã qua xử lý ETL (sạch và đã đảo điểm).
+        Có thể truyền đường dẫn file CSV hoặc một DataFrame có sẵn (ví dụ một phân khúc).
+        `keyword_index` là chỉ mục từ khóa dựng sẵn cho toàn bộ dữ liệu (df giữ nguyên nhãn dòng).
         """
-        self.df = pd.DataFrame(pd.read_csv(file_path))
+        # df truyền vào (có thể là frame mmap chỉ đọc dùng chung) chỉ được sao chép khi analysis()
+        # cần thêm cột; get_chart_data() chỉ đọc nên không tốn bản sao
+        self._shared_df = df is not None
+        self.df = df if df is not None else pd.DataFrame(pd.read_csv(file_path))
         self.report = {}
-        self.stopwords = self._load_stopwords()
-
-    def _load_stopwords(self):
-        """Loads Vietnamese stopwords from a file."""
-        # Correctly resolve path relative to this script's location
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        stopwords_path = os.path.join(current_dir, 'vietnamese_stopwords.txt')
-        if os.path.exists(stopwords_path):
-            with open(stopwords_path, 'r', encoding='utf-8') as f:
-                return set(f.read().splitlines())
-        return set()
+        self.stopwords = stopwords()
+        self.keyword_index = keyword_index
+
+    @classmethod
+    def from_store(cls, store_dir, waves=None, campus=None, start=None, end=None):
+        """
+        Khởi tạo từ kho phân vùng (src/etl/store.py), chỉ đọc các phân vùng khớp
+        với đợt khảo sát / cơ sở / khoảng thời gian yêu cầu.
+        """
+        from src.etl.store import PartitionedStore
+        return cls(df=PartitionedStore(store_dir).read(waves=waves, campus=campus, start=start, end=end))
 
     def analysis(self):
         """
         Method chính thực hiện toàn bộ các hướng phân tích chiến lược.
         """
         print("📊 Đang phân tích các chỉ số hạnh phúc...")
+        if self._shared_df:
+            self.df = self.df.copy()
+            self._shared_df = False
         
         self._calculate_ahs()                           # A. Chỉ số Hạnh phúc trung bình
         self._calculate_factor_scores()                 # B. Chỉ số Hạnh phúc theo các nhân tố X
@@ -53,6 +85,9 @@ class DataAnalyzer:
         self._calculate_correlations()                  # G. Tương quan Pearson
         self._calculate_retention_risk()                # H. Rủi ro bỏ học
         self._analyze_wishes()                          # I. Phân tích điều ước (NLP)
+        self._calculate_wave_trend()                    # J. Xu hướng qua các đợt khảo sát
+        self._calculate_reliability()                   # K. Độ tin cậy thang đo (Cronbach's alpha)
+        self._calculate_significance()                  # L. Kiểm định khác biệt giữa các nhóm
         
         print("✅ Phân tích hoàn tất.")
         return self.report
@@ -92,28 +127,22 @@ class DataAnalyzer:
     def _calculate_semester_happiness_curve(self):
         """D. Semester Happiness Curve"""
         if 'dem_semester' in self.df.columns and 'individual_ahs' in self.df.columns:
-            semester_happiness = self.df.groupby('dem_semester')['individual_ahs'].mean().sort_index().round(2).to_dict()
-            self.report['semester_happiness_curve'] = semester_happiness
+            self.report['semester_happiness_curve'] = self._group_mean('semester', 'individual_ahs')
         else:
             self.report['semester_happiness_curve'] = {}
 
     def _calculate_gpa_happiness_correlation(self):
         """E. GPA-Happiness Correlation"""
         if 'dem_gpa' in self.df.columns and 'individual_ahs' in self.df.columns:
-            gpa_bins = [0, 5.0, 6.5, 8.0, 10.0]
-            gpa_labels = ['<5.0', '5.0-6.5', '6.5-8.0', '>8.0']
-            self.df['gpa_group'] = pd.cut(self.df['dem_gpa'], bins=gpa_bins, labels=gpa_labels, right=False)
-            
-            gpa_happiness = self.df.groupby('gpa_group', observed=False)['individual_ahs'].mean().round(2).to_dict()
-            self.report['gpa_happiness_correlation'] = gpa_happiness
+            # Mọi nhóm GPA đều có mặt (nhóm rỗng -> NaN), như groupby(observed=False)
+            self.report['gpa_happiness_correlation'] = self._group_mean('gpa_group', 'individual_ahs', observed=False)
         else:
             self.report['gpa_happiness_correlation'] = {}
             
     def _calculate_residence_stress_index(self):
         """F. Residence Stress Index"""
         if 'dem_residence' in self.df.columns and 'fin_living_cost_worry' in self.df.columns:
-            residence_stress = self.df.groupby('dem_residence')['fin_living_cost_worry'].mean().round(2).to_dict()
-            self.report['residence_stress_index'] = residence_stress
+            self.report['residence_stress_index'] = self._group_mean('residence', 'fin_living_cost_worry')
         else:
             self.report['residence_stress_index'] = {}
 
@@ -163,30 +192,70 @@ class DataAnalyzer:
             self.report['wish_analysis'] = {}
             return
 
-        text = ' '.join(self.df['wish'].dropna().astype(str))
-        if not text.strip():
-            self.report['wish_analysis'] = {}
+        # Top 5 từ khóa / cụm từ phổ biến nhất
+        self.report['wish_analysis'] = self._top_keywords(self.df, 5)
+
+    def _top_keywords(self, data, k):
+        """Top-k cụm từ điều ước của `data`, dùng chỉ mục dựng sẵn nếu chứa đủ các dòng."""
+        if self.keyword_index is not None:
+            try:
+                return self.keyword_index.top_k(k, index=data.index)
+            except KeyError:
+                pass
+        if data is self.df:
+            self.keyword_index = KeywordIndex.build(self.df)
+            return self.keyword_index.top_k(k)
+        return KeywordIndex.build(data).top_k(k)
+
+    def _calculate_wave_trend(self):
+        """J. AHS / NHS theo đợt khảo sát (chỉ có khi dữ liệu đọc từ kho phân vùng)"""
+        if 'survey_wave' not in self.df.columns or 'individual_ahs' not in self.df.columns:
+            self.report['wave_trend'] = {}
             return
+        codes, waves = group_codes(self.df, 'wave')
+        ahs = self.df['individual_ahs'].to_numpy(dtype=np.float64)
+        stats = group_stats(codes, len(waves), ahs)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            nhs = (group_rates(codes, len(waves), ahs >= 4) - group_rates(codes, len(waves), ahs <= 2)) / stats.rows * 100
+        self.report['wave_trend'] = {
+            wave: {
+                'ahs': np.round(mean, 2),
+                'nhs': np.round(rate, 2),
+                'responses': int(rows),
+            }
+            for wave, mean, rate, rows in zip(waves, group_means(stats), nhs, stats.rows) if rows
+        }
 
-        tokens = word_tokenize(text.lower())
-        
-        # Filter out stopwords and non-alpha words
-        filtered_tokens = [token for token in tokens if token.isalpha() and token not in self.stopwords]
-        
-        word_counts = Counter(filtered_tokens)
-        
-        # Get top 5 most common keywords
-        self.report['wish_analysis'] = dict(word_counts.most_common(5))
+    def _calculate_reliability(self):
+        """K. Cronbach's alpha & tương quan biến-tổng hiệu chỉnh của từng nhóm nhân tố, toàn bộ và theo ngành"""
+        by_major = segment_reliability(self.df, by='major')
+        self.report['reliability'] = by_major.pop('all')
+        self.report['reliability_by_major'] = by_major
+
+    def _calculate_significance(self):
+        """L. Welch t-test / ANOVA / Kruskal-Wallis cho mọi cặp kỳ học, nhóm GPA, nơi ở và ngành (đã hiệu chỉnh đa so sánh)"""
+        self.report['significance'] = segment_significance(self.df)
+
+    def _group_mean(self, dimension, column, observed=True):
+        """{nhóm: trung bình `column` (làm tròn 2 chữ số)} theo một chiều, tính bằng bincount trên mã nhóm."""
+        codes, labels = group_codes(self.df, dimension, observed=observed)
+        stats = group_stats(codes, len(labels), self.df[column])
+        means = np.round(group_means(stats), 2)
+        return dict(zip(labels, means))
 
     # ==================== CHART DATA COMPUTATION ====================
-    def get_chart_data(self, df=None):
+    def get_chart_data(self, df=None, timings=None, sections=None):
         """
         Tính toán dữ liệu sẵn sàng cho biểu đồ.
         Nếu df=None thì dùng self.df (đã load từ file).
         Trả về dict với các key: major_dist, semester_dist, gpa_dist, residence_dist,
         factor_by_major, semester_happiness, gpa_happiness, correlation_matrix,
-        response_trend, wish_word_counts, likert_dist.
+        response_trend, wish_word_counts, likert_dist, kpi, reliability, significance.
+        Nếu truyền dict `timings`, thời gian (giây) của từng section được ghi vào đó.
+        `sections` giới hạn các section được tính (None = tất cả).
         """
+        mark = _section_timer(timings)
+        want = (lambda name: True) if sections is None else set(sections).__contains__
         data = df if df is not None else self.df
         if data.empty:
             return {}
@@ -199,119 +268,129 @@ class DataAnalyzer:
         fin_cols = [c for c in data.columns if c.startswith('fin_')]
         factor_cols = {'aca': aca_cols, 'env': env_cols, 'soc': soc_cols, 'fin': fin_cols, 'hap': hap_cols}
 
+        # Các group-by bên dưới chạy bằng bincount trên mã nhóm (src/analytics/aggregate.py);
+        # nhãn hiển thị chỉ được đổi trên từ điển của chiều, không đổi trên từng dòng
+        ahs = data[hap_cols].mean(axis=1) if hap_cols else None
+
         # 1. Phân bố theo ngành
-        if 'dem_major' in data.columns:
-            major_counts = data['dem_major'].value_counts()
-            out['major_dist'] = {MAJOR_LABELS.get(k, k): int(v) for k, v in major_counts.items()}
+        if want('major_dist') and 'dem_major' in data.columns:
+            codes, majors = group_codes(data, 'major')
+            counts = group_sizes(codes, len(majors))
+            out['major_dist'] = {MAJOR_LABELS.get(k, k): v for k, v in by_count(majors, counts)}
+        mark('major_dist')
 
         # 2. Phân bố theo kỳ học
-        if 'dem_semester' in data.columns:
-            sem_counts = data['dem_semester'].value_counts().sort_index()
-            out['semester_dist'] = {int(k): int(v) for k, v in sem_counts.items()}
-
-        # 3. Phân phối GPA (bins cho histogram)
-        if 'dem_gpa' in data.columns:
+        if want('semester_dist') and 'dem_semester' in data.columns:
+            codes, semesters = group_codes(data, 'semester')
+            counts = group_sizes(codes, len(semesters))
+            out['semester_dist'] = {int(k): int(v) for k, v in zip(semesters, counts) if v}
+        mark('semester_dist')
+
+        # 3. Phân phối GPA: số phản hồi theo bin histogram (kích thước cố định, không theo số dòng)
+        if want('gpa_dist') and 'dem_gpa' in data.columns:
             gpa = data['dem_gpa'].dropna()
+            counts, _ = np.histogram(gpa, bins=Config.GPA_HIST_BINS)
             out['gpa_dist'] = {
-                'values': gpa.tolist(),
-                'bins': [4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0],
+                'bins': list(Config.GPA_HIST_BINS),
+                'counts': counts.tolist(),
                 'mean': float(gpa.mean()),
             }
+        mark('gpa_dist')
 
         # 4. Phân bố nơi ở
-        if 'dem_residence' in data.columns:
-            res_counts = data['dem_residence'].value_counts()
-            out['residence_dist'] = res_counts.to_dict()
+        if want('residence_dist') and 'dem_residence' in data.columns:
+            codes, residences = group_codes(data, 'residence')
+            out['residence_dist'] = dict(by_count(residences, group_sizes(codes, len(residences))))
+        mark('residence_dist')
 
         # 5. Điểm các nhân tố theo ngành
-        if 'dem_major' in data.columns and factor_cols['aca']:
-            individual_ahs = data[hap_cols].mean(axis=1) if hap_cols else None
-            factor_by_major = []
-            for maj in data['dem_major'].unique():
-                subset = data[data['dem_major'] == maj]
-                def safe_mean(cols):
-                    if not cols: return None
-                    v = subset[cols].mean().mean()
-                    return None if pd.isna(v) else round(float(v), 2)
-
-                row = {
-                    'major': MAJOR_LABELS.get(maj, maj),
-                    'aca': safe_mean(aca_cols),
-                    'env': safe_mean(env_cols),
-                    'soc': safe_mean(soc_cols),
-                    'fin': safe_mean(fin_cols),
-                    'hap': safe_mean(hap_cols),
-                    'count': int(len(subset)),
+        if want('factor_by_major') and 'dem_major' in data.columns and factor_cols['aca']:
+            codes, majors = group_codes(data, 'major')
+            # Trung bình của các trung bình cột (bỏ NaN) cho mỗi ngành × nhóm nhân tố
+            scores = {}
+            for factor, cols in factor_cols.items():
+                if cols:
+                    column_means = group_means(group_stats(codes, len(majors), data[cols]))
+                    answered = ~np.isnan(column_means)
+                    with np.errstate(invalid='ignore', divide='ignore'):
+                        scores[factor] = np.where(answered, column_means, 0).sum(axis=1) / answered.sum(axis=1)
+            sizes = group_sizes(codes, len(majors))
+            out['factor_by_major'] = [
+                {
+                    'major': MAJOR_LABELS.get(majors[g], majors[g]),
+                    **{f: _round2(scores[f][g]) if f in scores else None for f in factor_cols},
+                    'count': int(sizes[g]),
                 }
-                factor_by_major.append(row)
-            out['factor_by_major'] = factor_by_major
+                for g in first_seen(codes)
+            ]
+        mark('factor_by_major')
 
         # 6. Đường cong hạnh phúc theo kỳ
-        if 'dem_semester' in data.columns and hap_cols:
-            data_copy = data.copy()
-            data_copy['_ahs'] = data_copy[hap_cols].mean(axis=1)
-            curve = data_copy.groupby('dem_semester')['_ahs'].mean().sort_index()
-            out['semester_happiness'] = {int(k): round(float(v), 2) for k, v in curve.items()}
+        if want('semester_happiness') and 'dem_semester' in data.columns and hap_cols:
+            codes, semesters = group_codes(data, 'semester')
+            stats = group_stats(codes, len(semesters), ahs)
+            out['semester_happiness'] = {
+                int(k): round(float(v), 2) for k, v, rows in zip(semesters, group_means(stats), stats.rows) if rows
+            }
+        mark('semester_happiness')
 
         # 7. Tương quan GPA - Hạnh phúc
-        if 'dem_gpa' in data.columns and hap_cols:
-            data_copy = data.copy()
-            data_copy['_ahs'] = data_copy[hap_cols].mean(axis=1)
-            gpa_bins = [0, 5.0, 6.5, 8.0, 10.0]
-            gpa_labels = ['<5.0', '5.0-6.5', '6.5-8.0', '>8.0']
-            data_copy['_gpa_group'] = pd.cut(
-                data_copy['dem_gpa'], bins=gpa_bins, labels=gpa_labels, right=False
+        if want('gpa_happiness') and 'dem_gpa' in data.columns and hap_cols:
+            codes, groups = group_codes(data, 'gpa_group', observed=False)
+            means = group_means(group_stats(codes, len(groups), ahs))
+            out['gpa_happiness'] = {str(k): round(float(v), 2) for k, v in zip(groups, means)}
+            # Phân tán theo lưới GPA × AHS (số phản hồi mỗi ô) + đường OLS tính trên mọi dòng
+            gpa, ahs_bin, counts = binned_pairs(
+                data['dem_gpa'], ahs, Config.GPA_SCATTER_GPA_STEP, Config.GPA_SCATTER_AHS_STEP
             )
-            gpa_hap = data_copy.groupby('_gpa_group', observed=False)['_ahs'].mean()
-            out['gpa_happiness'] = {str(k): round(float(v), 2) for k, v in gpa_hap.items()}
             out['gpa_ahs_scatter'] = {
-                'gpa': data_copy['dem_gpa'].tolist(),
-                'ahs': data_copy['_ahs'].tolist(),
+                'gpa': gpa.tolist(),
+                'ahs': ahs_bin.tolist(),
+                'count': counts.tolist(),
+                'trend': linear_trend(data['dem_gpa'], ahs),
             }
+        mark('gpa_happiness')
 
         # 8. Ma trận tương quan
-        if hap_cols:
-            data_copy = data.copy()
-            data_copy['ahs'] = data_copy[hap_cols].mean(axis=1)
-            num_cols = aca_cols + env_cols + soc_cols + fin_cols + ['ahs']
-            num_cols = [c for c in num_cols if c in data_copy.columns]
-            if num_cols:
-                corr = data_copy[num_cols].corr()
-                out['correlation_matrix'] = {
-                    'columns': list(corr.columns),
-                    'matrix': corr.values.tolist(),
-                }
+        if want('correlation_matrix') and hap_cols:
+            # Chỉ chép các cột số cần tính tương quan, không chép cả frame
+            num_cols = aca_cols + env_cols + soc_cols + fin_cols
+            corr = data[num_cols].assign(ahs=ahs).corr()
+            out['correlation_matrix'] = {
+                'columns': list(corr.columns),
+                'matrix': corr.values.tolist(),
+            }
+        mark('correlation_matrix')
 
         # 9. Xu hướng phản hồi theo thời gian
-        if 'timestamp' in data.columns:
-            data_copy = data.copy()
-            data_copy['timestamp'] = pd.to_datetime(data_copy['timestamp'], errors='coerce')
-            data_copy = data_copy.dropna(subset=['timestamp'])
-            if not data_copy.empty:
-                data_copy['_date'] = data_copy['timestamp'].dt.date
-                trend = data_copy.groupby('_date').size().reset_index(name='count')
-                trend['date'] = trend['_date'].astype(str)
-                out['response_trend'] = trend[['date', 'count']].to_dict('records')
+        if want('response_trend') and 'timestamp' in data.columns:
+            timestamps = pd.to_datetime(data['timestamp'], errors='coerce').dropna()
+            if not timestamps.empty:
+                if timestamps.dt.tz is not None:
+                    timestamps = timestamps.dt.tz_localize(None)
+                # Mã ngày = số ngày kể từ epoch; np.unique trả về ngày đã sắp xếp kèm số phản hồi
+                days, counts = np.unique(timestamps.to_numpy(dtype='datetime64[D]'), return_counts=True)
+                out['response_trend'] = [{'date': str(d), 'count': int(c)} for d, c in zip(days, counts)]
+        mark('response_trend')
 
         # 10. Word cloud từ điều ước
-        if 'wish' in data.columns:
-            text = ' '.join(data['wish'].dropna().astype(str))
-            if text.strip():
-                tokens = word_tokenize(text.lower())
-                filtered = [t for t in tokens if t.isalpha() and t not in self.stopwords and len(t) > 2]
-                wc = Counter(filtered)
-                out['wish_word_counts'] = dict(wc.most_common(20))
+        if want('wish_word_counts') and 'wish' in data.columns:
+            top = self._top_keywords(data, 20)
+            if top:
+                out['wish_word_counts'] = top
+        mark('wish_word_counts')
 
         # 11. Phân phối mức độ Likert (hap)
-        if hap_cols:
+        if want('likert_dist') and hap_cols:
             likert_data = []
             for col in hap_cols:
                 for val, cnt in data[col].value_counts().sort_index().items():
                     likert_data.append({'variable': col.replace('hap_', ''), 'level': int(val), 'count': int(cnt)})
             out['likert_dist'] = likert_data
+        mark('likert_dist')
 
         # 12. KPI tổng hợp
-        if hap_cols:
+        if want('kpi') and hap_cols:
             ahs_all = data[hap_cols].mean(axis=1)
             promoters = int((ahs_all >= 4).sum())
             detractors = int((ahs_all <= 2).sum())
@@ -323,6 +402,33 @@ class DataAnalyzer:
                 'promoters': promoters,
                 'detractors': detractors,
             }
+        mark('kpi')
+
+        # 13. Độ tin cậy thang đo (toàn bộ + theo ngành, tính trong một lượt)
+        if want('reliability'):
+            reliability = segment_reliability(data, by='major')
+            out['reliability'] = {
+                'factors': reliability.pop('all'),
+                'alpha_by_major': {
+                    MAJOR_LABELS.get(maj, maj): {factor: v['alpha'] for factor, v in factors.items()}
+                    for maj, factors in reliability.items()
+                },
+            }
+        mark('reliability')
+
+        # 14. Các khoảng cách có ý nghĩa thống kê giữa các nhóm (để chú thích trên biểu đồ)
+        if want('significance') and hap_cols:
+            significance = segment_significance(data)
+            out['significance'] = {
+                name: significant_gaps(significance[name])
+                for name in ('semester_happiness', 'gpa_happiness', 'residence_stress') if name in significance
+            }
+            if 'factor_by_major' in significance:
+                out['significance']['factor_by_major'] = {
+                    factor: significant_gaps(comparison, MAJOR_LABELS)
+                    for factor, comparison in significance['factor_by_major'].items()
+                }
+        mark('significance')
 
         return out
 
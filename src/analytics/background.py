@@ -0,0 +1,141 @@
+"""
+Phân tích nền cho Dashboard: dữ liệu biểu đồ của một phân khúc được tính ở tiến trình
+worker thay vì chặn thread script của Streamlit.
+
+Dashboard tạo một `AnalysisExecutor` dùng chung cho mọi phiên (st.cache_resource). Mỗi
+yêu cầu được định danh bằng (phiên bản dữ liệu, đợt khảo sát, ngành, giai đoạn); các
+phiên cùng yêu cầu một phân khúc khi nó đang được tính sẽ chờ chung một future, kết
+quả đã xong được giữ trong LRU. Worker mở bộ dữ liệu mmap dùng chung
+(src/etl/columnar.py) nên không phải gửi frame qua tiến trình.
+
+Phân khúc tính lỗi được ghi nhớ Config.ANALYSIS_FAILURE_TTL_SECONDS giây (trong thời gian
+đó Dashboard tự tính trong script), hết hạn thì lần yêu cầu sau được xếp lịch lại. Bảng lỗi
+bị giới hạn như LRU kết quả và được dọn khi có phiên bản dữ liệu mới.
+"""
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from src.analytics.analyzer import DataAnalyzer
+from src.analytics.keywords import KeywordIndex, load_or_build
+from src.analytics.segments import filter_segment
+from src.config import Config
+from src.etl.columnar import shared_dataset
+
+READY, PENDING, FAILED = "ready", "pending", "failed"
+
+# ==================== WORKER ====================
+# Mỗi worker giữ frame + chỉ mục từ khóa của phiên bản dữ liệu gần nhất, không đọc lại cho mỗi yêu cầu
+_WORKER_FRAMES = {}
+
+
+def worker_frame(data_path, version, waves):
+    """(frame mmap chỉ đọc, chỉ mục từ khóa) của một phiên bản dữ liệu, cache trong tiến trình."""
+    key = (str(data_path), version, waves)
+    if key not in _WORKER_FRAMES:
+        _WORKER_FRAMES.clear()
+        # Frame mmap chỉ đọc (src/etl/columnar.py): mọi worker dùng chung một bản trong RAM
+        frame = shared_dataset(data_path, version, waves).frame
+        keyword_index = KeywordIndex.build(frame) if waves else load_or_build(data_path, frame)
+        _WORKER_FRAMES[key] = frame, keyword_index
+    return _WORKER_FRAMES[key]
+
+
+def compute_chart_data(data_path, version, waves, major, semester):
+    frame, keyword_index = worker_frame(data_path, version, waves)
+    subset = filter_segment(frame, major, semester)
+    if subset.empty:
+        return {}
+    return DataAnalyzer(df=subset, keyword_index=keyword_index).get_chart_data(df=subset)
+
+
+# ==================== EXECUTOR ====================
+class AnalysisExecutor:
+    def __init__(self, data_path, max_workers=None, cache_size=None):
+        self.data_path = str(data_path)
+        self.max_workers = max_workers or Config.ANALYSIS_MAX_WORKERS
+        self.cache_size = cache_size or Config.ANALYSIS_CACHE_MAX_ENTRIES
+        self._pool = None
+        self._results = OrderedDict()
+        self._pending = {}
+        self._failed = OrderedDict()  # key -> (exception, thời điểm lỗi)
+        self._version = None
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "computed": 0, "coalesced": 0, "failed": 0}
+
+    def status(self, version, waves, major, semester):
+        key = (version, tuple(waves), major, semester)
+        with self._lock:
+            if key in self._results:
+                return READY
+            if key in self._pending:
+                return PENDING
+            return FAILED if self._recent_failure(key) else None
+
+    def error(self, version, waves, major, semester):
+        key = (version, tuple(waves), major, semester)
+        with self._lock:
+            return self._failed[key][0] if self._recent_failure(key) else None
+
+    def _recent_failure(self, key):
+        """True nếu key lỗi chưa quá Config.ANALYSIS_FAILURE_TTL_SECONDS (gọi khi giữ lock); lỗi hết hạn bị xóa."""
+        if key not in self._failed:
+            return False
+        if time.monotonic() - self._failed[key][1] < Config.ANALYSIS_FAILURE_TTL_SECONDS:
+            return True
+        del self._failed[key]
+        return False
+
+    def _set_version(self, version):
+        """Phiên bản dữ liệu mới: lỗi của các phiên bản cũ không còn ý nghĩa (gọi khi giữ lock)."""
+        if version != self._version:
+            self._version = version
+            for key in [k for k in self._failed if k[0] != version]:
+                del self._failed[key]
+
+    def request(self, version, waves, major, semester):
+        """
+        Trả về chart data nếu đã tính xong; nếu chưa thì xếp lịch tính ở tiến trình nền
+        (gộp với yêu cầu giống hệt đang được tính) và trả về None.
+        """
+        key = (version, tuple(waves), major, semester)
+        with self._lock:
+            self._set_version(version)
+            if key in self._results:
+                self._results.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._results[key]
+            if key in self._pending:
+                self.stats["coalesced"] += 1
+                return None
+            if self._recent_failure(key):
+                return None
+            if self._pool is None:
+                # spawn: Streamlit chạy nhiều thread, fork có thể khóa chết tiến trình con
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            future = self._pool.submit(compute_chart_data, self.data_path, *key)
+            self._pending[key] = future
+            self.stats["computed"] += 1
+        future.add_done_callback(lambda f, key=key: self._finish(key, f))
+        return None
+
+    def _finish(self, key, future):
+        with self._lock:
+            self._pending.pop(key, None)
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                self._failed[key] = future.exception(), time.monotonic()
+                while len(self._failed) > self.cache_size:
+                    self._failed.popitem(last=False)
+                self.stats["failed"] += 1
+                return
+            self._results[key] = future.result()
+            while len(self._results) > self.cache_size:
+                self._results.popitem(last=False)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,260 @@
+"""
+Sinh báo cáo hàng loạt cho mọi phân khúc ngành × giai đoạn học × nơi ở.
+
+Dữ liệu được mở một lần dưới dạng cột mmap chỉ đọc (src/etl/columnar.py); trên
+Linux/macOS các worker được fork nên dùng chung frame đó, nền tảng khác nhận frame qua
+initializer. Mỗi phân khúc ghi ra JSON (report + chart data) và một trang HTML tĩnh,
+kèm index.html tổng hợp. Report và chart data đi qua guard_report / guard_chart_data
+(src/analytics/privacy.py) như Dashboard; phân khúc dưới k phản hồi không được ghi và
+manifest không công bố số phản hồi của nó.
+
+Ví dụ:
+    python -m src.analytics --data data/processed/fpoly_survey_processed.csv --out reports/2026-Q1
+"""
+import argparse
+import html
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+from pathlib import Path
+
+import pandas as pd
+
+from src.analytics.analyzer import DataAnalyzer
+from src.analytics.keywords import KeywordIndex
+from src.analytics.privacy import SegmentCounts, guard_chart_data, guard_report, is_protected
+from src.analytics.segments import iter_segments, segment_id, segment_mask
+from src.analytics.text import slugify
+from src.config import Config
+from src.etl.columnar import shared_dataset
+from src.etl.snapshot import _to_builtin, data_version
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DATA_PATH = _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"
+
+
+def residence_keys(frame):
+    return ["all"] + sorted(frame["dem_residence"].dropna().unique().tolist())
+
+
+def batch_segment_id(major, semester, residence):
+    return f"{segment_id(major, semester)}__{slugify(residence)}"
+
+
+# ==================== WORKER ====================
+_FRAME = None
+_KEYWORDS = None
+
+
+def _init_worker(frame, keyword_index):
+    global _FRAME, _KEYWORDS
+    _FRAME = frame
+    _KEYWORDS = keyword_index
+
+
+def _run_segment(segment):
+    """Tính report + chart data cho một phân khúc trên frame dùng chung của worker."""
+    major, semester, residence = segment
+    start = time.perf_counter()
+    mask = segment_mask(_FRAME, major, semester)
+    if residence != "all":
+        mask &= _FRAME["dem_residence"] == residence
+    subset = _FRAME[mask]
+    if subset.empty:
+        return segment, 0, None, time.perf_counter() - start
+    analyzer = DataAnalyzer(df=subset, keyword_index=_KEYWORDS)
+    chart_data = analyzer.get_chart_data()
+    report = analyzer.analysis()
+    return segment, len(subset), {"report": report, "chart_data": chart_data}, time.perf_counter() - start
+
+
+# ==================== HTML ====================
+def _fmt(value, suffix=""):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return "–"
+    return f"{value}{suffix}"
+
+
+def _table(rows, headers):
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(c))}</td>" for c in row) + "</tr>" for row in rows
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+_PAGE = """<!DOCTYPE html>
+<html lang="vi"><head><meta charset="utf-8"><title>{title}</title>
+<style>
+body{{font-family:system-ui,sans-serif;margin:2rem auto;max-width:960px;color:#1f2937}}
+h1{{color:#f27024}} table{{border-collapse:collapse;margin:.5rem 0 1.5rem}}
+th,td{{border:1px solid #e5e7eb;padding:.35rem .7rem;text-align:left}} th{{background:#fff7ed}}
+.kpi{{display:flex;gap:1rem}} .kpi div{{border:1px solid #fed7aa;border-radius:8px;padding:.6rem 1rem}}
+.kpi b{{display:block;font-size:1.4rem}} small{{color:#6b7280}}
+</style></head><body>
+{body}
+<p><small>Dữ liệu phiên bản {version} · tạo lúc {created_at}</small></p>
+</body></html>
+"""
+
+
+def render_segment_html(meta, payload, version, created_at):
+    report, chart = payload["report"], payload["chart_data"]
+    kpi = chart.get("kpi", {})
+    title = f"Báo cáo hạnh phúc · {meta['major']} · {meta['semester']} · {meta['residence']}"
+    parts = [f"<h1>{html.escape(title)}</h1>", "<p><a href=\"../index.html\">← Tất cả phân khúc</a></p>"]
+    parts.append(
+        "<div class=\"kpi\">"
+        f"<div>Phản hồi<b>{meta['rows']}</b></div>"
+        f"<div>AHS<b>{_fmt(report.get('ahs_overall'))}</b></div>"
+        f"<div>NHS<b>{_fmt(report.get('nhs_percentage'), '%')}</b></div>"
+        f"<div>Rủi ro rời trường<b>{_fmt(report.get('retention_risk_rate'), '%')}</b></div>"
+        "</div>"
+    )
+    factors = report.get("factor_scores", {})
+    if factors:
+        parts.append("<h2>Điểm nhân tố</h2>")
+        parts.append(_table([(k, _fmt(v)) for k, v in factors.items()], ["Nhân tố", "Điểm TB"]))
+    curve = chart.get("semester_happiness", {})
+    if curve:
+        parts.append("<h2>Hạnh phúc theo kỳ học</h2>")
+        parts.append(_table(sorted(curve.items()), ["Kỳ", "AHS"]))
+    gpa = report.get("gpa_happiness_correlation", {})
+    if gpa:
+        parts.append("<h2>GPA và hạnh phúc</h2>")
+        parts.append(_table(list(gpa.items()), ["Nhóm GPA", "AHS"]))
+    stress = report.get("residence_stress_index", {})
+    if stress:
+        parts.append("<h2>Áp lực tài chính theo nơi ở</h2>")
+        parts.append(_table(list(stress.items()), ["Nơi ở", "Chỉ số"]))
+    reliability = report.get("reliability", {})
+    if reliability:
+        parts.append("<h2>Độ tin cậy thang đo</h2>")
+        parts.append(_table([(f, _fmt(v["alpha"]), v["n"]) for f, v in reliability.items()], ["Nhân tố", "Cronbach's alpha", "n"]))
+    wishes = chart.get("wish_word_counts", {})
+    if wishes:
+        parts.append("<h2>Từ khóa điều ước</h2>")
+        parts.append(_table(list(wishes.items())[:10], ["Từ khóa", "Số lần"]))
+    if not kpi:
+        parts.append("<p>Không đủ dữ liệu.</p>")
+    return _PAGE.format(title=html.escape(title), body="\n".join(parts), version=version, created_at=created_at)
+
+
+def render_index_html(manifest):
+    rows = []
+    for sid, meta in manifest["segments"].items():
+        link = f"<a href=\"html/{sid}.html\">{html.escape(sid)}</a>" if "seconds" in meta else html.escape(sid)
+        count = f"&lt; {meta['privacy_k']}" if meta.get("protected") else meta["rows"]
+        rows.append(
+            f"<tr><td>{link}</td><td>{count}</td>"
+            f"<td>{_fmt(meta.get('ahs'))}</td><td>{_fmt(meta.get('nhs'), '%')}</td></tr>"
+        )
+    body = (
+        f"<h1>Báo cáo theo phân khúc ({len(rows)})</h1>"
+        "<table><thead><tr><th>Phân khúc</th><th>Phản hồi</th><th>AHS</th><th>NHS</th></tr></thead>"
+        f"<tbody>{''.join(rows)}</tbody></table>"
+    )
+    return _PAGE.format(
+        title="Báo cáo theo phân khúc", body=body, version=manifest["data_version"], created_at=manifest["created_at"]
+    )
+
+
+# ==================== GENERATOR ====================
+class BatchReportGenerator:
+    def __init__(self, data_path=None, output_dir="reports", max_workers=None, min_rows=1):
+        self.data_path = Path(data_path or DEFAULT_DATA_PATH)
+        self.output_dir = Path(output_dir)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.min_rows = min_rows
+
+    def segments(self, frame):
+        return [
+            (major, semester, residence)
+            for (major, semester), residence in product(iter_segments(), residence_keys(frame))
+        ]
+
+    def _pool(self, frame, keyword_index):
+        # fork: worker kế thừa _FRAME và chỉ mục từ khóa của tiến trình chính (copy-on-write)
+        if "fork" in multiprocessing.get_all_start_methods():
+            _init_worker(frame, keyword_index)
+            return ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("fork"))
+        return ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=(frame, keyword_index))
+
+    def run(self):
+        start = time.perf_counter()
+        print(f"📂 Đọc dữ liệu: {self.data_path}")
+        version = data_version(self.data_path)
+        frame = shared_dataset(self.data_path, version).frame
+        created_at = pd.Timestamp.now().isoformat(timespec="seconds")
+        counts = SegmentCounts.build(frame)
+        segments = self.segments(frame)
+        print(f"🚀 {len(segments)} phân khúc · {len(frame)} phản hồi · {self.max_workers} worker")
+
+        (self.output_dir / "json").mkdir(parents=True, exist_ok=True)
+        (self.output_dir / "html").mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "data_version": version,
+            "source": self.data_path.name,
+            "created_at": created_at,
+            "segments": {},
+        }
+
+        done = 0
+        with self._pool(frame, KeywordIndex.build(frame)) as pool:
+            futures = [pool.submit(_run_segment, s) for s in segments]
+            for future in as_completed(futures):
+                (major, semester, residence), rows, payload, elapsed = future.result()
+                done += 1
+                sid = batch_segment_id(major, semester, residence)
+                meta = {"major": major, "semester": semester, "residence": residence, "rows": rows}
+                cells = counts.cells(major, semester, residence)
+                if payload is not None and is_protected(cells):
+                    # Dưới k phản hồi: không ghi báo cáo, không công bố cả số phản hồi
+                    meta.update(rows=None, protected=True, privacy_k=Config.PRIVACY_MIN_CELL_SIZE)
+                elif payload is not None and rows >= self.min_rows:
+                    payload = {
+                        "report": guard_report(payload["report"], cells),
+                        "chart_data": guard_chart_data(payload["chart_data"], cells),
+                    }
+                    meta.update(
+                        ahs=payload["report"].get("ahs_overall"),
+                        nhs=payload["report"].get("nhs_percentage"),
+                        seconds=round(elapsed, 3),
+                    )
+                    self._write_segment(sid, meta, payload, version, created_at)
+                else:
+                    meta["rows"] = rows if payload is not None else 0
+                manifest["segments"][sid] = meta
+                note = "  (ẩn: dưới k)" if meta.get("protected") else ""
+                print(f"  [{done:>3}/{len(segments)}] {sid:<40} {rows:>6} dòng  {elapsed:6.2f}s{note}")
+
+        manifest["segments"] = dict(sorted(manifest["segments"].items()))
+        manifest["elapsed_seconds"] = round(time.perf_counter() - start, 2)
+        with open(self.output_dir / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2, default=_to_builtin)
+        (self.output_dir / "index.html").write_text(render_index_html(manifest), encoding="utf-8")
+
+        written = sum(1 for m in manifest["segments"].values() if "seconds" in m)
+        print(f"✅ Đã ghi {written} báo cáo vào {self.output_dir} trong {manifest['elapsed_seconds']:.1f}s.")
+        return manifest
+
+    def _write_segment(self, sid, meta, payload, version, created_at):
+        record = dict(meta, data_version=version, **payload)
+        with open(self.output_dir / "json" / f"{sid}.json", "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, default=_to_builtin)
+        page = render_segment_html(meta, payload, version, created_at)
+        (self.output_dir / "html" / f"{sid}.html").write_text(page, encoding="utf-8")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sinh báo cáo JSON + HTML cho mọi phân khúc.")
+    parser.add_argument("--data", help="File dữ liệu đã xử lý (mặc định: data/processed/fpoly_survey_processed.csv)")
+    parser.add_argument("--out", default="reports", help="Thư mục ghi báo cáo")
+    parser.add_argument("--workers", type=int, help="Số tiến trình (mặc định: số CPU)")
+    parser.add_argument("--min-rows", type=int, default=1, help="Bỏ qua phân khúc có ít phản hồi hơn")
+    args = parser.parse_args(argv)
+    BatchReportGenerator(args.data, args.out, args.workers, args.min_rows).run()
+    return 0
@@ -0,0 +1,287 @@
+"""
+Kiểm tra tương đương số liệu (golden) và đo hiệu năng cho DataAnalyzer.
+
+golden: chạy analysis() và get_chart_data() trên các bộ dữ liệu cố định (file khảo sát
+đã xử lý + dữ liệu giả lập có seed) cho vài phân khúc, so với kết quả đã ghi ở
+bench/golden/. Mọi tối ưu analyzer phải giữ nguyên từng key của report và chart data
+(số thực so với sai số tương đối 1e-9). Kèm theo đó, chart data của mọi phân khúc sau
+guard_chart_data không được công bố ô đếm nào có 0 < n < k (src/analytics/privacy.py).
+
+run: đo thời gian và bộ nhớ đỉnh (tracemalloc) của từng bước `_calculate_*` và từng
+section của get_chart_data() trên 10k / 100k / 1M phản hồi giả lập, ghi kết quả JSON
+và so với baseline theo ngưỡng sai lệch.
+
+Ví dụ:
+    python -m src.analytics.bench golden              # kiểm tra, lệch thì exit 1
+    python -m src.analytics.bench golden --update     # ghi lại golden sau thay đổi có chủ đích
+    python -m src.analytics.bench run --rows 10000 100000 1000000 --output bench/analytics.json
+    python -m src.analytics.bench run --baseline bench/analytics.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.analyzer import DataAnalyzer
+from src.analytics.dimensions import add_dimension_columns
+from src.analytics.keywords import KeywordIndex
+from src.analytics.privacy import SegmentCounts, cell_violations, guard_chart_data
+from src.analytics.segments import SEMESTER_KEYS, add_segment_columns, filter_segment, iter_segments, segment_id
+from src.config import Config
+from src.etl.synthetic import generate_processed
+from src.etl.wish_classifier import add_wish_labels
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+GOLDEN_DIR = _PROJECT_ROOT / "bench" / "golden"
+SURVEY_PATH = _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"
+
+REL_TOL = 1e-9
+ABS_TOL = 1e-12
+# Phân khúc được ghim cho mỗi bộ dữ liệu: toàn bộ, một ngành, một giai đoạn học
+GOLDEN_SEGMENTS = [("all", "all"), ("IT", "all"), ("all", SEMESTER_KEYS[-1])]
+# Ngưỡng k dùng để kiểm tra ẩn ô nhỏ: ngưỡng cấu hình và một ngưỡng lớn hơn để gộp ô xảy ra thường hơn
+PRIVACY_CHECK_KS = (Config.PRIVACY_MIN_CELL_SIZE, 20)
+# Cùng thứ tự với DataAnalyzer.analysis() (các bước sau dùng cột individual_ahs của bước A)
+ANALYSIS_STEPS = [
+    "_calculate_ahs", "_calculate_factor_scores", "_calculate_nhs", "_calculate_semester_happiness_curve",
+    "_calculate_gpa_happiness_correlation", "_calculate_residence_stress_index", "_calculate_correlations",
+    "_calculate_retention_risk", "_analyze_wishes", "_calculate_wave_trend", "_calculate_reliability",
+]
+
+
+# ==================== DỮ LIỆU ====================
+def synthetic_frame(rows, seed=0):
+    """Dữ liệu giả lập cùng định dạng frame của Dashboard (nhãn điều ước, cột phân khúc, đợt khảo sát, cột chiều)."""
+    frame = generate_processed(rows, seed=seed)
+    frame["survey_wave"] = np.random.default_rng(seed + 1).choice(["2025-FA", "2026-SP"], size=rows)
+    return add_dimension_columns(add_segment_columns(add_wish_labels(frame)))
+
+
+def golden_cases():
+    """{tên: frame} của các bộ dữ liệu cố định dùng cho golden."""
+    cases = {"synthetic": synthetic_frame(2000, seed=20260)}
+    if SURVEY_PATH.exists():
+        cases["survey"] = add_dimension_columns(add_segment_columns(add_wish_labels(pd.read_csv(SURVEY_PATH))))
+    return cases
+
+
+# ==================== GOLDEN ====================
+def canonical(value):
+    """Dạng JSON ổn định của kết quả phân tích (key -> str, numpy -> Python, NaN -> 'NaN')."""
+    if isinstance(value, dict):
+        return {str(k.item() if isinstance(k, np.generic) else k): canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [canonical(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value) if not math.isnan(value) else "NaN"
+    if isinstance(value, (pd.Timestamp, pd.Interval)):
+        return str(value)
+    return value
+
+
+def golden_payload(frame):
+    payload = {}
+    for major, semester in GOLDEN_SEGMENTS:
+        subset = filter_segment(frame, major, semester)
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = DataAnalyzer(df=subset).analysis()
+        chart_data = DataAnalyzer(df=subset).get_chart_data()
+        payload[segment_id(major, semester)] = canonical({"report": report, "chart_data": chart_data})
+    return payload
+
+
+def privacy_violations(frame, ks=PRIVACY_CHECK_KS):
+    """[(k, phân khúc, ô)] của các ô 0 < n < k còn lại sau guard_chart_data, trên mọi phân khúc."""
+    counts = SegmentCounts.build(frame)
+    found = []
+    for major, semester in iter_segments():
+        subset = filter_segment(frame, major, semester)
+        if subset.empty:
+            continue
+        chart_data = DataAnalyzer(df=subset).get_chart_data()
+        for k in ks:
+            guarded = guard_chart_data(chart_data, counts.cells(major, semester), k)
+            found += [(k, segment_id(major, semester), cell) for cell in cell_violations(guarded, k)]
+    return found
+
+
+def compare(expected, actual, path="$"):
+    """Danh sách khác biệt (đường dẫn key + giá trị) giữa hai payload golden."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        diffs = [f"{path}.{k}: thiếu" for k in expected if k not in actual]
+        diffs += [f"{path}.{k}: key mới" for k in actual if k not in expected]
+        for k in expected:
+            if k in actual:
+                diffs += compare(expected[k], actual[k], f"{path}.{k}")
+        return diffs
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return [f"{path}: độ dài {len(expected)} -> {len(actual)}"]
+        return [d for i, (e, a) in enumerate(zip(expected, actual)) for d in compare(e, a, f"{path}[{i}]")]
+    numbers = (int, float)
+    if isinstance(expected, numbers) and isinstance(actual, numbers) and not isinstance(expected, bool):
+        if math.isclose(expected, actual, rel_tol=REL_TOL, abs_tol=ABS_TOL):
+            return []
+    elif expected == actual:
+        return []
+    return [f"{path}: {expected!r} -> {actual!r}"]
+
+
+def run_golden(update=False, golden_dir=GOLDEN_DIR):
+    golden_dir = Path(golden_dir)
+    failures = 0
+    for name, frame in golden_cases().items():
+        violations = privacy_violations(frame)
+        if violations:
+            failures += 1
+            print(f"❌ {name}: {len(violations)} ô dưới k sau khi ẩn ô nhỏ")
+            for k, sid, cell in violations[:20]:
+                print(f"   k={k} {sid}: {cell}")
+        path = golden_dir / f"{name}.json"
+        payload = golden_payload(frame)
+        if update or not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(json.dumps(payload, ensure_ascii=False, indent=1, sort_keys=True), encoding="utf-8")
+            print(f"💾 {name}: đã ghi golden ({len(frame)} dòng) -> {path}")
+            continue
+        diffs = compare(json.loads(path.read_text(encoding="utf-8")), payload)
+        if diffs:
+            failures += 1
+            print(f"❌ {name}: {len(diffs)} khác biệt so với golden")
+            for diff in diffs[:20]:
+                print(f"   {diff}")
+        else:
+            print(f"✅ {name}: khớp golden ({len(frame)} dòng, {len(payload)} phân khúc)")
+    return 1 if failures else 0
+
+
+# ==================== BENCHMARK ====================
+def _measure(fn, repeat=1):
+    """(thời gian nhỏ nhất qua `repeat` lần, bộ nhớ đỉnh MB của một lần chạy dưới tracemalloc)."""
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(seconds), peak / 2**20
+
+
+def bench_rows(rows, repeat=1, seed=0):
+    """Kết quả đo cho một kích thước dữ liệu: danh sách {rows, group, stage, seconds, peak_mb}."""
+    results = []
+
+    def record(group, stage, fn):
+        seconds, peak_mb = _measure(fn, repeat)
+        results.append({"rows": rows, "group": group, "stage": stage,
+                        "seconds": round(seconds, 4), "peak_mb": round(peak_mb, 1)})
+        print(f"  {rows:>9,} {group:<10} {stage:<38} {seconds:8.3f}s {peak_mb:9.1f} MB")
+
+    frame = synthetic_frame(rows, seed)
+    index = KeywordIndex.build(frame)
+    record("setup", "KeywordIndex.build", lambda: KeywordIndex.build(frame))
+
+    # Các bước chạy theo thứ tự của analysis() trên cùng một bản sao; chạy lại một bước chỉ
+    # ghi đè cột / key nó tạo ra nên đo nhiều lần vẫn cho cùng trạng thái
+    analyzer = DataAnalyzer(df=frame.copy(), keyword_index=index)
+    for step in ANALYSIS_STEPS:
+        record("analysis", step, getattr(analyzer, step))
+
+    chart_analyzer = DataAnalyzer(df=frame, keyword_index=index)
+    timings = {}
+    chart_analyzer.get_chart_data(timings=timings)
+    for section in timings:
+        record("chart_data", section, lambda section=section: chart_analyzer.get_chart_data(sections=[section]))
+    return results
+
+
+def check_regression(results, baseline, tolerance, min_seconds=0.05, min_mb=1.0):
+    """
+    Danh sách lỗi khi một bước chậm hơn / tốn bộ nhớ hơn baseline quá `tolerance`.
+    Bước quá nhanh / quá nhỏ trong baseline bị bỏ qua vì nhiễu đo lớn hơn chính số đo.
+    """
+    reference = {(r["rows"], r["group"], r["stage"]): r for r in baseline["results"]}
+    failures = []
+    for result in results:
+        base = reference.get((result["rows"], result["group"], result["stage"]))
+        if base is None:
+            continue
+        label = f"{result['rows']:,} {result['group']}.{result['stage']}"
+        if base["seconds"] >= min_seconds and result["seconds"] > base["seconds"] * (1 + tolerance):
+            failures.append(f"{label}: {result['seconds']}s > baseline {base['seconds']}s (+{tolerance:.0%})")
+        if base["peak_mb"] >= min_mb and result["peak_mb"] > base["peak_mb"] * (1 + tolerance):
+            failures.append(f"{label}: {result['peak_mb']} MB > baseline {base['peak_mb']} MB (+{tolerance:.0%})")
+    return failures
+
+
+def run_bench(args):
+    meta = {
+        "python": platform.python_version(), "numpy": np.__version__, "pandas": pd.__version__,
+        "machine": platform.machine(), "repeat": args.repeat, "seed": args.seed,
+    }
+    print(f"⏱️ Benchmark DataAnalyzer: {', '.join(f'{r:,}' for r in args.rows)} phản hồi")
+    results = [r for rows in args.rows for r in bench_rows(rows, args.repeat, args.seed)]
+    payload = {"meta": meta, "results": results}
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"💾 Đã ghi kết quả: {args.output}")
+    failures = []
+    if args.baseline and Path(args.baseline).exists() and not args.save_baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failures = check_regression(results, baseline, args.tolerance)
+    if args.baseline and args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"💾 Đã lưu baseline: {args.baseline}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Benchmark đạt ngưỡng.")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Golden-test số liệu và benchmark cho DataAnalyzer.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    golden = commands.add_parser("golden", help="So report / chart data với kết quả đã ghim")
+    golden.add_argument("--update", action="store_true", help="Ghi lại golden từ code hiện tại")
+    golden.add_argument("--dir", default=str(GOLDEN_DIR), help="Thư mục chứa file golden")
+
+    bench = commands.add_parser("run", help="Đo thời gian & bộ nhớ đỉnh từng bước")
+    bench.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    bench.add_argument("--repeat", type=int, default=1, help="Số lần đo thời gian (lấy nhỏ nhất)")
+    bench.add_argument("--seed", type=int, default=0)
+    bench.add_argument("--output", help="Ghi kết quả JSON ra file")
+    bench.add_argument("--baseline", help="File kết quả trước đó để so sánh")
+    bench.add_argument("--tolerance", type=float, default=0.25, help="Sai lệch cho phép so với baseline")
+    bench.add_argument("--save-baseline", action="store_true", help="Ghi kết quả lần này làm baseline")
+    args = parser.parse_args(argv)
+
+    if args.command == "golden":
+        return run_golden(args.update, args.dir)
+    return run_bench(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Chiều phân tích mã hóa từ điển (dictionary-encoded): ngành, nhóm ngành, kỳ học, giai
+đoạn học, nhóm GPA, nơi ở, đợt khảo sát.
+
+Mỗi chiều là một cột `dim_<tên>` kiểu pandas Categorical: mã nguyên (int8/int16) cho
+từng dòng + từ điển nhãn dùng chung. ETL ghi các cột này vào bộ dữ liệu dạng cột
+(src/etl/columnar.py lưu mã thành .npy và từ điển trong meta.json), nên mọi group-by
+chỉ làm việc trên mã nguyên; đổi nhãn hiển thị (MAJOR_LABELS...) chỉ áp lên từ điển
+k phần tử thay vì n dòng. Frame không có cột `dim_*` (file CSV cũ, DataFrame tự tạo)
+được mã hóa tại chỗ với cùng quy tắc.
+
+Thứ tự từ điển: theo Config khi chiều có thứ tự tự nhiên (nhóm ngành, giai đoạn học,
+nhóm GPA), còn lại là các nhãn đã sắp xếp (giống groupby(sort=True)).
+"""
+import numpy as np
+import pandas as pd
+
+from src.analytics.segments import MAJOR_KEYS
+from src.config import Config
+
+PREFIX = "dim_"
+
+
+def _raw(column):
+    return lambda df: pd.Categorical(df[column]) if column in df.columns else None
+
+
+def _major_key(df):
+    if "dem_major" not in df.columns:
+        return None
+    keys = df["dem_major"].map(Config.MAJOR_GROUP_MAPPING).fillna(Config.DEFAULT_MAJOR_GROUP)
+    return pd.Categorical(keys, categories=MAJOR_KEYS[1:])
+
+
+def _semester_bucket(df):
+    if "dem_semester" not in df.columns:
+        return None
+    semesters = pd.to_numeric(df["dem_semester"], errors="coerce").to_numpy(dtype=np.float64)
+    codes = np.full(len(df), -1, dtype=np.int8)
+    for code, (low, high) in enumerate(Config.SEMESTER_BUCKETS.values()):
+        inside = ~np.isnan(semesters)
+        if low is not None:
+            inside &= semesters >= low
+        if high is not None:
+            inside &= semesters <= high
+        codes[inside & (codes < 0)] = code
+    return pd.Categorical.from_codes(codes, categories=list(Config.SEMESTER_BUCKETS))
+
+
+def _gpa_group(df):
+    if "dem_gpa" not in df.columns:
+        return None
+    return pd.cut(df["dem_gpa"], bins=Config.GPA_GROUP_BINS, labels=Config.GPA_GROUP_LABELS, right=False).array
+
+
+# tên chiều -> hàm dựng Categorical từ các cột gốc (None nếu frame thiếu cột nguồn)
+DIMENSIONS = {
+    "major": _raw("dem_major"),
+    "major_key": _major_key,
+    "semester": _raw("dem_semester"),
+    "semester_bucket": _semester_bucket,
+    "gpa_group": _gpa_group,
+    "residence": _raw("dem_residence"),
+    "wave": _raw("survey_wave"),
+}
+
+
+def dimension(df, name):
+    """Categorical của chiều `name`: lấy cột `dim_<name>` nếu đã mã hóa sẵn, nếu không thì dựng tại chỗ."""
+    column = PREFIX + name
+    if column in df.columns and isinstance(df[column].dtype, pd.CategoricalDtype):
+        return df[column].array
+    return DIMENSIONS[name](df)
+
+
+def add_dimension_columns(df):
+    """Bản sao của df kèm cột `dim_<tên>` cho mọi chiều có cột nguồn."""
+    data = df.copy()
+    for name, build in DIMENSIONS.items():
+        values = build(data)
+        if values is not None:
+            data[PREFIX + name] = values
+    return data
+
+
+def dictionaries(df):
+    """{tên chiều: danh sách nhãn} của các cột `dim_*` trong df."""
+    return {
+        column[len(PREFIX):]: df[column].cat.categories.tolist()
+        for column in df.columns
+        if column.startswith(PREFIX) and isinstance(df[column].dtype, pd.CategoricalDtype)
+    }
+
+
+def group_codes(df, key, observed=True):
+    """
+    (mã nhóm int64 của từng dòng, danh sách nhãn) cho một chiều (tên trong DIMENSIONS)
+    hoặc một cột bất kỳ của df (nhãn sắp xếp). observed=True chỉ giữ các nhóm có mặt trong
+    df (như groupby(observed=True)); dòng thiếu giá trị có mã -1.
+    """
+    if key in DIMENSIONS:
+        values = dimension(df, key)
+        if values is None:
+            raise KeyError(key)
+        if observed:
+            # Frame con (lọc phân khúc) vẫn giữ đủ từ điển: bỏ các nhãn không còn dòng nào
+            values = values.remove_unused_categories()
+        return np.asarray(values.codes, dtype=np.int64), values.categories.tolist()
+    codes, labels = pd.factorize(df[key], sort=True)
+    return codes.astype(np.int64), labels.tolist()
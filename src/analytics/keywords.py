@@ -0,0 +1,233 @@
+"""
+Chỉ mục từ khóa / cụm từ (uni-, bi-, tri-gram) cho cột điều ước.
+
+Mỗi nội dung điều ước khác nhau chỉ được tách âm tiết một lần khi xây chỉ mục; kết quả
+lưu dạng thưa: vector đếm cụm từ của từng nội dung + ánh xạ dòng -> nội dung. Vector đếm
+của một tập dòng bất kỳ (một phân khúc, một bộ lọc) là tổng các vector đó nên top-k của
+mọi view được tính ngay mà không cần tách từ lại.
+
+Cụm từ không chứa stopword và không vượt qua dấu câu, nhờ đó
+"học phí", "máy lạnh" được giữ nguyên thay vì bị tách thành từng âm tiết.
+"""
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.text import stopwords as load_stopwords, tokenize_batch
+from src.config import Config
+
+
+def subsumption_pairs(vocab):
+    """Cặp (cụm dài, cụm con liền kề ngắn hơn một âm tiết) cùng có trong vocab."""
+    position = {term: i for i, term in enumerate(vocab)}
+    parents, children = [], []
+    for i, term in enumerate(vocab):
+        parts = term.split(" ")
+        if len(parts) < 2:
+            continue
+        for child in {" ".join(parts[:-1]), " ".join(parts[1:])}:
+            if child in position:
+                parents.append(i)
+                children.append(position[child])
+    return np.array(parents, dtype=np.int64), np.array(children, dtype=np.int64)
+
+
+def suppress_subphrases(counts, parents, children):
+    """Đặt về 0 số đếm của cụm con khi phần lớn số lần xuất hiện nằm trong các cụm dài hơn."""
+    if not len(parents):
+        return counts
+    in_phrases = np.bincount(children, weights=counts[parents], minlength=len(counts))
+    return np.where(in_phrases >= Config.KEYWORD_SUBSUME_RATIO * counts, 0, counts)
+
+
+def rank_terms(vocab, counts, k):
+    """Vị trí của k cụm từ có số đếm > 0 lớn nhất; hòa thì xếp theo thứ tự chữ cái."""
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero) > k:
+        threshold = np.partition(counts[nonzero], len(nonzero) - k)[len(nonzero) - k]
+        nonzero = nonzero[counts[nonzero] >= threshold]
+    return nonzero[np.lexsort((vocab[nonzero], -counts[nonzero]))][:k]
+
+
+def _compound_keys(stopwords, token_vocab, base):
+    """Mã n-gram (theo token_vocab) của các stopword nhiều âm tiết xuất hiện trong dữ liệu."""
+    keys = {}
+    for phrase in stopwords:
+        parts = phrase.split("_")
+        if len(parts) < 2:
+            continue
+        pos = token_vocab.get_indexer(parts)
+        if (pos < 0).any():
+            continue
+        key = np.uint64(0)
+        for p in pos.astype(np.uint64):
+            key = key * base + p
+        keys.setdefault(len(parts), []).append(key)
+    return {n: np.array(k, dtype=np.uint64) for n, k in keys.items()}
+
+
+class KeywordIndex:
+    def __init__(self, vocab, row_labels, row_text, entry_text, entry_term, entry_count):
+        self.vocab = np.asarray(vocab, dtype=str)
+        self.row_labels = pd.Index(row_labels)
+        self.row_text = np.asarray(row_text, dtype=np.int64)
+        self.entry_text = np.asarray(entry_text, dtype=np.int64)
+        self.entry_term = np.asarray(entry_term, dtype=np.int64)
+        self.entry_count = np.asarray(entry_count, dtype=np.int64)
+        self.n_texts = int(self.entry_text.max()) + 1 if len(self.entry_text) else 0
+        self.n_texts = max(self.n_texts, int(self.row_text.max()) + 1 if len(self.row_text) else 0)
+        self._parent, self._child = subsumption_pairs(self.vocab.tolist())
+
+    # ==================== XÂY DỰNG ====================
+    @classmethod
+    def build(cls, df, column="wish", max_n=None, min_count=None):
+        """Xây chỉ mục từ cột văn bản của df; nhãn dòng (df.index) được giữ để tra cứu tập con."""
+        max_n = max_n or Config.KEYWORD_MAX_NGRAM
+        min_count = Config.KEYWORD_MIN_PHRASE_COUNT if min_count is None else min_count
+        texts = df[column] if column in df.columns else pd.Series(None, index=df.index, dtype=object)
+        codes, uniques = pd.factorize(texts, sort=False)
+        empty = cls([], df.index, codes, [], [], [])
+        if len(uniques) == 0:
+            return empty
+
+        ids, token_vocab, text_of, _ = tokenize_batch(uniques, keep_punctuation=True)
+
+        stopwords = load_stopwords()
+        is_word = np.array([t.isalpha() for t in token_vocab], dtype=bool)
+        is_stop = np.array([t in stopwords for t in token_vocab], dtype=bool)
+        long_enough = np.array([len(t) >= Config.KEYWORD_MIN_CHARS for t in token_vocab], dtype=bool)
+        word, content = is_word[ids], ~is_stop[ids]
+
+        base = np.uint64(len(token_vocab) + 1)
+        uids = ids.astype(np.uint64)
+        # Âm tiết thuộc một stopword nhiều âm tiết ("phù hợp", "đánh giá") bị loại khỏi mọi cụm
+        for n, keys in _compound_keys(stopwords, token_vocab, base).items():
+            m = len(ids) - n + 1
+            if m <= 0 or not len(keys):
+                continue
+            grams = uids[:m].copy()
+            for j in range(1, n):
+                grams = grams * base + uids[j: j + m]
+            for start in np.flatnonzero(np.isin(grams, keys)):
+                word[start: start + n] = False
+        phrase_text, phrase_key, phrase_vocab = [], [], []
+        offset = 0
+        for n in range(1, max_n + 1):
+            m = len(ids) - n + 1
+            if m <= 0:
+                break
+            valid = np.ones(m, dtype=bool)
+            keys = uids[:m].copy()
+            for j in range(n):
+                valid &= word[j: j + m] & content[j: j + m]
+                if j:
+                    keys = keys * base + uids[j: j + m]
+            if n == 1:
+                valid &= long_enough[ids[:m]]
+            pos = np.flatnonzero(valid)
+            if not len(pos):
+                continue
+            uniq, first, inverse = np.unique(keys[pos], return_index=True, return_inverse=True)
+            starts = pos[first]
+            phrases = [" ".join(token_vocab[ids[s: s + n]]) for s in starts]
+            phrase_vocab.extend(phrases)
+            phrase_text.append(text_of[pos])
+            phrase_key.append(inverse + offset)
+            offset += len(uniq)
+        if not phrase_vocab:
+            return empty
+
+        entry_text = np.concatenate(phrase_text)
+        entry_term = np.concatenate(phrase_key)
+        pair, entry_count = np.unique(entry_text * offset + entry_term, return_counts=True)
+        entry_text, entry_term = pair // offset, pair % offset
+
+        # Bỏ stopword nhiều âm tiết và cụm từ >= 2 âm tiết xuất hiện quá ít trên toàn bộ dữ liệu
+        vocab = np.array(phrase_vocab, dtype=object)
+        weights = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        totals = np.bincount(entry_term, weights=entry_count * weights[entry_text], minlength=offset)
+        n_words = np.array([v.count(" ") + 1 for v in vocab])
+        keep = (totals >= np.where(n_words > 1, min_count, 1)) & np.array(
+            [v.replace(" ", "_") not in stopwords for v in vocab], dtype=bool
+        )
+        remap = np.full(offset, -1, dtype=np.int64)
+        remap[keep] = np.arange(keep.sum())
+        mask = keep[entry_term]
+        return cls(vocab[keep], df.index, codes, entry_text[mask], remap[entry_term[mask]], entry_count[mask])
+
+    # ==================== TRA CỨU ====================
+    def _rows(self, index):
+        if index is None:
+            return self.row_text
+        positions = self.row_labels.get_indexer(index)
+        if (positions < 0).any():
+            raise KeyError("Một số dòng không có trong chỉ mục từ khóa.")
+        return self.row_text[positions]
+
+    def counts(self, index=None):
+        """Vector đếm (theo vocab) của các dòng có nhãn trong `index` (None = toàn bộ)."""
+        rows = self._rows(index)
+        weights = np.bincount(rows[rows >= 0], minlength=self.n_texts)
+        if not len(self.entry_term):
+            return np.zeros(len(self.vocab), dtype=np.int64)
+        return np.bincount(
+            self.entry_term, weights=self.entry_count * weights[self.entry_text], minlength=len(self.vocab)
+        ).astype(np.int64)
+
+    def top_k(self, k=20, index=None):
+        """
+        Top-k cụm từ phổ biến nhất dạng {cụm từ: số lần}. Cụm con bị ẩn khi phần lớn số lần
+        xuất hiện của nó nằm trong các cụm dài hơn (ví dụ "phí" so với "học phí").
+        """
+        counts = suppress_subphrases(self.counts(index), self._parent, self._child)
+        return {str(self.vocab[i]): int(counts[i]) for i in rank_terms(self.vocab, counts, k)}
+
+    # ==================== LƯU ====================
+    def save(self, path):
+        labels = self.row_labels.to_numpy()
+        if labels.dtype == object:
+            labels = labels.astype(str)
+        np.savez_compressed(
+            path, vocab=self.vocab, row_labels=labels, row_text=self.row_text,
+            entry_text=self.entry_text, entry_term=self.entry_term, entry_count=self.entry_count,
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as f:
+            return cls(f["vocab"], f["row_labels"], f["row_text"], f["entry_text"], f["entry_term"], f["entry_count"])
+
+
+def keyword_index_path(processed_path) -> Path:
+    from src.etl.snapshot import data_version
+    return Path(processed_path).parent / Config.KEYWORD_DIR_NAME / f"{data_version(processed_path)}.npz"
+
+
+def load_or_build(processed_path, frame=None):
+    """
+    Chỉ mục của phiên bản dữ liệu hiện tại: đọc từ đĩa nếu đã có, nếu chưa thì xây
+    (từ `frame` nếu truyền vào, cùng nhãn dòng với file CSV) và lưu lại, xóa bản cũ.
+    """
+    path = keyword_index_path(processed_path)
+    if path.exists():
+        return KeywordIndex.load(path)
+    if frame is None:
+        frame = pd.read_csv(processed_path)
+    index = KeywordIndex.build(frame)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Tên tạm riêng cho mỗi tiến trình: Dashboard, worker API và load test có thể cùng dựng lần đầu
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.tmp.npz")
+    try:
+        index.save(tmp)
+        tmp.replace(path)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+        if not path.exists():
+            raise
+        return KeywordIndex.load(path)  # tiến trình khác vừa ghi xong cùng phiên bản
+    for old in path.parent.glob("[!.]*.npz"):  # bỏ qua file tạm (.*.tmp.npz) của tiến trình khác
+        if old != path:
+            old.unlink(missing_ok=True)
+    return index
@@ -0,0 +1,323 @@
+"""
+Bảo vệ danh tính khi hiển thị (k-anonymity / ẩn ô nhỏ).
+
+Bộ lọc hẹp có thể thu chart data và luồng phản hồi về một vài sinh viên nhận ra được.
+Trước khi hiển thị, mọi ô (nhóm) có ít hơn k = Config.PRIVACY_MIN_CELL_SIZE phản hồi bị
+ẩn hoặc gộp:
+- cả phân khúc < k: không hiện biểu đồ, KPI hay phản hồi tự do nào
+- phân bố (ngành, kỳ học, nơi ở): gộp các ô nhỏ thành một ô Config.PRIVACY_OTHER_LABEL
+- trung bình / alpha / khoảng cách có ý nghĩa theo nhóm: bỏ các nhóm nhỏ
+- histogram GPA, lưới phân tán GPA × AHS: ẩn các bin / ô < k
+- từ khóa điều ước xuất hiện < k lần: bỏ (tên riêng, chi tiết nhận dạng)
+- luồng phản hồi: ẩn kỳ học khi ô (nhóm ngành, kỳ) nhỏ
+
+Dashboard, API (src/api/server.py) và báo cáo hàng loạt (src/analytics/batch.py) cùng áp dụng
+guard_chart_data / guard_report trước khi công bố.
+
+Số phản hồi lấy từ `SegmentCounts`: khối đếm ngành × kỳ học × nhóm GPA × nơi ở dựng một
+lượt bincount trên mã chiều (src/analytics/dimensions.py) cho mỗi phiên bản dữ liệu. Mỗi
+lần kiểm tra chỉ cộng một lát của khối (vài trăm ô), không quét lại dòng nào.
+"""
+import numpy as np
+import pandas as pd
+
+from src.analytics.analyzer import MAJOR_LABELS
+from src.analytics.dimensions import dimension
+from src.config import Config
+
+# Các chiều của khối đếm; mỗi trục có thêm một ô cuối cho dòng thiếu giá trị
+CELL_DIMENSIONS = ("major", "semester", "gpa_group", "residence")
+
+
+class SegmentCounts:
+    def __init__(self, labels, cube):
+        self.labels = labels  # {chiều: [nhãn]}
+        self.cube = cube      # mảng số phản hồi, trục theo CELL_DIMENSIONS
+
+    @classmethod
+    def build(cls, df):
+        labels, codes = {}, []
+        for name in CELL_DIMENSIONS:
+            values = dimension(df, name)
+            if values is None:
+                labels[name], column = [], np.full(len(df), -1, dtype=np.int64)
+            else:
+                labels[name], column = values.categories.tolist(), np.asarray(values.codes, dtype=np.int64)
+            codes.append(np.where(column < 0, len(labels[name]), column))
+        shape = tuple(len(labels[name]) + 1 for name in CELL_DIMENSIONS)
+        flat = np.ravel_multi_index(codes, shape) if len(df) else np.zeros(0, dtype=np.int64)
+        cube = np.bincount(flat, minlength=int(np.prod(shape))).reshape(shape)
+        return cls(labels, cube)
+
+    def _major_keys(self):
+        # Nhóm ngành của từng nhãn ngành (ô thiếu ngành rơi vào nhóm mặc định, như add_segment_columns)
+        keys = [Config.MAJOR_GROUP_MAPPING.get(m, Config.DEFAULT_MAJOR_GROUP) for m in self.labels["major"]]
+        return np.array(keys + [Config.DEFAULT_MAJOR_GROUP], dtype=object)
+
+    def _semester_selector(self, semester):
+        semesters = np.array([float(s) for s in self.labels["semester"]] + [np.nan])
+        bounds = Config.SEMESTER_BUCKETS.get(semester)
+        # Dòng thiếu kỳ học đã bị loại khỏi frame phân tích (add_segment_columns)
+        selected = ~np.isnan(semesters)
+        if bounds is not None:
+            low, high = bounds
+            if low is not None:
+                selected &= semesters >= low
+            if high is not None:
+                selected &= semesters <= high
+        return selected
+
+    def _selectors(self, major, semester, residence="all"):
+        """
+        Mask trên từng trục của khối đếm cho phân khúc ngành × giai đoạn học (cùng quy tắc với
+        segment_mask), thu hẹp thêm theo nơi ở như báo cáo hàng loạt (src/analytics/batch.py).
+        """
+        selectors = [np.ones(len(self.labels[name]) + 1, dtype=bool) for name in CELL_DIMENSIONS]
+        if major != "all":
+            selectors[0] = self._major_keys() == major
+        selectors[1] = self._semester_selector(semester)
+        if residence != "all":
+            selectors[3] = np.array(self.labels["residence"] + [None], dtype=object) == residence
+        return selectors
+
+    def _axis_labels(self, axis, selector):
+        return np.array(self.labels[CELL_DIMENSIONS[axis]] + [None], dtype=object)[selector]
+
+    def cells(self, major="all", semester="all", residence="all"):
+        """{'total': số phản hồi, chiều: {nhãn: số phản hồi}} của phân khúc (bỏ ô thiếu giá trị)."""
+        selectors = self._selectors(major, semester, residence)
+        sub = self.cube[np.ix_(*selectors)]
+        out = {"total": int(sub.sum())}
+        for axis, name in enumerate(CELL_DIMENSIONS):
+            marginal = sub.sum(axis=tuple(a for a in range(sub.ndim) if a != axis))
+            out[name] = {
+                label: int(n) for label, n in zip(self._axis_labels(axis, selectors[axis]), marginal) if label is not None
+            }
+        return out
+
+    def feedback_cells(self, major="all", semester="all"):
+        """{(nhóm ngành, kỳ học): số phản hồi} của phân khúc, cho luồng phản hồi."""
+        selectors = self._selectors(major, semester)
+        table = self.cube[np.ix_(*selectors)].sum(axis=(2, 3))  # ngành × kỳ học
+        out = {}
+        for key, row in zip(self._major_keys()[selectors[0]], table):
+            for label, n in zip(self._axis_labels(1, selectors[1]), row):
+                out[(key, int(label))] = out.get((key, int(label)), 0) + int(n)
+        return out
+
+
+# ==================== ẨN / GỘP Ô NHỎ ====================
+def _k(k):
+    return Config.PRIVACY_MIN_CELL_SIZE if k is None else k
+
+
+def is_protected(cells, k=None):
+    """True nếu cả phân khúc có ít hơn k phản hồi (không được hiển thị gì)."""
+    return cells["total"] < _k(k)
+
+
+def _coarsen(dist, sizes, k, suppressed, name):
+    """
+    Phân bố {nhãn: số lượng} với các ô < k gộp thành một ô "khác". Ô gộp vẫn < k thì gộp thêm
+    các ô còn lại từ nhỏ nhất tới khi đủ k; không đủ thì bỏ hẳn ô gộp.
+    """
+    small = [label for label in dist if sizes.get(label, 0) < k]
+    if not small:
+        return dist
+    others = sorted((label for label in dist if label not in small), key=lambda label: dist[label])
+    while sum(dist[label] for label in small) < k and others:
+        small.append(others.pop(0))
+    suppressed[name] = small
+    kept = {label: n for label, n in dist.items() if label not in small}
+    merged = sum(dist[label] for label in small)
+    if merged >= k:
+        kept[Config.PRIVACY_OTHER_LABEL] = merged
+    return kept
+
+
+def _kept_gaps(gaps, sizes, k):
+    return [g for g in gaps if sizes.get(g["a"], 0) >= k and sizes.get(g["b"], 0) >= k]
+
+
+def guard_chart_data(chart_data, cells, k=None):
+    """
+    Bản sao chart data đã ẩn / gộp các ô < k, kèm key 'privacy' = {'k', 'total', 'protected',
+    'suppressed': {section: [nhãn]}}. Phân khúc < k chỉ còn key 'privacy'.
+    """
+    k = _k(k)
+    privacy = {"k": k, "total": cells["total"], "protected": is_protected(cells, k), "suppressed": {}}
+    if privacy["protected"]:
+        return {"privacy": privacy}
+    out = dict(chart_data)
+    suppressed = privacy["suppressed"]
+
+    majors = {}
+    for label, n in cells["major"].items():
+        majors[MAJOR_LABELS.get(label, label)] = majors.get(MAJOR_LABELS.get(label, label), 0) + n
+    semesters = {int(label): n for label, n in cells["semester"].items()}
+    gpa_groups, residences = cells["gpa_group"], cells["residence"]
+
+    if "major_dist" in out:
+        out["major_dist"] = _coarsen(out["major_dist"], majors, k, suppressed, "major_dist")
+    if "semester_dist" in out:
+        out["semester_dist"] = _coarsen(out["semester_dist"], semesters, k, suppressed, "semester_dist")
+    if "residence_dist" in out:
+        out["residence_dist"] = _coarsen(out["residence_dist"], residences, k, suppressed, "residence_dist")
+
+    for name, sizes in (("semester_happiness", semesters), ("gpa_happiness", gpa_groups)):
+        if name in out:
+            small = [label for label in out[name] if sizes.get(label, 0) < k]
+            if small:
+                suppressed[name] = small
+                out[name] = {label: v for label, v in out[name].items() if label not in small}
+    if "factor_by_major" in out:
+        small = [row["major"] for row in out["factor_by_major"] if majors.get(row["major"], 0) < k]
+        if small:
+            suppressed["factor_by_major"] = small
+            out["factor_by_major"] = [row for row in out["factor_by_major"] if row["major"] not in small]
+    if "reliability" in out:
+        by_major = out["reliability"].get("alpha_by_major", {})
+        small = [label for label in by_major if majors.get(label, 0) < k]
+        if small:
+            suppressed["reliability"] = small
+            out["reliability"] = {
+                **out["reliability"],
+                "alpha_by_major": {label: v for label, v in by_major.items() if label not in small},
+            }
+    if "significance" in out:
+        significance = dict(out["significance"])
+        for name, sizes in (("semester_happiness", semesters), ("gpa_happiness", gpa_groups),
+                            ("residence_stress", residences)):
+            if name in significance:
+                significance[name] = _kept_gaps(significance[name], sizes, k)
+        if "factor_by_major" in significance:
+            significance["factor_by_major"] = {
+                factor: _kept_gaps(gaps, majors, k) for factor, gaps in significance["factor_by_major"].items()
+            }
+        out["significance"] = significance
+
+    if "gpa_dist" in out:
+        bins, counts = out["gpa_dist"]["bins"], out["gpa_dist"]["counts"]
+        small = [i for i, n in enumerate(counts) if n is not None and 0 < n < k]
+        if small:
+            suppressed["gpa_dist"] = [f"{bins[i]:g}-{bins[i + 1]:g}" for i in small]
+            out["gpa_dist"] = {**out["gpa_dist"], "counts": [None if i in small else n for i, n in enumerate(counts)]}
+    if "gpa_ahs_scatter" in out:
+        # Ô lưới GPA × AHS nhỏ bị bỏ; đường OLS là thống kê trên cả phân khúc (>= k) nên giữ nguyên
+        scatter = out["gpa_ahs_scatter"]
+        kept = np.asarray(scatter["count"], dtype=np.int64) >= k
+        if not kept.all():
+            out["gpa_ahs_scatter"] = {
+                **scatter,
+                **{key: np.asarray(scatter[key])[kept].tolist() for key in ("gpa", "ahs", "count")},
+            }
+
+    if "wish_word_counts" in out:
+        rare = [word for word, n in out["wish_word_counts"].items() if n < k]
+        if rare:
+            suppressed["wish_word_counts"] = rare
+            out["wish_word_counts"] = {word: n for word, n in out["wish_word_counts"].items() if n >= k}
+
+    out["privacy"] = privacy
+    return out
+
+
+def _kept_comparison(comparison, sizes, k):
+    """Kết quả compare_groups chỉ còn các nhóm >= k và các cặp giữa chúng."""
+    kept = {label for label in comparison["groups"] if sizes.get(label, 0) >= k}
+    return {
+        **comparison,
+        "groups": {label: v for label, v in comparison["groups"].items() if label in kept},
+        "pairs": [p for p in comparison["pairs"] if p["a"] in kept and p["b"] in kept],
+    }
+
+
+def guard_report(report, cells, k=None):
+    """
+    Bản sao report của DataAnalyzer.analysis() theo cùng quy tắc với guard_chart_data: bỏ các
+    nhóm < k khỏi trung bình / alpha / kiểm định theo nhóm và từ khóa điều ước < k lần, kèm key
+    'privacy'. Phân khúc < k chỉ còn key 'privacy'.
+    """
+    k = _k(k)
+    privacy = {"k": k, "total": cells["total"], "protected": is_protected(cells, k), "suppressed": {}}
+    if privacy["protected"]:
+        return {"privacy": privacy}
+    out = dict(report)
+    suppressed = privacy["suppressed"]
+
+    for name, axis in (("semester_happiness_curve", "semester"), ("gpa_happiness_correlation", "gpa_group"),
+                       ("residence_stress_index", "residence"), ("reliability_by_major", "major")):
+        if out.get(name):
+            small = [label for label in out[name] if cells[axis].get(label, 0) < k]
+            if small:
+                suppressed[name] = small
+                out[name] = {label: v for label, v in out[name].items() if label not in small}
+    if out.get("wish_analysis"):
+        kept = guard_words(out["wish_analysis"], k)
+        if len(kept) < len(out["wish_analysis"]):
+            suppressed["wish_analysis"] = [word for word in out["wish_analysis"] if word not in kept]
+            out["wish_analysis"] = kept
+    if out.get("significance"):
+        significance = dict(out["significance"])
+        for name, axis in (("semester_happiness", "semester"), ("gpa_happiness", "gpa_group"),
+                           ("residence_stress", "residence")):
+            if name in significance:
+                significance[name] = _kept_comparison(significance[name], cells[axis], k)
+        if "factor_by_major" in significance:
+            significance["factor_by_major"] = {
+                factor: _kept_comparison(comparison, cells["major"], k)
+                for factor, comparison in significance["factor_by_major"].items()
+            }
+        out["significance"] = significance
+
+    out["privacy"] = privacy
+    return out
+
+
+def published_cells(chart_data):
+    """(section, nhãn, số phản hồi) của mọi ô đếm mà guard_chart_data kiểm soát."""
+    for name in ("major_dist", "semester_dist", "residence_dist", "wish_word_counts"):
+        for label, n in chart_data.get(name, {}).items():
+            yield name, label, n
+    for row in chart_data.get("factor_by_major", []):
+        yield "factor_by_major", row["major"], row["count"]
+    if "gpa_dist" in chart_data:
+        bins = chart_data["gpa_dist"]["bins"]
+        for i, n in enumerate(chart_data["gpa_dist"]["counts"]):
+            if n is not None:
+                yield "gpa_dist", f"{bins[i]:g}-{bins[i + 1]:g}", n
+    if "gpa_ahs_scatter" in chart_data:
+        scatter = chart_data["gpa_ahs_scatter"]
+        for gpa, ahs, n in zip(scatter["gpa"], scatter["ahs"], scatter["count"]):
+            yield "gpa_ahs_scatter", (gpa, ahs), n
+
+
+def cell_violations(chart_data, k=None):
+    """Các ô đếm đã công bố có 0 < n < k (rỗng nếu chart data đã qua guard_chart_data đúng)."""
+    k = _k(k)
+    return [cell for cell in published_cells(chart_data) if 0 < cell[2] < k]
+
+
+def guard_words(words, k=None):
+    """Từ khóa (cặp (từ, số lần) hoặc dict) xuất hiện ít nhất k lần."""
+    k = _k(k)
+    if isinstance(words, dict):
+        return {word: n for word, n in words.items() if n >= k}
+    return [(word, n) for word, n in words if n >= k]
+
+
+def guard_feedback(feedback, feedback_cells, k=None):
+    """
+    Luồng phản hồi (cột major = nhóm ngành, semester = kỳ học) với kỳ học bị ẩn (None) ở
+    các dòng thuộc ô (nhóm ngành, kỳ) nhỏ hơn k.
+    """
+    k = _k(k)
+    small = {cell for cell, n in feedback_cells.items() if n < k}
+    if not small or feedback.empty:
+        return feedback
+    hidden = pd.MultiIndex.from_arrays([feedback["major"], feedback["semester"]]).isin(list(small))
+    if not hidden.any():
+        return feedback
+    data = feedback.copy()
+    data["semester"] = data["semester"].astype(object).where(~hidden, None)
+    return data
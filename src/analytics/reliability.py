@@ -0,0 +1,97 @@
+"""
+Độ tin cậy thang đo: Cronbach's alpha và tương quan biến-tổng đã hiệu chỉnh cho từng
+nhóm nhân tố (hap_, aca_, env_, soc_, fin_), theo từng phân khúc.
+
+Cả hai chỉ số chỉ phụ thuộc vào ma trận hiệp phương sai của các câu trong nhóm, nên mỗi
+phân khúc chỉ cần thống kê đủ: số dòng, tổng từng câu và tổng tích chéo. Các thống kê
+này được cộng dồn cho mọi phân khúc trong một lượt bằng np.bincount (không lặp theo dòng
+hay theo phân khúc); thống kê của "tất cả" là tổng của các phân khúc.
+"""
+import numpy as np
+
+from src.analytics.dimensions import group_codes
+from src.config import Config
+
+
+def factor_items(df, prefix):
+    return [c for c in df.columns if c.startswith(prefix)]
+
+
+def covariance_stats(values, codes, n_groups):
+    """
+    values: ma trận n × k (không có NaN), codes: phân khúc của từng dòng (0..n_groups-1).
+    Trả về (count[g], sums[g, k], cross[g, k, k]).
+    """
+    k = values.shape[1]
+    count = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    sums = np.zeros((n_groups, k))
+    cross = np.zeros((n_groups, k, k))
+    for i in range(k):
+        sums[:, i] = np.bincount(codes, weights=values[:, i], minlength=n_groups)
+        for j in range(i, k):
+            cross[:, i, j] = cross[:, j, i] = np.bincount(codes, weights=values[:, i] * values[:, j], minlength=n_groups)
+    return count, sums, cross
+
+
+def reliability_from_stats(count, sums, cross):
+    """
+    (alpha[g], item_total[g, k]) từ thống kê đủ. Tương quan biến-tổng hiệu chỉnh của câu i
+    là tương quan giữa câu i và tổng các câu còn lại. Nhóm thiếu dữ liệu hoặc phương sai 0 -> NaN.
+    """
+    k = sums.shape[1]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / count[:, None]
+        cov = (cross - count[:, None, None] * mean[:, :, None] * mean[:, None, :]) / (count - 1)[:, None, None]
+        item_var = np.diagonal(cov, axis1=1, axis2=2)
+        total_var = cov.sum(axis=(1, 2))
+        alpha = k / (k - 1) * (1 - item_var.sum(axis=1) / total_var)
+        with_total = cov.sum(axis=2)
+        rest_var = total_var[:, None] - 2 * with_total + item_var
+        item_total = (with_total - item_var) / np.sqrt(item_var * rest_var)
+    return alpha, item_total
+
+
+def _round(value):
+    return None if not np.isfinite(value) else round(float(value), 2)
+
+
+def segment_reliability(df, by=None, factors=None, min_rows=None):
+    """
+    Độ tin cậy của mọi nhóm nhân tố cho toàn bộ df ("all") và cho từng nhóm của `by` (tên chiều
+    trong src/analytics/dimensions.py hoặc tên cột).
+    Trả về {phân khúc: {nhân tố: {'alpha', 'n', 'items': {câu: tương quan biến-tổng}}}}.
+    Dòng thiếu câu trả lời của một nhóm bị bỏ khỏi nhóm đó; phân khúc < min_rows dòng nhận None.
+    """
+    factors = factors or Config.RELIABILITY_FACTORS
+    min_rows = Config.RELIABILITY_MIN_ROWS if min_rows is None else min_rows
+    try:
+        codes, labels = group_codes(df, by) if by is not None else (None, [])
+    except KeyError:  # frame không có chiều / cột `by`
+        codes, labels = None, []
+    if codes is None:
+        codes = np.zeros(len(df), dtype=np.int64)
+    n_groups = len(labels)
+
+    result = {"all": {}, **{label: {} for label in labels}}
+    for factor, prefix in factors.items():
+        items = factor_items(df, prefix)
+        if len(items) < 2:
+            continue
+        values = df[items].to_numpy(dtype=np.float64)
+        complete = ~np.isnan(values).any(axis=1) & (codes >= 0)
+        # Trừ trung bình chung trước khi cộng tích chéo để giữ độ chính xác khi n lớn
+        values = values[complete] - values[complete].mean(axis=0) if complete.any() else values[complete]
+        count, sums, cross = covariance_stats(values, codes[complete], max(n_groups, 1))
+        if n_groups:
+            count = np.concatenate([count.sum(keepdims=True), count])
+            sums = np.concatenate([sums.sum(axis=0, keepdims=True), sums])
+            cross = np.concatenate([cross.sum(axis=0, keepdims=True), cross])
+        alpha, item_total = reliability_from_stats(count, sums, cross)
+        for g, segment in enumerate(["all"] + labels):
+            enough = count[g] >= min_rows
+            result[segment][factor] = {
+                "alpha": _round(alpha[g]) if enough else None,
+                "n": int(count[g]),
+                "items": {item: _round(r) if enough else None for item, r in zip(items, item_total[g])},
+            }
+    return result
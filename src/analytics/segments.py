@@ -0,0 +1,58 @@
+"""Định nghĩa phân khúc (ngành × giai đoạn học) dùng chung cho ETL, Dashboard và phân tích."""
+from itertools import product
+
+import pandas as pd
+
+from src.config import Config
+
+# Thứ tự khớp với các lựa chọn trong sidebar của Dashboard
+MAJOR_KEYS = ["all", "IT", "Biz", "Design", "Tourism"]
+SEMESTER_KEYS = ["all"] + list(Config.SEMESTER_BUCKETS.keys())
+
+
+def add_segment_columns(df):
+    """
+    Thêm cột `major_key` (nhóm ngành) và `semester_num` (kỳ học dạng số),
+    bỏ các dòng không xác định được kỳ học.
+    """
+    data = df.copy()
+    data["major_key"] = data["dem_major"].map(Config.MAJOR_GROUP_MAPPING).fillna(Config.DEFAULT_MAJOR_GROUP)
+    data["semester_num"] = pd.to_numeric(data["dem_semester"], errors="coerce")
+    data = data.dropna(subset=["semester_num"])
+    data["semester_num"] = data["semester_num"].astype(int)
+    return data
+
+
+def semester_mask(semesters, semester="all"):
+    """Mask boolean cho giai đoạn học; 'all' hoặc giá trị lạ trả về toàn bộ."""
+    bounds = Config.SEMESTER_BUCKETS.get(semester)
+    if bounds is None:
+        return pd.Series(True, index=semesters.index)
+    low, high = bounds
+    mask = pd.Series(True, index=semesters.index)
+    if low is not None:
+        mask &= semesters >= low
+    if high is not None:
+        mask &= semesters <= high
+    return mask
+
+
+def segment_mask(df, major="all", semester="all", major_col="major_key", semester_col="semester_num"):
+    """Mask boolean cho một tổ hợp bộ lọc ngành × giai đoạn học."""
+    mask = semester_mask(df[semester_col], semester)
+    if major != "all":
+        mask &= df[major_col] == major
+    return mask
+
+
+def filter_segment(df, major="all", semester="all", **kwargs):
+    return df[segment_mask(df, major, semester, **kwargs)]
+
+
+def segment_id(major="all", semester="all"):
+    return f"{major}__{semester}"
+
+
+def iter_segments():
+    """Liệt kê toàn bộ tổ hợp bộ lọc của Dashboard (5 ngành × 4 giai đoạn)."""
+    return list(product(MAJOR_KEYS, SEMESTER_KEYS))
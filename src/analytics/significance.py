@@ -0,0 +1,233 @@
+"""
+Kiểm định khác biệt giữa các nhóm (ngành, kỳ học, nhóm GPA, nơi ở) cho các chỉ số mà
+report / Dashboard đang so sánh bằng trung bình thô.
+
+Mỗi phép so sánh chỉ cần thống kê theo nhóm: số dòng, trung bình, phương sai (và tổng
+hạng cho kiểm định phi tham số), cộng dồn một lượt bằng np.bincount. Từ các mảng này:
+- omnibus: ANOVA một chiều và Kruskal-Wallis (có hiệu chỉnh hạng trùng)
+- từng cặp nhóm: Welch t-test (mặc định) hoặc Dunn (trên hạng), tính cho mọi cặp cùng
+  lúc qua np.triu_indices, rồi hiệu chỉnh đa so sánh (Holm mặc định) trên toàn bộ cặp.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from src.analytics.dimensions import dimension
+from src.config import Config
+
+
+# ==================== THỐNG KÊ THEO NHÓM ====================
+def group_stats(values, codes, n_groups):
+    """(count, mean, var) theo nhóm; var dùng ddof=1, nhóm < 2 dòng nhận NaN."""
+    count = np.bincount(codes, minlength=n_groups).astype(np.float64)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.bincount(codes, weights=values, minlength=n_groups) / count
+        centered = values - mean[codes]
+        var = np.bincount(codes, weights=centered * centered, minlength=n_groups) / (count - 1)
+    return count, mean, var
+
+
+def average_ranks(values):
+    """(hạng trung bình của từng giá trị, tổng t³ - t của các nhóm hạng trùng)."""
+    uniques, inverse, ties = np.unique(values, return_inverse=True, return_counts=True)
+    ties = ties.astype(np.float64)
+    ranks = np.cumsum(ties) - (ties - 1) / 2
+    return ranks[inverse], float((ties ** 3 - ties).sum())
+
+
+# ==================== KIỂM ĐỊNH ====================
+def anova_test(count, mean, var):
+    """ANOVA một chiều từ thống kê nhóm: (F, p)."""
+    k, n = len(count), count.sum()
+    if k < 2 or n <= k:
+        return np.nan, np.nan
+    grand = (count * mean).sum() / n
+    between = (count * (mean - grand) ** 2).sum() / (k - 1)
+    within = np.nansum((count - 1) * var) / (n - k)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f = between / within
+    return f, stats.f.sf(f, k - 1, n - k)
+
+
+def kruskal_test(count, rank_sums, tie_term):
+    """Kruskal-Wallis từ tổng hạng theo nhóm: (H, p)."""
+    k, n = len(count), count.sum()
+    if k < 2 or n < 2:
+        return np.nan, np.nan
+    h = 12 / (n * (n + 1)) * (rank_sums ** 2 / count).sum() - 3 * (n + 1)
+    correction = 1 - tie_term / (n ** 3 - n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        h = h / correction
+    return h, stats.chi2.sf(h, k - 1)
+
+
+def welch_pairs(count, mean, var):
+    """Welch t-test cho mọi cặp (i < j): (i, j, hiệu j - i, t, p)."""
+    i, j = np.triu_indices(len(count), k=1)
+    se_i, se_j = var[i] / count[i], var[j] / count[j]
+    diff = mean[j] - mean[i]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = diff / np.sqrt(se_i + se_j)
+        df = (se_i + se_j) ** 2 / (se_i ** 2 / (count[i] - 1) + se_j ** 2 / (count[j] - 1))
+    return i, j, diff, t, 2 * stats.t.sf(np.abs(t), df)
+
+
+def dunn_pairs(count, mean, rank_sums, tie_term):
+    """Kiểm định Dunn (so sánh hạng trung bình) cho mọi cặp (i < j): (i, j, hiệu j - i, z, p)."""
+    n = count.sum()
+    i, j = np.triu_indices(len(count), k=1)
+    rank_mean = rank_sums / count
+    sigma2 = (n * (n + 1) / 12 - tie_term / (12 * (n - 1))) * (1 / count[i] + 1 / count[j])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z = (rank_mean[j] - rank_mean[i]) / np.sqrt(sigma2)
+    return i, j, mean[j] - mean[i], z, 2 * stats.norm.sf(np.abs(z))
+
+
+def _holm(p):
+    """Holm step-down: p thứ r (tăng dần, từ 0) nhân (m - r), lấy max lũy kế rồi chặn ở 1."""
+    order = np.argsort(p, kind="stable")
+    stepped = np.maximum.accumulate((len(p) - np.arange(len(p))) * p[order])
+    adjusted = np.empty(len(p))
+    adjusted[order] = np.minimum(stepped, 1.0)
+    return adjusted
+
+
+def _fdr_bh(p):
+    """Benjamini-Hochberg: p thứ r (tăng dần, từ 1) nhân m / r, lấy min lũy kế từ cuối."""
+    order = np.argsort(p, kind="stable")
+    scaled = p[order] * len(p) / np.arange(1, len(p) + 1)
+    adjusted = np.empty(len(p))
+    adjusted[order] = np.minimum(np.minimum.accumulate(scaled[::-1])[::-1], 1.0)
+    return adjusted
+
+
+# Cài bằng NumPy: multipletests của statsmodels gọi gc.collect() mỗi lần, đắt hơn cả phép kiểm định
+_ADJUSTERS = {
+    "holm": _holm,
+    "fdr_bh": _fdr_bh,
+    "bonferroni": lambda p: np.minimum(p * len(p), 1.0),
+}
+
+
+def adjust_pvalues(p, method=None):
+    """Hiệu chỉnh đa so sánh (tên phương pháp theo statsmodels: holm, fdr_bh, bonferroni...); NaN giữ nguyên."""
+    method = method or Config.SIGNIFICANCE_CORRECTION
+    adjusted = np.full(len(p), np.nan)
+    finite = np.isfinite(p)
+    if finite.any():
+        if method in _ADJUSTERS:
+            adjusted[finite] = _ADJUSTERS[method](np.asarray(p, dtype=np.float64)[finite])
+        else:  # phương pháp khác: dùng statsmodels
+            from statsmodels.stats.multitest import multipletests
+            adjusted[finite] = multipletests(p[finite], method=method)[1]
+    return adjusted
+
+
+# ==================== SO SÁNH NHÓM ====================
+def _round(value, digits):
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def _p(value):
+    """p-value giữ 3 chữ số có nghĩa (p rất nhỏ không bị làm tròn về 0)."""
+    return None if not np.isfinite(value) else float(f"{value:.3g}")
+
+
+def compare_groups(values, groups, test=None, correction=None, alpha=None, min_count=None):
+    """
+    So sánh `values` giữa các nhóm của `groups` (Series cùng index, hoặc Categorical). Dòng thiếu giá
+    trị / nhóm bị bỏ; nhóm ít hơn min_count dòng không được kiểm định.
+    Trả về {'test', 'correction', 'alpha', 'groups': {nhóm: {'n', 'mean'}}, 'anova', 'kruskal',
+    'pairs': [{'a', 'b', 'diff', 'statistic', 'p', 'p_adj', 'significant'}]} với diff = mean(b) - mean(a).
+    """
+    test = test or Config.SIGNIFICANCE_PAIR_TEST
+    correction = correction or Config.SIGNIFICANCE_CORRECTION
+    alpha = Config.SIGNIFICANCE_ALPHA if alpha is None else alpha
+    min_count = Config.SIGNIFICANCE_MIN_GROUP_SIZE if min_count is None else min_count
+
+    values = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype=np.float64)
+    if isinstance(groups, pd.Categorical):
+        # Chiều đã mã hóa (src/analytics/dimensions.py): dùng thẳng mã và từ điển
+        codes, labels = np.asarray(groups.codes, dtype=np.int64), groups.categories.tolist()
+    else:
+        codes, labels = pd.factorize(pd.Series(groups).astype(object), sort=True)
+    sizes = np.bincount(codes[codes >= 0], minlength=len(labels))
+    kept = np.flatnonzero(sizes >= min_count)
+    # Đánh lại mã nhóm chỉ cho các nhóm đủ lớn
+    remap = np.full(len(labels) + 1, -1)
+    remap[kept] = np.arange(len(kept))
+    codes = remap[codes]
+    valid = (codes >= 0) & ~np.isnan(values)
+    values, codes, labels = values[valid], codes[valid], [labels[g] for g in kept]
+    k = len(labels)
+
+    count, mean, var = group_stats(values, codes, k)
+    ranks, tie_term = average_ranks(values)
+    rank_sums = np.bincount(codes, weights=ranks, minlength=k)
+    f, p_f = anova_test(count, mean, var)
+    h, p_h = kruskal_test(count, rank_sums, tie_term)
+    if test == "dunn":
+        i, j, diff, statistic, p = dunn_pairs(count, mean, rank_sums, tie_term)
+    elif test == "welch":
+        i, j, diff, statistic, p = welch_pairs(count, mean, var)
+    else:
+        raise ValueError(f"Kiểm định từng cặp không hợp lệ: {test!r} (chỉ nhận 'welch', 'dunn').")
+    p_adj = adjust_pvalues(p, correction)
+
+    pairs = pd.DataFrame({
+        "a": np.array(labels, dtype=object)[i],
+        "b": np.array(labels, dtype=object)[j],
+        "diff": np.round(diff, 3),
+        "statistic": np.round(statistic, 3),
+        "p": [_p(v) for v in p],
+        "p_adj": [_p(v) for v in p_adj],
+        "significant": np.nan_to_num(p_adj, nan=1.0) < alpha,
+    }).astype(object).where(lambda d: d.notna(), None)
+    return {
+        "test": test,
+        "correction": correction,
+        "alpha": alpha,
+        "groups": {label: {"n": int(n), "mean": _round(m, 2)} for label, n, m in zip(labels, count, mean)},
+        "anova": {"statistic": _round(f, 3), "p": _p(p_f)},
+        "kruskal": {"statistic": _round(h, 3), "p": _p(p_h)},
+        "pairs": pairs.to_dict("records"),
+    }
+
+
+def segment_significance(df, **kwargs):
+    """
+    Kiểm định cho các so sánh trong report: AHS theo kỳ học và nhóm GPA, áp lực chi phí
+    sinh hoạt theo nơi ở, điểm từng nhóm nhân tố theo ngành.
+    """
+    hap_cols = [c for c in df.columns if c.startswith('hap_')]
+    if not hap_cols:
+        return {}
+    ahs = df[hap_cols].mean(axis=1)
+    out = {}
+    if 'dem_semester' in df.columns:
+        out['semester_happiness'] = compare_groups(ahs, dimension(df, 'semester'), **kwargs)
+    if 'dem_gpa' in df.columns:
+        out['gpa_happiness'] = compare_groups(ahs, dimension(df, 'gpa_group'), **kwargs)
+    if 'dem_residence' in df.columns and 'fin_living_cost_worry' in df.columns:
+        out['residence_stress'] = compare_groups(df['fin_living_cost_worry'], dimension(df, 'residence'), **kwargs)
+    if 'dem_major' in df.columns:
+        majors = dimension(df, 'major')
+        out['factor_by_major'] = {
+            factor: compare_groups(df[cols].mean(axis=1), majors, **kwargs)
+            for factor, cols in (
+                (prefix.rstrip('_'), [c for c in df.columns if c.startswith(prefix)])
+                for prefix in Config.LIKERT_ITEM_PREFIXES
+            )
+            if cols
+        }
+    return out
+
+
+def significant_gaps(comparison, labels=None):
+    """Chỉ các cặp có ý nghĩa sau hiệu chỉnh, xếp theo p_adj (nhãn nhóm đổi qua `labels` nếu có)."""
+    labels = labels or {}
+    gaps = [
+        {"a": labels.get(p["a"], p["a"]), "b": labels.get(p["b"], p["b"]), "diff": p["diff"], "p_adj": p["p_adj"]}
+        for p in comparison["pairs"] if p["significant"]
+    ]
+    return sorted(gaps, key=lambda g: g["p_adj"])
@@ -0,0 +1,181 @@
+"""
+Top-k từ khóa xấp xỉ theo luồng (Space-Saving) cho kho điều ước rất lớn.
+
+Dữ liệu được đọc từng lô; mỗi lô đếm chính xác cụm từ (cùng quy tắc với
+KeywordIndex) rồi gộp vào một bảng Space-Saving có tối đa `capacity` phần tử, nên
+bộ nhớ không phụ thuộc kích thước từ vựng. Hai bảng gộp được với nhau (Cafaro et al.),
+nhờ đó mỗi phân vùng / worker tạo một bảng riêng rồi gộp lại.
+
+Với mỗi cụm từ, số đếm thật nằm trong [count - error, count]; tổng sai số không vượt
+quá N / capacity (N = tổng số lần xuất hiện đã xử lý).
+
+Ví dụ:
+    python -m src.analytics.sketch --store data/processed/store --k 20 --capacity 5000 --workers 4
+"""
+import argparse
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.keywords import KeywordIndex, rank_terms, subsumption_pairs, suppress_subphrases
+from src.config import Config
+
+
+class SpaceSaving:
+    """
+    Bảng heavy-hitters: `counts` là cận trên, `errors` là sai số tối đa của từng phần tử.
+    `floor` là cận trên số lần xuất hiện của mọi phần tử không có trong bảng.
+    """
+
+    def __init__(self, capacity=None):
+        self.capacity = capacity or Config.SKETCH_CAPACITY
+        self.counts = pd.Series(dtype=np.int64)
+        self.errors = pd.Series(dtype=np.int64)
+        self.floor = 0
+        self.total = 0
+
+    def __len__(self):
+        return len(self.counts)
+
+    @classmethod
+    def from_counts(cls, counts, capacity=None):
+        """Bảng từ số đếm chính xác của một lô (sai số 0, cắt còn `capacity` phần tử)."""
+        sketch = cls(capacity)
+        counts = counts[counts > 0].astype(np.int64)
+        sketch.total = int(counts.sum())
+        sketch.counts, sketch.floor = sketch._truncate(counts)
+        sketch.errors = pd.Series(0, index=sketch.counts.index, dtype=np.int64)
+        return sketch
+
+    def _truncate(self, counts):
+        if len(counts) <= self.capacity:
+            return counts, 0
+        ordered = counts.iloc[np.lexsort((counts.index.to_numpy(dtype=str), -counts.to_numpy()))]
+        return ordered.iloc[: self.capacity], int(ordered.iloc[self.capacity])
+
+    def merge(self, other):
+        """Gộp hai bảng; phần tử thiếu ở một phía được tính bằng `floor` của phía đó."""
+        items = self.counts.index.union(other.counts.index)
+        counts = self.counts.reindex(items, fill_value=self.floor) + other.counts.reindex(items, fill_value=other.floor)
+        errors = self.errors.reindex(items, fill_value=self.floor) + other.errors.reindex(items, fill_value=other.floor)
+
+        merged = SpaceSaving(max(self.capacity, other.capacity))
+        merged.total = self.total + other.total
+        merged.counts, dropped = merged._truncate(counts.astype(np.int64))
+        merged.errors = errors.reindex(merged.counts.index).astype(np.int64)
+        merged.floor = max(self.floor + other.floor, dropped)
+        return merged
+
+    def update(self, counts):
+        """Thêm số đếm chính xác của một lô (Series: phần tử -> số lần)."""
+        merged = self.merge(SpaceSaving.from_counts(counts, self.capacity))
+        self.counts, self.errors, self.floor, self.total = merged.counts, merged.errors, merged.floor, merged.total
+        return self
+
+    @property
+    def error_bound(self):
+        """Sai số tối đa lý thuyết cho mọi phần tử: N / capacity."""
+        return self.total / self.capacity
+
+    def top_k(self, k=20, suppress=True):
+        """
+        DataFrame top-k gồm count (cận trên), lower (cận dưới), error và guaranteed: True khi
+        cận dưới vẫn lớn hơn cận trên của mọi cụm từ ngoài top-k (chắc chắn thuộc top-k).
+        """
+        columns = ["phrase", "count", "lower", "error", "guaranteed"]
+        if self.counts.empty:
+            return pd.DataFrame(columns=columns)
+        vocab = self.counts.index.to_numpy(dtype=str)
+        counts = self.counts.to_numpy()
+        if suppress:
+            counts = suppress_subphrases(counts, *subsumption_pairs(vocab.tolist()))
+        order = rank_terms(vocab, counts, k)
+        rest = np.setdiff1d(np.flatnonzero(counts), order)
+        outside = max(int(counts[rest].max()) if len(rest) else 0, self.floor)
+        errors = self.errors.to_numpy()[order]
+        top = pd.DataFrame({"phrase": vocab[order], "count": counts[order], "error": errors})
+        top["lower"] = top["count"] - top["error"]
+        top["guaranteed"] = top["lower"] >= outside
+        return top[columns].reset_index(drop=True)
+
+
+# ==================== NGUỒN DỮ LIỆU ====================
+def phrase_counts(wishes):
+    """Số đếm chính xác các cụm từ của một lô điều ước (không áp ngưỡng min_count)."""
+    index = KeywordIndex.build(pd.DataFrame({"wish": wishes}), min_count=1)
+    return pd.Series(index.counts(), index=index.vocab)
+
+
+def iter_csv_chunks(path, chunksize=None):
+    for chunk in pd.read_csv(path, usecols=["wish"], chunksize=chunksize or Config.SKETCH_CHUNK_ROWS):
+        yield chunk["wish"]
+
+
+def iter_parquet_chunks(path, chunksize=None):
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize or Config.SKETCH_CHUNK_ROWS, columns=["wish"]):
+        yield batch.to_pandas()["wish"]
+
+
+def sketch_chunks(chunks, capacity=None):
+    sketch = SpaceSaving(capacity)
+    for wishes in chunks:
+        sketch.update(phrase_counts(wishes))
+    return sketch
+
+
+def _sketch_file(args):
+    path, capacity, chunksize = args
+    chunks = iter_parquet_chunks(path, chunksize) if str(path).endswith(".parquet") else iter_csv_chunks(path, chunksize)
+    return sketch_chunks(chunks, capacity)
+
+
+def sketch_files(paths, capacity=None, chunksize=None, max_workers=1):
+    """Mỗi file (phân vùng) một bảng Space-Saving, chạy song song rồi gộp lại."""
+    tasks = [(str(p), capacity, chunksize) for p in paths]
+    if max_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers) as pool:
+            sketches = list(pool.map(_sketch_file, tasks))
+    else:
+        sketches = [_sketch_file(t) for t in tasks]
+    return reduce(SpaceSaving.merge, sketches, SpaceSaving(capacity))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Top-k cụm từ điều ước xấp xỉ theo luồng (Space-Saving).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--data", help="File CSV đã xử lý")
+    source.add_argument("--store", help="Thư mục kho phân vùng (data/processed/store)")
+    parser.add_argument("--waves", nargs="*", help="Chỉ đọc các đợt khảo sát này (khi dùng --store)")
+    parser.add_argument("--campus", nargs="*", help="Chỉ đọc các cơ sở này (khi dùng --store)")
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--capacity", type=int, default=Config.SKETCH_CAPACITY, help="Số phần tử tối đa của bảng")
+    parser.add_argument("--chunksize", type=int, default=Config.SKETCH_CHUNK_ROWS, help="Số dòng mỗi lô")
+    parser.add_argument("--workers", type=int, default=1, help="Số tiến trình (mỗi phân vùng một bảng)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    if args.store:
+        from src.etl.store import PartitionedStore
+
+        store = PartitionedStore(args.store)
+        paths = [store.root / p["path"] for p in store.partitions(args.waves, args.campus)]
+    else:
+        paths = [Path(args.data)]
+    sketch = sketch_files(paths, args.capacity, args.chunksize, args.workers)
+    top = sketch.top_k(args.k)
+
+    print(f"🔎 {len(paths)} nguồn · {sketch.total} lần xuất hiện · bảng {len(sketch)}/{sketch.capacity} phần tử")
+    print(top.to_string(index=False))
+    print(f"± Sai số tối đa mỗi cụm từ: {sketch.error_bound:.1f} · xong trong {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
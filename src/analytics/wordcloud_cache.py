@@ -0,0 +1,152 @@
+"""
+Cache ảnh word cloud (PNG) theo phiên bản dữ liệu và phân khúc.
+
+Vẽ word cloud tốn CPU (~1s mỗi ảnh) nên không chạy trong script Streamlit: ảnh được
+vẽ ở một tiến trình nền từ số đếm từ khóa của phân khúc và ghi vào đĩa
+(`<processed>/wordclouds/<phiên bản>/<phân khúc>.png`). Dashboard hiển thị ảnh nếu
+đã có, nếu chưa thì hiện placeholder cho tới khi ảnh sẵn sàng. Cache giữ tối đa
+`Config.WORDCLOUD_CACHE_MAX_FILES` ảnh, xóa ảnh ít được dùng nhất trước.
+"""
+import multiprocessing
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from src.config import Config
+
+try:
+    from wordcloud import WordCloud
+except ImportError:  # wordcloud là tùy chọn, Dashboard quay về biểu đồ cột
+    WordCloud = None
+
+READY, PENDING, FAILED, UNAVAILABLE = "ready", "pending", "failed", "unavailable"
+
+
+def wordcloud_root(processed_path) -> Path:
+    return Path(processed_path).parent / Config.WORDCLOUD_DIR_NAME
+
+
+def render_wordcloud(frequencies, path):
+    """Vẽ word cloud từ {từ khóa: số lần} và ghi PNG (ghi file tạm rồi đổi tên)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.stem}.{os.getpid()}.tmp.png")
+    WordCloud(**Config.WORDCLOUD_OPTIONS).generate_from_frequencies(frequencies).to_file(str(tmp))
+    os.replace(tmp, path)
+    return str(path)
+
+
+class WordCloudCache:
+    def __init__(self, root, max_files=None, max_workers=1):
+        self.root = Path(root)
+        self.max_files = max_files or Config.WORDCLOUD_CACHE_MAX_FILES
+        self.max_workers = max_workers
+        self._pool = None
+        self._pending = {}
+        self._failed = OrderedDict()  # đường dẫn ảnh -> thời điểm vẽ lỗi
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return WordCloud is not None
+
+    def path_for(self, version, segment) -> Path:
+        return self.root / str(version) / f"{segment}.png"
+
+    def get(self, version, segment):
+        """Đường dẫn ảnh nếu đã có (đánh dấu vừa dùng để không bị xóa), ngược lại None."""
+        path = self.path_for(version, segment)
+        if not path.exists():
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # vừa bị tiến trình khác xóa
+            return None
+        return path
+
+    def status(self, version, segment):
+        if not self.available:
+            return UNAVAILABLE
+        path = self.path_for(version, segment)
+        if path.exists():
+            return READY
+        with self._lock:
+            if path in self._pending:
+                return PENDING
+            return FAILED if self._recent_failure(path) else None
+
+    def _recent_failure(self, target):
+        """True nếu ảnh vẽ lỗi chưa quá Config.WORDCLOUD_FAILURE_TTL_SECONDS (gọi khi giữ lock); lỗi hết hạn bị xóa."""
+        if target not in self._failed:
+            return False
+        if time.monotonic() - self._failed[target] < Config.WORDCLOUD_FAILURE_TTL_SECONDS:
+            return True
+        del self._failed[target]
+        return False
+
+    def _set_version(self, version):
+        """Phiên bản dữ liệu mới: bỏ lỗi của các phiên bản cũ (gọi khi giữ lock)."""
+        if str(version) != self._version:
+            self._version = str(version)
+            for target in [t for t in self._failed if t.parent.name != self._version]:
+                del self._failed[target]
+
+    def request(self, version, segment, frequencies):
+        """
+        Trả về đường dẫn ảnh nếu đã có; nếu chưa thì xếp lịch vẽ ở tiến trình nền
+        (mỗi ảnh chỉ vẽ một lần dù được yêu cầu nhiều lần) và trả về None.
+        """
+        path = self.get(version, segment)
+        if path is not None or not self.available or not frequencies:
+            return path
+        target = self.path_for(version, segment)
+        with self._lock:
+            self._set_version(version)
+            if target in self._pending or self._recent_failure(target):
+                return None
+            if self._pool is None:
+                # spawn: Streamlit chạy nhiều thread, fork có thể khóa chết tiến trình con
+                self._pool = ProcessPoolExecutor(self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+            future = self._pool.submit(render_wordcloud, dict(frequencies), target)
+            self._pending[target] = future
+        future.add_done_callback(lambda f, target=target: self._finish(target, f))
+        return None
+
+    def _finish(self, target, future):
+        with self._lock:
+            self._pending.pop(target, None)
+            if future.cancelled():  # close() hủy các ảnh chưa vẽ
+                return
+            if future.exception() is not None:
+                self._failed[target] = time.monotonic()
+                while len(self._failed) > self.max_files:
+                    self._failed.popitem(last=False)
+        self.evict()
+
+    def evict(self):
+        """Xóa ảnh dùng lâu nhất khi vượt quá max_files, bỏ thư mục phiên bản rỗng."""
+        if not self.root.exists():
+            return
+        files = []
+        for path in self.root.glob("*/*.png"):
+            if path.name.startswith("."):
+                continue
+            try:
+                files.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue
+        files.sort()
+        for _, path in files[: max(0, len(files) - self.max_files)]:
+            path.unlink(missing_ok=True)
+        for version_dir in self.root.iterdir():
+            if version_dir.is_dir() and not any(version_dir.iterdir()):
+                shutil.rmtree(version_dir, ignore_errors=True)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
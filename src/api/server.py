@@ -0,0 +1,396 @@
+"""
+HTTP JSON API cho báo cáo và dữ liệu biểu đồ (chỉ dùng thư viện chuẩn, không cần dịch vụ ngoài).
+
+Endpoints (tham số lọc: major, semester, waves=2025-FA,2026-SP):
+    GET /api/health       trạng thái + phiên bản dữ liệu + thống kê cache
+    GET /api/segments     số phản hồi của từng tổ hợp ngành × giai đoạn học
+    GET /api/report       DataAnalyzer.analysis() của phân khúc
+    GET /api/chart-data   DataAnalyzer.get_chart_data() của phân khúc
+    GET /api/export       các dòng đã lọc (ẩn danh) dạng CSV / Parquet (format=csv|parquet),
+                          gửi theo luồng từng khối (src/etl/export.py)
+
+Report và chart data đi qua guard_report / guard_chart_data (src/analytics/privacy.py) như
+Dashboard: phân khúc dưới k = Config.PRIVACY_MIN_CELL_SIZE phản hồi chỉ trả về key 'privacy',
+/api/segments không công bố số phản hồi của nó và /api/export từ chối (403).
+
+Kết quả được cache trong tiến trình theo phiên bản dữ liệu đã xử lý và trả về kèm ETag;
+client gửi lại If-None-Match sẽ nhận 304. Việc tính toán chạy trong process pool và các
+request trùng nhau đang chờ cùng một kết quả chỉ kích hoạt một lần tính.
+
+Ví dụ:
+    python -m src.api.server --port 8600 --workers 4
+    curl "http://127.0.0.1:8600/api/report?major=IT&semester=senior"
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.analyzer import DataAnalyzer
+from src.analytics.background import worker_frame
+from src.analytics.privacy import SegmentCounts, guard_chart_data, guard_report, is_protected
+from src.analytics.segments import (
+    MAJOR_KEYS, SEMESTER_KEYS, filter_segment, iter_segments, segment_id, segment_mask,
+)
+from src.config import Config
+from src.etl.columnar import StaleVersionError, shared_dataset
+from src.etl.export import FORMATS, export_file_name, export_rows, iter_export
+from src.etl.snapshot import data_version, load_snapshot
+from src.etl.store import PartitionedStore, store_root
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DATA_PATH = _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _json_safe(value):
+    """Chuyển kết quả phân tích về kiểu JSON chuẩn (numpy -> Python, NaN/inf -> null)."""
+    if isinstance(value, dict):
+        return {(k.item() if isinstance(k, np.generic) else k): _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if isinstance(value, (pd.Timestamp, pd.Interval)):
+        return str(value)
+    return value
+
+
+# ==================== WORKER ====================
+def _compute_segment(data_path, version, waves, major, semester):
+    frame, keyword_index = worker_frame(data_path, version, waves)
+    subset = filter_segment(frame, major, semester)
+    if subset.empty:
+        return {"chart_data": {}, "report": {}}
+    analyzer = DataAnalyzer(df=subset, keyword_index=keyword_index)
+    return {"chart_data": analyzer.get_chart_data(), "report": analyzer.analysis()}
+
+
+def _compute_segment_counts(data_path, version, waves):
+    frame, _ = worker_frame(data_path, version, waves)
+    return [
+        {"id": segment_id(major, semester), "major": major, "semester": semester,
+         "rows": int(segment_mask(frame, major, semester).sum())}
+        for major, semester in iter_segments()
+    ]
+
+
+def _compute_cell_counts(data_path, version, waves):
+    frame, _ = worker_frame(data_path, version, waves)
+    return SegmentCounts.build(frame)
+
+
+# ==================== SERVICE ====================
+class ReportService:
+    """
+    Cache kết quả (LRU) theo (phiên bản dữ liệu, waves, endpoint, phân khúc) và gộp các
+    request trùng nhau đang được tính thành một future duy nhất.
+    """
+
+    def __init__(self, data_path=None, max_workers=None, cache_size=None):
+        self.data_path = Path(data_path or os.environ.get("FPOLY_DATA_PATH", DEFAULT_DATA_PATH))
+        self.cache_size = cache_size or Config.API_CACHE_MAX_ENTRIES
+        # spawn thay vì fork: server đã có nhiều thread khi worker đầu tiên được tạo
+        self.pool = ProcessPoolExecutor(
+            max_workers or min(os.cpu_count() or 1, 4), mp_context=multiprocessing.get_context("spawn")
+        )
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "computed": 0, "coalesced": 0, "snapshot": 0}
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def version(self, waves=()):
+        """Phiên bản dữ liệu làm ETag: hash file đã xử lý, hoặc version của kho khi lọc theo đợt."""
+        if waves:
+            store = PartitionedStore(store_root(self.data_path))
+            if not store.exists():
+                raise ApiError(HTTPStatus.NOT_FOUND, "Chưa có kho dữ liệu theo đợt khảo sát.")
+            unknown = sorted(set(waves) - set(store.waves()))
+            if unknown:
+                raise ApiError(HTTPStatus.BAD_REQUEST, f"Đợt khảo sát không tồn tại: {', '.join(unknown)}")
+            return store.version()
+        try:
+            return data_version(self.data_path)
+        except FileNotFoundError:
+            raise ApiError(HTTPStatus.SERVICE_UNAVAILABLE, f"Không tìm thấy dữ liệu: {self.data_path}")
+
+    def _cached(self, key):
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return self._cache[key]
+            self.stats["misses"] += 1
+        return None
+
+    def _store(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _compute_once(self, key, fn, *args):
+        """Chỉ một request thực sự tính cho mỗi key, các request khác chờ cùng future."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = self.pool.submit(fn, *args)
+                self._inflight[key] = future
+                self.stats["computed"] += 1
+            else:
+                self.stats["coalesced"] += 1
+        try:
+            return future.result()
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+
+    def _segment_payload(self, version, waves, major, semester):
+        key = (version, waves, "segment", segment_id(major, semester))
+        payload = self._cached(key)
+        if payload is not None:
+            return payload
+        snapshot = None if waves else load_snapshot(self.data_path, major, semester)
+        if snapshot is not None and snapshot.get("data_version") == version:
+            self.stats["snapshot"] += 1
+            payload = {"chart_data": snapshot["chart_data"], "report": snapshot["report"]}
+        else:
+            payload = self._compute_once(key, _compute_segment, str(self.data_path), version, waves, major, semester)
+        self._store(key, payload)
+        return payload
+
+    def _cell_counts(self, version, waves):
+        """Khối đếm ô của phiên bản dữ liệu (tính một lần trong worker, cache như kết quả khác)."""
+        key = (version, waves, "cells", "all")
+        counts = self._cached(key)
+        if counts is None:
+            counts = self._compute_once(key, _compute_cell_counts, str(self.data_path), version, waves)
+            self._store(key, counts)
+        return counts
+
+    def respond(self, endpoint, major="all", semester="all", waves=()):
+        """Trả về (etag, body bytes) cho một endpoint; body đã mã hóa được cache cùng ETag."""
+        version = self.version(waves)
+        sid = segment_id(major, semester) if endpoint != "segments" else "all"
+        key = (version, waves, endpoint, sid)
+        cached = self._cached(key)
+        if cached is not None:
+            return cached
+
+        if endpoint == "segments":
+            data = [
+                dict(row, rows=None, protected=True) if 0 < row["rows"] < Config.PRIVACY_MIN_CELL_SIZE else row
+                for row in self._compute_once(key, _compute_segment_counts, str(self.data_path), version, waves)
+            ]
+        else:
+            cells = self._cell_counts(version, waves).cells(major, semester)
+            if is_protected(cells):
+                payload = {"report": {}, "chart_data": {}}  # không cần tính: guard chỉ giữ key 'privacy'
+            else:
+                payload = self._segment_payload(version, waves, major, semester)
+            if endpoint == "report":
+                data = guard_report(payload["report"], cells)
+            else:
+                data = guard_chart_data(payload["chart_data"], cells)
+        body = json.dumps(
+            {"data_version": version, "major": major, "semester": semester, "waves": list(waves),
+             "data": _json_safe(data)},
+            ensure_ascii=False, separators=(",", ":"),
+        ).encode("utf-8")
+        wave_tag = "+".join(waves) or "all"
+        result = (f'"{version}-{endpoint}-{sid}-{wave_tag}"', body)
+        self._store(key, result)
+        return result
+
+    def export(self, fmt, major="all", semester="all", waves=()):
+        """(tên file, luồng byte) của bản xuất; đọc thẳng từ bộ dữ liệu mmap, không qua process pool."""
+        version = self.version(waves)
+        if is_protected(self._cell_counts(version, waves).cells(major, semester)):
+            raise ApiError(
+                HTTPStatus.FORBIDDEN,
+                f"Phân khúc có ít hơn {Config.PRIVACY_MIN_CELL_SIZE} phản hồi, không thể xuất để bảo vệ danh tính.",
+            )
+        frame = shared_dataset(self.data_path, version, waves).frame
+        positions = export_rows(frame, major, semester)
+        return export_file_name(fmt, major, semester, waves), iter_export(frame, positions, fmt)
+
+    def health(self):
+        try:
+            version = data_version(self.data_path)
+        except FileNotFoundError:
+            version = None
+        store = PartitionedStore(store_root(self.data_path))
+        with self._lock:
+            stats = dict(self.stats, entries=len(self._cache), inflight=len(self._inflight))
+        return {
+            "status": "ok" if version else "no-data",
+            "data_version": version,
+            "waves": store.waves() if store.exists() else [],
+            "cache": stats,
+        }
+
+
+# ==================== HTTP ====================
+_ENDPOINTS = {"/api/segments": "segments", "/api/report": "report", "/api/chart-data": "chart_data"}
+
+
+def _parse_filters(query):
+    params = parse_qs(query)
+    major = params.get("major", ["all"])[0]
+    semester = params.get("semester", ["all"])[0]
+    if major not in MAJOR_KEYS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"major không hợp lệ, chọn một trong: {', '.join(MAJOR_KEYS)}")
+    if semester not in SEMESTER_KEYS:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"semester không hợp lệ, chọn một trong: {', '.join(SEMESTER_KEYS)}")
+    waves = tuple(sorted({w for raw in params.get("waves", []) for w in raw.split(",") if w}))
+    return major, semester, waves
+
+
+def _etag_matches(header, etag):
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    server_version = "FPolyHappinessAPI/1.0"
+    service = None  # gán bởi make_server
+    quiet = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        try:
+            if url.path == "/api/health":
+                self._send_json(HTTPStatus.OK, self.service.health())
+                return
+            if url.path.rstrip("/") == "/api/export":
+                self._send_export(url.query)
+                return
+            endpoint = _ENDPOINTS.get(url.path.rstrip("/"))
+            if endpoint is None:
+                raise ApiError(HTTPStatus.NOT_FOUND, f"Không có endpoint {url.path}")
+            major, semester, waves = _parse_filters(url.query)
+            etag, body = self.service.respond(endpoint, major, semester, waves)
+        except ApiError as e:
+            self._send_json(e.status, {"error": e.message})
+            return
+        except StaleVersionError:  # ETL vừa ghi dữ liệu mới giữa chừng: client thử lại
+            self._send_json(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Dữ liệu đang được cập nhật, hãy thử lại"})
+            return
+        except Exception as e:  # lỗi tính toán trong worker -> 500, server vẫn chạy tiếp
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": f"{type(e).__name__}: {e}"})
+            return
+
+        if _etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self._send_cache_headers(etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self._send_cache_headers(etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_export(self, query):
+        major, semester, waves = _parse_filters(query)
+        fmt = parse_qs(query).get("format", ["csv"])[0]
+        if fmt not in FORMATS:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"format không hợp lệ, chọn một trong: {', '.join(FORMATS)}")
+        file_name, stream = self.service.export(fmt, major, semester, waves)
+        # Khối đầu (header CSV / magic Parquet) lấy trước khi gửi status: lỗi mở dữ liệu vẫn trả về 500
+        first = next(stream, b"")
+        # Không biết trước độ dài: gửi từng khối ngay khi mã hóa xong rồi đóng kết nối
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", FORMATS[fmt])
+        self.send_header("Content-Disposition", f'attachment; filename="{file_name}"')
+        self.send_header("Cache-Control", "no-store")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            self.wfile.write(first)
+            for data in stream:
+                self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):  # client hủy tải giữa chừng
+            pass
+        except Exception as e:  # đã gửi status 200: chỉ còn cách cắt kết nối, client nhận file dở dang
+            self.log_error("Xuất dữ liệu lỗi giữa chừng: %s: %s", type(e).__name__, e)
+
+    def _send_cache_headers(self, etag):
+        self.send_header("ETag", etag)
+        # Client luôn hỏi lại, nhưng chỉ tốn một 304 khi dữ liệu chưa đổi
+        self.send_header("Cache-Control", "no-cache")
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service, host=None, port=None, quiet=False):
+    handler = type("BoundApiRequestHandler", (ApiRequestHandler,), {"service": service, "quiet": quiet})
+    server = ThreadingHTTPServer((host or Config.API_HOST, Config.API_PORT if port is None else port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP JSON API cho báo cáo hạnh phúc FPoly.")
+    parser.add_argument("--data", help="File dữ liệu đã xử lý (mặc định: FPOLY_DATA_PATH hoặc data/processed)")
+    parser.add_argument("--host", default=Config.API_HOST)
+    parser.add_argument("--port", type=int, default=Config.API_PORT)
+    parser.add_argument("--workers", type=int, help="Số tiến trình tính toán")
+    parser.add_argument("--quiet", action="store_true", help="Không in log từng request")
+    args = parser.parse_args(argv)
+
+    service = ReportService(args.data, max_workers=args.workers)
+    server = make_server(service, args.host, args.port, quiet=args.quiet)
+    print(f"🌐 API đang chạy tại http://{args.host}:{server.server_port} (dữ liệu: {service.data_path})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Dừng API.")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -62,6 +62,185 @@ class Config:
             '(8.0 - 9.0]': 8.5,
             '>= 9.0': 9.5
         }
+    # Nhóm GPA khi so sánh hạnh phúc theo thành tích (khoảng nửa mở [a, b))
+    GPA_GROUP_BINS = [0, 5.0, 6.5, 8.0, 10.0]
+    GPA_GROUP_LABELS = ['<5.0', '5.0-6.5', '6.5-8.0', '>8.0']
+    # Histogram GPA và lưới phân tán GPA × AHS trong chart data (số ô cố định, không theo số dòng)
+    GPA_HIST_BINS = [4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0]
+    GPA_SCATTER_GPA_STEP = 0.5
+    GPA_SCATTER_AHS_STEP = 0.1
 
     # Danh sách các biến cần đảo ngược điểm (Reverse Coding)
-    REVERSE_COLS = ["aca_deadline_pressure", "fin_living_cost_worry"]
\ No newline at end of file
+    REVERSE_COLS = ["aca_deadline_pressure", "fin_living_cost_worry"]
+    # Nhóm ngành dùng cho bộ lọc Dashboard (dem_major -> major_key)
+    MAJOR_GROUP_MAPPING = {
+        "Ngành Công Nghệ Thông Tin": "IT",
+        "Thiết kế đồ họa": "Design",
+        "Quản Trị Kinh Doanh & Marketing": "Biz",
+        "Du lịch – Nhà hàng – Khách sạn": "Tourism",
+        "Logistics & Y tế": "Biz",
+        "Công nghệ kỹ thuật – Cơ khí – Điện tử": "IT",
+        "Khác": "Biz",
+        "Ngôn ngữ": "Biz",
+    }
+    DEFAULT_MAJOR_GROUP = "IT"
+
+    # Giai đoạn học: (kỳ đầu, kỳ cuối) - None nghĩa là không giới hạn
+    SEMESTER_BUCKETS = {
+        "freshman": (None, 3),
+        "junior": (4, 6),
+        "senior": (7, None),
+    }
+
+    # Snapshot dữ liệu biểu đồ cho từng tổ hợp bộ lọc (ghi bởi ETL)
+    SNAPSHOT_DIR_NAME = "snapshots"
+    SNAPSHOT_FORMAT_VERSION = 4      # 4: gpa_dist / gpa_ahs_scatter lưu số đếm theo bin thay vì từng điểm
+
+    # Từ điển phân loại điều ước (khớp cụm từ sau khi chuẩn hóa NFC + chữ thường)
+    WISH_TOPIC_KEYWORDS = {
+        "Academic": [
+            "deadline", "assignment", "lab", "giảng viên", "giảng dạy", "thầy cô", "môn học",
+            "chương trình học", "lịch học", "lịch thi", "thi cử", "kỳ thi", "điểm số", "cho điểm",
+            "đánh giá năng lực", "thực hành", "thực tế", "dự án", "kiến thức", "bài tập", "lms",
+            "học tập", "đào tạo", "đồ án", "thực tập", "cuộc thi", "kỹ năng", "chọn lớp",
+        ],
+        "Environment": [
+            "cơ sở vật chất", "csvc", "phòng học", "máy lạnh", "điều hòa", "wifi", "mạng",
+            "thang máy", "canteen", "căn tin", "giữ xe", "bãi xe", "nhà xe", "thư viện",
+            "nhà vệ sinh", "toilet", "máy lọc nước", "bàn ghế", "môi trường", "khuôn viên",
+            "máy chiếu", "ổ cắm",
+        ],
+        "Social": [
+            "câu lạc bộ", "clb", "hoạt động", "sự kiện", "phong trào", "bạn bè", "bạn thân",
+            "giao lưu", "kết nối", "tập thể", "ngoại khóa", "văn nghệ", "thể thao", "cộng đồng",
+            "drama", "gia đình",
+        ],
+        "Finance": [
+            "học phí", "học bổng", "chi phí", "tiền", "miễn giảm", "trả góp", "việc làm",
+            "lương", "tài chính", "sinh hoạt phí", "đắt", "rẻ",
+        ],
+    }
+    WISH_SENTIMENT_KEYWORDS = {
+        "Positive": [
+            "tốt", "vui", "hạnh phúc", "hài lòng", "thích", "yêu", "cảm ơn", "tuyệt", "nhiệt tình",
+            "thân thiện", "năng động", "phát triển", "hữu ích", "tận tâm", "thử sức",
+        ],
+        "Negative": [
+            "không", "chưa", "kém", "tệ", "chán", "áp lực", "mệt", "bất tiện", "hỏng", "chậm",
+            "yếu", "lo lắng", "khó", "đắt", "bớt", "giảm", "thiếu", "drama", "nóng", "ồn", "quá tải",
+        ],
+    }
+    WISH_DEFAULT_TOPIC = "Other"
+
+    # Sinh viên có nguy cơ rời trường khi hap_loyalty_choice <= ngưỡng này
+    RETENTION_RISK_MAX_SCORE = 2
+
+    # Kho dữ liệu phân vùng theo đợt khảo sát (wave) và cơ sở (campus)
+    STORE_DIR_NAME = "store"
+    DEFAULT_CAMPUS = "HCM"
+    # Học kỳ FPoly: Spring (T1-T4), Summer (T5-T8), Fall (T9-T12) -> wave "2026-SP"
+    SURVEY_WAVE_TERMS = {
+        "SP": (1, 4),
+        "SU": (5, 8),
+        "FA": (9, 12),
+    }
+
+    # HTTP API (src/api/server.py)
+    API_HOST = "127.0.0.1"
+    API_PORT = 8600
+    API_CACHE_MAX_ENTRIES = 256
+
+    # Chỉ mục từ khóa điều ước (src/analytics/keywords.py)
+    KEYWORD_DIR_NAME = "keywords"
+    KEYWORD_MAX_NGRAM = 3
+    KEYWORD_MIN_CHARS = 3            # độ dài tối thiểu của từ khóa một âm tiết
+    KEYWORD_MIN_PHRASE_COUNT = 2     # cụm >= 2 âm tiết phải xuất hiện ít nhất chừng này lần
+    KEYWORD_SUBSUME_RATIO = 0.7      # ẩn cụm con khi các cụm dài chứa nó chiếm >= 70% số lần
+
+    # Word cloud điều ước vẽ nền (src/analytics/wordcloud_cache.py)
+    WORDCLOUD_DIR_NAME = "wordclouds"
+    WORDCLOUD_CACHE_MAX_FILES = 200
+    WORDCLOUD_MAX_WORDS = 100
+    WORDCLOUD_POLL_SECONDS = 1.5
+    WORDCLOUD_FAILURE_TTL_SECONDS = 60.0  # ảnh vẽ lỗi được thử lại sau chừng này giây
+    WORDCLOUD_OPTIONS = {
+        "width": 800,
+        "height": 400,
+        "background_color": "white",
+        "colormap": "Oranges",
+        "prefer_horizontal": 0.9,
+        "random_state": 42,
+    }
+
+    # Top-k từ khóa xấp xỉ theo luồng (src/analytics/sketch.py)
+    SKETCH_CAPACITY = 5000
+    SKETCH_CHUNK_ROWS = 20_000
+
+    # Kiểm soát chất lượng phản hồi (src/etl/quality.py)
+    LIKERT_ITEM_PREFIXES = ("hap_", "aca_", "env_", "soc_", "fin_")
+    LIKERT_RANGE = (1, 5)
+    QUALITY_STRAIGHTLINE_MIN_ITEMS = 10    # chỉ xét straight-lining khi trả lời đủ chừng này câu
+    # Nhiều bài giống hệt nhau (cùng đáp án Likert) gửi dồn trong một khoảng ngắn
+    QUALITY_BURST_WINDOW_SECONDS = 300
+    QUALITY_BURST_MIN_RESPONSES = 3
+    # Xử lý từng loại cờ: "drop" (loại dòng), "flag" (giữ dòng, thêm cột qc_*), "ignore"
+    QUALITY_POLICY = {
+        "out_of_range": "drop",
+        "straightline": "flag",
+        "burst": "flag",
+    }
+
+    # Độ tin cậy thang đo (src/analytics/reliability.py)
+    RELIABILITY_FACTORS = {
+        "Happiness": "hap_",
+        "Academic": "aca_",
+        "Environment": "env_",
+        "Social": "soc_",
+        "Finance": "fin_",
+    }
+    RELIABILITY_MIN_ROWS = 10            # nhóm ít dòng hơn thì không báo alpha
+    RELIABILITY_ALPHA_ACCEPTABLE = 0.7
+    RELIABILITY_ITEM_TOTAL_MIN = 0.3     # câu có tương quan biến-tổng thấp hơn là câu "lạc nhóm"
+
+    # Kiểm định khác biệt giữa các nhóm (src/analytics/significance.py)
+    SIGNIFICANCE_PAIR_TEST = "welch"       # "welch" (t-test) hoặc "dunn" (trên hạng)
+    SIGNIFICANCE_CORRECTION = "holm"       # tên phương pháp của statsmodels multipletests
+    SIGNIFICANCE_ALPHA = 0.05
+    SIGNIFICANCE_MIN_GROUP_SIZE = 5        # nhóm ít dòng hơn không được kiểm định
+
+    # Bộ dữ liệu dạng cột mmap dùng chung giữa các phiên / tiến trình (src/etl/columnar.py)
+    COLUMNAR_DIR_NAME = "columns"
+    COLUMNAR_MAX_VERSIONS = 3        # số phiên bản giữ lại cho mỗi tổ hợp đợt khảo sát (dùng gần nhất)
+    COLUMNAR_FORMAT_VERSION = 2      # 2: thêm cột chiều mã hóa từ điển (dim_*)
+
+    # Ẩn ô nhỏ khi hiển thị (src/analytics/privacy.py): nhóm / phân khúc ít hơn k phản hồi bị ẩn hoặc gộp
+    PRIVACY_MIN_CELL_SIZE = 5
+    PRIVACY_OTHER_LABEL = "Nhóm nhỏ"
+
+    # Xuất dữ liệu đã lọc, ẩn danh (src/etl/export.py)
+    EXPORT_CHUNK_ROWS = 50_000
+    EXPORT_DROP_COLUMNS = ("wish",)      # câu trả lời tự do có thể chứa tên riêng / thông tin nhận dạng
+    EXPORT_TIMESTAMP_UNIT = "D"          # thời gian nộp bài chỉ giữ đến ngày
+    # Lát cắt lớn hơn: Dashboard dẫn sang /api/export (stream) thay vì dựng cả file trong tiến trình Streamlit
+    EXPORT_INLINE_MAX_ROWS = 50_000
+    # Địa chỉ HTTP API mà trình duyệt của người xem truy cập được (vd. "https://survey.example.edu");
+    # None: không dẫn sang API, lát cắt lớn vẫn được dựng và tải trong tiến trình Streamlit
+    EXPORT_API_BASE_URL = None
+
+    # Tự làm mới khi ETL ghi dữ liệu mới (src/etl/watcher.py)
+    WATCH_INTERVAL_SECONDS = 2.0         # chu kỳ stat() file đã xử lý / manifest (một thread mỗi tiến trình)
+    WATCH_SETTLE_SECONDS = 1.0           # file phải đứng yên chừng này giây mới được coi là ghi xong
+    WATCH_SESSION_POLL_SECONDS = 3.0     # mỗi phiên so thế hệ dữ liệu (trong bộ nhớ) theo chu kỳ này
+
+    # Cache theo stage của pipeline ETL → phân tích → snapshot (src/etl/pipeline.py)
+    PIPELINE_DIR_NAME = "pipeline_cache"
+    PIPELINE_MAX_WORKERS = 4             # số stage độc lập chạy song song (thread)
+    PIPELINE_MAX_ENTRIES = 3             # số bản cache giữ lại cho mỗi stage
+
+    # Phân tích nền cho Dashboard (src/analytics/background.py)
+    ANALYSIS_MAX_WORKERS = 1
+    ANALYSIS_CACHE_MAX_ENTRIES = 64
+    ANALYSIS_POLL_SECONDS = 1.0
+    ANALYSIS_FAILURE_TTL_SECONDS = 60.0   # phân khúc tính lỗi được thử lại ở nền sau chừng này giây
+    # Section rẻ (value_counts / trung bình) tính ngay trong script để KPI hiện tức thì
+    ANALYSIS_FAST_SECTIONS = ("major_dist", "semester_dist", "gpa_dist", "residence_dist", "kpi")
@@ -1,12 +1,14 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
+import os
+import time
 from pathlib import Path
 
 
 _APP_DIR = Path(__file__).resolve().parent
 _PROJECT_ROOT = _APP_DIR.parent.parent
-_DATA_PATH = _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"
+# Có thể trỏ sang file khác (ví dụ dữ liệu giả lập cho load-test) qua biến môi trường FPOLY_DATA_PATH
+_DATA_PATH = Path(os.environ.get("FPOLY_DATA_PATH", _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"))
 _CSS_PATH = _APP_DIR / "style.css"
 _ICON_PATH = _APP_DIR.parent / "assets" / "teamlogo.jpg"
 
@@ -17,7 +19,19 @@ sys.path.insert(0, str(_PROJECT_ROOT))
 # Import components
 from components.sidebar import render_sidebar
 from components.charts import render_charts
+from components.export import render_export
+from components.profiler import start_profiling
 from src.analytics.analyzer import DataAnalyzer
+from src.analytics.background import FAILED, AnalysisExecutor
+from src.analytics.keywords import KeywordIndex, load_or_build
+from src.analytics.privacy import SegmentCounts, guard_chart_data, guard_feedback, guard_words, is_protected
+from src.analytics.segments import segment_id, segment_mask
+from src.analytics.wordcloud_cache import WordCloudCache, wordcloud_root
+from src.config import Config
+from src.etl.columnar import StaleVersionError, shared_dataset
+from src.etl.snapshot import load_snapshot
+from src.etl.store import PartitionedStore, store_root
+from src.etl.watcher import VersionWatcher
 
 # --- PAGE CONFIG ---
 st.set_page_config(
@@ -48,18 +62,103 @@ MAJORS = {
     "Tourism": "Du lịch – Nhà hàng – Khách sạn",
 }
 SEMESTERS = [1, 2, 3, 4, 5, 6, 7, 8, 9]
-TEXT_WISHES = [
-    {"t": "Trường cần siết chặt hơn về đánh giá năng lực để cho điểm phù hợp.", "c": "Academic", "s": "Neutral"},
-    {"t": "Có nhiều cuộc thi hơn cho ngành CNTT để sinh viên thử sức với dự án thực tế.", "c": "Academic", "s": "Positive"},
-    {"t": "Ước gì học phí ít hơn.", "c": "Finance", "s": "Negative"},
-    {"t": "Lịch học bất tiện, khó chọn lớp vào giờ cao điểm, mong trường khắc phục.", "c": "Academic", "s": "Negative"},
-    {"t": "Mong có nhiều buổi thực hành tại doanh nghiệp và đi tour thực tế hơn.", "c": "Academic", "s": "Positive"},
-    {"t": "Cải thiện cơ sở vật chất, chất lượng giảng dạy và môi trường học tập.", "c": "Environment", "s": "Positive"},
-    {"t": "Wifi cần mạnh hơn và nên có thêm máy lọc nước cho sinh viên.", "c": "Environment", "s": "Negative"},
-    {"t": "Giảm deadline để sinh viên bớt áp lực.", "c": "Academic", "s": "Negative"},
-    {"t": "Tổ chức nhiều hoạt động tập thể và phát triển các câu lạc bộ.", "c": "Social", "s": "Positive"},
-    {"t": "Giảm học phí hoặc có nhiều chương trình học bổng hơn cho sinh viên.", "c": "Finance", "s": "Positive"},
-]
+
+
+@st.cache_resource(show_spinner=False)
+def get_wordcloud_cache():
+    """Một cache word cloud (và một tiến trình vẽ nền) dùng chung cho mọi phiên."""
+    return WordCloudCache(wordcloud_root(_DATA_PATH))
+
+
+@st.cache_resource(show_spinner=False)
+def get_analysis_executor():
+    """Một executor phân tích nền dùng chung cho mọi phiên (gộp các yêu cầu trùng nhau)."""
+    return AnalysisExecutor(_DATA_PATH)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_keyword_index(version, waves, _frame):
+    """Chỉ mục từ khóa dựng một lần cho mỗi phiên bản dữ liệu (hoặc tổ hợp đợt khảo sát)."""
+    if waves:
+        return KeywordIndex.build(_frame)
+    return load_or_build(_DATA_PATH, _frame)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_segment_counts(version, waves, _frame):
+    """Khối đếm phản hồi theo ngành × kỳ × nhóm GPA × nơi ở, dựng một lần cho mỗi phiên bản dữ liệu."""
+    return SegmentCounts.build(_frame)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def get_dataset(version, waves):
+    """
+    Frame chỉ đọc của một phiên bản dữ liệu (src/etl/columnar.py), dùng chung cho mọi phiên.
+    Các tiến trình khác (API, worker) mở cùng file mmap nên dữ liệu chỉ nằm trong RAM một lần.
+    """
+    return shared_dataset(_DATA_PATH, version, waves).frame
+
+
+def load_dataset(version, waves):
+    """
+    (phiên bản, frame) của bộ dữ liệu cần hiển thị. ETL có thể vừa ghi dữ liệu mới mà thread theo
+    dõi chưa công bố (StaleVersionError): phiên dùng lại phiên bản gần nhất nó đã mở với cùng các
+    đợt khảo sát, rồi rerun khi thread theo dõi công bố phiên bản mới. Chưa có phiên bản nào để
+    dùng lại thì chờ một chu kỳ rồi thử lại.
+    """
+    opened = st.session_state.setdefault("dataset_versions", {})
+    try:
+        dataset = get_dataset(version, waves)
+    except StaleVersionError:
+        last = opened.get(waves)
+        if last is not None and last != version:
+            try:
+                return last, get_dataset(last, waves)
+            except StaleVersionError:
+                pass
+        st.info("🔄 Dữ liệu đang được cập nhật, trang sẽ tự tải lại trong giây lát...")
+        time.sleep(Config.WATCH_SESSION_POLL_SECONDS)
+        st.rerun()
+    opened[waves] = version
+    return version, dataset
+
+
+def _warm_shared_caches(version, store_version):
+    """Gọi một lần bởi thread theo dõi khi có phiên bản mới: các phiên rerun sau đó chỉ còn trúng cache."""
+    if version is None:
+        return
+    frame = get_dataset(version, ())
+    get_keyword_index(version, (), frame)
+    get_segment_counts(version, (), frame)
+
+
+@st.cache_resource(show_spinner=False)
+def get_version_watcher():
+    """Một thread theo dõi phiên bản dữ liệu cho cả server (không phải mỗi phiên một thread)."""
+    return VersionWatcher(_DATA_PATH, on_change=_warm_shared_caches).start()
+
+
+@st.fragment(run_every=Config.WATCH_SESSION_POLL_SECONDS)
+def watch_data_version(watcher, generation):
+    """Chỉ so số thế hệ trong bộ nhớ; khi ETL công bố dữ liệu mới thì chạy lại cả trang."""
+    if watcher.generation != generation:
+        st.rerun()
+
+
+def component_view(data):
+    """
+    Các cột component (luồng phản hồi) cần, theo tên cũ: major, semester, wish, wishSent, wishCat, risk.
+    Cột chuỗi Arrow của frame dùng chung được chuyển sang object (chỉ trên các dòng đã lọc).
+    """
+    return pd.DataFrame({
+        "major": data["major_key"].to_numpy(dtype=object, na_value=None),
+        "semester": data["semester_num"].to_numpy(),
+        "wish": data["wish"].to_numpy(dtype=object, na_value=""),
+        "wishSent": data["wish_sentiment"].to_numpy(dtype=object, na_value=None),
+        "wishCat": data["wish_category"].to_numpy(dtype=object, na_value=None),
+        "risk": data["retention_risk"].to_numpy(),
+    }, index=data.index)
+
 
 def main():
     """Main function to run the Streamlit dashboard."""
@@ -67,99 +166,29 @@ def main():
         st.error(f"Data file not found: {_DATA_PATH}. Run the ETL pipeline in main.ipynb first.")
         return
 
-    # Mapping chuyên ngành (dùng chung cho filter và chart)
-    major_mapping = {
-        "Ngành Công Nghệ Thông Tin": "IT",
-        "Thiết kế đồ họa": "Design",
-        "Quản Trị Kinh Doanh & Marketing": "Biz",
-        "Du lịch – Nhà hàng – Khách sạn": "Tourism",
-        "Logistics & Y tế": "Biz",
-        "Công nghệ kỹ thuật – Cơ khí – Điện tử": "IT",
-        "Khác": "Biz",
-        "Ngôn ngữ": "Biz",
-    }
-
-    # Load raw data CHO BIỂU ĐỒ (giữ nguyên cột gốc: dem_major, hap_*, aca_*, timestamp...)
-    raw_for_charts = pd.read_csv(_DATA_PATH)
-    raw_for_charts["major_key"] = raw_for_charts["dem_major"].map(major_mapping).fillna("IT")
-    raw_for_charts["semester_num"] = pd.to_numeric(raw_for_charts["dem_semester"], errors="coerce")
-    raw_for_charts = raw_for_charts.dropna(subset=["semester_num"])
-    raw_for_charts["semester_num"] = raw_for_charts["semester_num"].astype(int)
-
-    raw_data = pd.read_csv(_DATA_PATH)
-
-    # Data Transformations (cho các component hiện tại)
-    raw_data.rename(columns={
-        "dem_major": "major",
-        "dem_semester": "semester",
-        "dem_gpa": "ahs",
-        "wish": "wish_text" # Rename original wish to wish_text to avoid conflict
-    }, inplace=True)
-
-    raw_data["major"] = raw_data["major"].map(major_mapping).fillna("IT")
-
-    # Convert semester to numeric, coercing errors to NaN
-    raw_data['semester'] = pd.to_numeric(raw_data['semester'], errors='coerce')
-    # Drop rows where semester is NaN after conversion
-    raw_data.dropna(subset=['semester'], inplace=True)
-    raw_data['semester'] = raw_data['semester'].astype(int)
-
-    # Create 'factors' dictionary column
-    def calculate_factors(row):
-        aca_cols = ["aca_curriculum_fit", "aca_deadline_pressure", "aca_teaching_quality", "aca_lms_stability"]
-        env_cols = ["env_facilities", "env_utilities", "env_dynamic_culture"]
-        soc_cols = ["soc_friendship_support", "soc_activity_integration", "soc_family_support"]
-        fin_cols = ["fin_tuition_value", "fin_living_cost_worry", "fin_job_prospects"]
-        hap_cols = ["hap_general_satisfaction", "hap_school_energy", "hap_meaningful_life", "hap_loyalty_choice"]
-
-        factors_dict = {
-            "aca": row[aca_cols].mean(),
-            "env": row[env_cols].mean(),
-            "soc": row[soc_cols].mean(),
-            "fin": row[fin_cols].mean(),
-            "hap": row[hap_cols].mean(),
-        }
-        return factors_dict
-
-    raw_data["factors"] = raw_data.apply(calculate_factors, axis=1)
+    profiler = start_profiling()
 
-    # Create 'risk' column (randomly for now)
-    raw_data["risk"] = np.random.choice([0, 1], size=len(raw_data), p=[0.88, 0.12])
+    # Đợt khảo sát: nếu có kho phân vùng và người dùng chọn đợt cụ thể thì chỉ đọc các phân vùng đó
+    store = PartitionedStore(store_root(_DATA_PATH))
+    available_waves = store.waves() if store.exists() else []
+    selected_waves = [w for w in st.session_state.get("wave_select", []) if w in available_waves]
 
-    # Create 'wish' (text), 'wishCat', and 'wishSent' columns
-    # Assign 'wish_text' to 'wish' and randomly assign 'wishCat' and 'wishSent' from TEXT_WISHES
-    raw_data["wish"] = raw_data["wish_text"]
-    raw_data.drop(columns=["wish_text"], inplace=True) # Drop the temporary column
+    # Phiên bản hiện hành do thread theo dõi công bố (đã làm ấm cache), không stat / băm file mỗi lần rerun
+    watcher = get_version_watcher()
+    data_state = watcher.state()
+    if st.session_state.get("data_generation", data_state.generation) != data_state.generation:
+        st.toast(f"🔄 Đã cập nhật dữ liệu mới (phiên bản {data_state.version}).")
+    st.session_state.data_generation = data_state.generation
 
-    # Fill NaN values in 'wish' with an empty string to avoid errors with choices
-    raw_data['wish'].fillna('', inplace=True)
+    with profiler.section("load_dataset"):
+        # Frame chỉ đọc dùng chung (mmap); phiên chỉ giữ mask lọc và kết quả của riêng mình
+        version = data_state.store_version if selected_waves else data_state.version
+        version, dataset = load_dataset(version, tuple(selected_waves))
 
-    # Ensure all TEXT_WISHES categories are covered, or add a default
-    if not TEXT_WISHES:
-        st.error("TEXT_WISHES constant is empty. Cannot assign wish categories.")
-        # Provide a fallback if TEXT_WISHES is empty
-        raw_data["wishCat"] = "Unknown"
-        raw_data["wishSent"] = "Neutral"
-    else:
-        wish_choices = [(w["c"], w["s"]) for w in TEXT_WISHES]
-        # Use a more robust way to assign wishCat and wishSent
-        # For now, let's randomly assign or map them if a pattern is found
-        # Given the original TEXT_WISHES is a fixed list, let's just make it random for now
-        # until actual sentiment analysis or categorization is implemented.
-        random_choices = np.random.choice(len(wish_choices), size=len(raw_data))
-        raw_data["wishCat"] = [wish_choices[i][0] for i in random_choices]
-        raw_data["wishSent"] = [wish_choices[i][1] for i in random_choices]
-
-    # Drop original columns that are now aggregated into 'factors' or are no longer needed
-    columns_to_drop = [
-        "timestamp", "dem_residence",
-        "hap_general_satisfaction", "hap_school_energy", "hap_meaningful_life", "hap_loyalty_choice",
-        "aca_curriculum_fit", "aca_deadline_pressure", "aca_teaching_quality", "aca_lms_stability",
-        "env_facilities", "env_utilities", "env_dynamic_culture",
-        "soc_friendship_support", "soc_activity_integration", "soc_family_support",
-        "fin_tuition_value", "fin_living_cost_worry", "fin_job_prospects"
-    ]
-    raw_data.drop(columns=columns_to_drop, inplace=True, errors='ignore')
+    with profiler.section("keyword_index"):
+        keyword_index = get_keyword_index(version, tuple(selected_waves), dataset)
+    with profiler.section("segment_counts"):
+        segment_counts = get_segment_counts(version, tuple(selected_waves), dataset)
 
     # Initialize session state for filters
     if "current_major" not in st.session_state:
@@ -172,48 +201,90 @@ def main():
     def reset_filters():
         st.session_state.current_major = "all"
         st.session_state.current_semester = "all"
-
-    def filter_data(data):
-        df = data.copy()
-        if st.session_state.current_major != "all":
-            df = df[df["major"] == st.session_state.current_major]
-        
-        semester_map = {
-            "freshman": (df["semester"] <= 3),
-            "junior": (df["semester"] >= 4) & (df["semester"] <= 6),
-            "senior": (df["semester"] >= 7)
-        }
-        if st.session_state.current_semester in semester_map:
-            df = df[semester_map[st.session_state.current_semester]]
-        
-        return df
-
-    def filter_raw_for_charts(data):
-        """Áp dụng cùng bộ lọc cho dữ liệu raw (có major_key, semester_num)."""
-        df = data.copy()
-        if st.session_state.current_major != "all":
-            df = df[df["major_key"] == st.session_state.current_major]
-        semester_map = {
-            "freshman": (df["semester_num"] <= 3),
-            "junior": (df["semester_num"] >= 4) & (df["semester_num"] <= 6),
-            "senior": (df["semester_num"] >= 7),
-        }
-        if st.session_state.current_semester in semester_map:
-            df = df[semester_map[st.session_state.current_semester]]
-        return df
+        st.session_state.wave_select = []
 
     # --- Render App ---
-    render_sidebar(reset_filters)
-    filtered_data = filter_data(raw_data)
-    filtered_raw_for_charts = filter_raw_for_charts(raw_for_charts)
+    with profiler.section("render_sidebar", kind="render"):
+        render_sidebar(reset_filters, waves=available_waves)
+    with profiler.section("filter_data"):
+        mask = segment_mask(dataset, st.session_state.current_major, st.session_state.current_semester)
+        # Chỉ các dòng đã lọc được chép cho phiên; không lọc gì thì dùng thẳng frame dùng chung
+        filtered_raw_for_charts = dataset if mask.all() else dataset[mask]
+        filtered_data = component_view(filtered_raw_for_charts)
+    with profiler.section("privacy_guard"):
+        # Chỉ tra khối đếm dựng sẵn: phân khúc / ô nào dưới k phản hồi thì không hiển thị
+        cells = segment_counts.cells(st.session_state.current_major, st.session_state.current_semester)
+        protected = is_protected(cells)
+        if not protected:
+            filtered_data = guard_feedback(filtered_data, segment_counts.feedback_cells(
+                st.session_state.current_major, st.session_state.current_semester,
+            ))
+    with profiler.section("render_export", kind="render"):
+        render_export(
+            dataset, mask, st.session_state.current_major, st.session_state.current_semester, selected_waves,
+            protected=protected,
+        )
 
-    if not filtered_data.empty:
+    snapshot = pending = None
+    if not filtered_data.empty and protected:
+        st.warning(
+            f"🔒 Bộ lọc này chỉ có {cells['total']} phản hồi (dưới {Config.PRIVACY_MIN_CELL_SIZE}). "
+            "Biểu đồ và phản hồi được ẩn để bảo vệ danh tính sinh viên; hãy mở rộng bộ lọc."
+        )
+    elif not filtered_data.empty:
         st.header("📈 Biểu đồ Phân tích Chi tiết")
-        analyzer = DataAnalyzer(str(_DATA_PATH))
-        chart_data = analyzer.get_chart_data(df=filtered_raw_for_charts)
-        render_charts(chart_data, filtered_data=filtered_data)
+        # Ưu tiên snapshot do ETL tính sẵn; chỉ tính trực tiếp khi chưa có snapshot cho phiên bản dữ liệu này
+        # (snapshot luôn tính trên toàn bộ các đợt nên bỏ qua khi đang lọc theo đợt khảo sát)
+        if not selected_waves:
+            with profiler.section("load_snapshot"):
+                snapshot = load_snapshot(_DATA_PATH, st.session_state.current_major, st.session_state.current_semester)
+            # File vừa được ghi lại nhưng chưa được công bố: giữ dữ liệu cũ cho nhất quán với frame
+            if snapshot is not None and snapshot.get("data_version") != version:
+                snapshot = None
+        if snapshot is not None:
+            chart_data = snapshot["chart_data"]
+        else:
+            # Phần nặng (từ khóa, tương quan, độ tin cậy...) tính ở tiến trình nền; trong lúc chờ
+            # chỉ tính các section rẻ để KPI hiện ngay, các chương còn lại tự điền khi có kết quả
+            executor = get_analysis_executor()
+            job = (version, tuple(selected_waves), st.session_state.current_major, st.session_state.current_semester)
+            with profiler.section("request_analysis"):
+                chart_data = executor.request(*job)
+            if chart_data is None:
+                analyzer = DataAnalyzer(df=filtered_raw_for_charts, keyword_index=keyword_index)
+                # Worker lỗi: tính đồng bộ như trước để trang vẫn đầy đủ
+                sections = None if executor.status(*job) == FAILED else Config.ANALYSIS_FAST_SECTIONS
+                timings = {}
+                with profiler.section("get_chart_data"):
+                    chart_data = analyzer.get_chart_data(df=filtered_raw_for_charts, timings=timings, sections=sections)
+                profiler.add_timings("get_chart_data", timings)
+                if sections is not None:
+                    pending = {"executor": executor, "job": job}
+        wordcloud = {
+            "cache": get_wordcloud_cache(),
+            "version": version,
+            "segment": "__".join(
+                [segment_id(st.session_state.current_major, st.session_state.current_semester)] + selected_waves
+            ),
+            "words": guard_words(keyword_index.top_k(Config.WORDCLOUD_MAX_WORDS, index=filtered_raw_for_charts.index)),
+        }
+        chart_data = guard_chart_data(chart_data, cells)
+        render_charts(chart_data, filtered_data=filtered_data, wordcloud=wordcloud, pending=pending)
     else:
         st.warning("Không có dữ liệu cho bộ lọc đã chọn. Vui lòng thử lại.")
 
+    if profiler.enabled:
+        profiler.render()
+        profiler.append_log(context={
+            "major": st.session_state.current_major,
+            "semester": st.session_state.current_semester,
+            "rows": int(len(filtered_data)),
+            "waves": selected_waves,
+            "snapshot": snapshot is not None if not filtered_data.empty else None,
+            "pending": pending is not None if not filtered_data.empty else None,
+        })
+
+    watch_data_version(watcher, data_state.generation)
+
 if __name__ == "__main__":
     main()
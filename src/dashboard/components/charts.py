@@ -1,23 +1,92 @@
 """Trực quan hóa các biểu đồ phân tích từ dữ liệu khảo sát."""
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
-
-def render_charts(chart_data, filtered_data=None):
-    """Hiển thị biểu đồ theo luồng storytelling: Tổng quan → Đối tượng → Hành trình → Động lực → Tiếng nói → Phụ lục."""
+from components.profiler import plotly_chart, profiled
+from src.analytics.background import PENDING
+from src.analytics.text import contains
+from src.analytics.wordcloud_cache import FAILED, READY
+from src.config import Config
+
+# Số figure tối đa giữ trong cache (mỗi figure ứng với một slice chart data khác nhau)
+_FIGURE_CACHE_ENTRIES = 512
+
+# Tên nhân tố (Config.RELIABILITY_FACTORS) hiển thị trên Dashboard
+_RELIABILITY_LABELS = {
+    "Happiness": "Hạnh phúc", "Academic": "Học thuật", "Environment": "Môi trường", "Social": "Xã hội", "Finance": "Tài chính",
+}
+
+# Nhóm nhân tố trong chart data (factor_by_major, significance)
+_FACTOR_LABELS = {'aca': 'Học thuật', 'env': 'Môi trường', 'soc': 'Xã hội', 'fin': 'Tài chính', 'hap': 'Hạnh phúc'}
+# Số cặp nhóm tối đa được chú thích dưới mỗi biểu đồ
+_MAX_GAPS_SHOWN = 3
+
+# Các chương được dựng theo yêu cầu: (key, tiêu đề, mở sẵn hay không)
+CHAPTERS = [
+    ("audience", "👥 Đối tượng khảo sát", False),
+    ("journey", "🚀 Hành trình hạnh phúc theo thời gian & thành tích", False),
+    ("drivers", "🎯 Các nhân tố ảnh hưởng đến hạnh phúc", False),
+    ("voice", "💬 Tiếng nói sinh viên – Điều ước & mức độ hài lòng", False),
+    ("trend", "📅 Xu hướng phản hồi", False),
+]
+
+
+def cached_figure(builder):
+    """
+    Cache figure theo hash của slice chart data truyền vào: slice không đổi thì
+    figure không bao giờ được dựng lại.
+    """
+    return st.cache_data(show_spinner=False, max_entries=_FIGURE_CACHE_ENTRIES)(builder)
+
+
+@profiled
+def render_charts(chart_data, filtered_data=None, wordcloud=None, pending=None):
+    """
+    Hiển thị biểu đồ theo luồng storytelling: Tổng quan → Đối tượng → Hành trình → Động lực → Tiếng nói → Phụ lục.
+    `wordcloud` = {'cache', 'version', 'segment', 'words'} để hiển thị word cloud vẽ nền (None = biểu đồ cột).
+    `pending` = {'executor', 'job'} khi chart_data mới có các section rẻ, phần còn lại đang tính nền.
+    """
     if not chart_data:
         st.warning("Không có dữ liệu biểu đồ. Vui lòng kiểm tra dữ liệu đầu vào.")
         return
 
     # ========== CHƯƠNG 1: BỨC TRANH TỔNG QUAN ==========
-    # st.markdown("### 📊 1. Bức tranh tổng quan")
+    # KPI luôn hiển thị; các chương còn lại chỉ được tính khi người dùng mở
     if 'kpi' in chart_data:
         _render_kpi(chart_data['kpi'])
+    _render_privacy_note(chart_data.get('privacy'))
+    if pending is not None:
+        _analysis_placeholder(pending["executor"], pending["job"])
+
+    renderers = {
+        "audience": _render_audience_chapter,
+        "journey": _render_journey_chapter,
+        "drivers": _render_drivers_chapter,
+        "voice": partial(_render_voice_chapter, wordcloud=wordcloud),
+        "trend": _render_trend_chapter,
+    }
+    for key, title, default_open in CHAPTERS:
+        st.markdown(f"### {title}")
+        if st.toggle("Hiển thị", value=default_open, key=f"chapter_{key}"):
+            renderers[key](chart_data, filtered_data)
+
+
+def _render_privacy_note(privacy):
+    """Chú thích các nhóm đã bị ẩn / gộp vì có ít hơn k phản hồi (src/analytics/privacy.py)."""
+    if not privacy or not privacy.get("suppressed"):
+        return
+    st.caption(
+        f"🔒 Các nhóm có dưới {privacy['k']} phản hồi đã được gộp vào \"{Config.PRIVACY_OTHER_LABEL}\" "
+        "hoặc ẩn khỏi biểu đồ để bảo vệ danh tính sinh viên."
+    )
 
-    # ========== CHƯƠNG 2: AI ĐANG NÓI? – ĐỐI TƯỢNG KHẢO SÁT ==========
-    # st.markdown("### 👥 2. Đối tượng khảo sát")
+
+# ========== CHƯƠNG 2: AI ĐANG NÓI? – ĐỐI TƯỢNG KHẢO SÁT ==========
+def _render_audience_chapter(chart_data, filtered_data):
     col1, col2 = st.columns(2)
     with col1:
         if 'major_dist' in chart_data:
@@ -33,20 +102,25 @@ def render_charts(chart_data, filtered_data=None):
         if 'residence_dist' in chart_data:
             _render_residence_dist(chart_data['residence_dist'])
 
-    # ========== CHƯƠNG 3: HÀNH TRÌNH – HẠNH PHÚC THAY ĐỔI THẾ NÀO? ==========
-    st.markdown("### 🚀 Hành trình hạnh phúc theo thời gian & thành tích")
+
+# ========== CHƯƠNG 3: HÀNH TRÌNH – HẠNH PHÚC THAY ĐỔI THẾ NÀO? ==========
+def _render_journey_chapter(chart_data, filtered_data):
+    significance = chart_data.get('significance', {})
     col5, col6 = st.columns(2)
     with col5:
         if 'semester_happiness' in chart_data:
             _render_semester_curve(chart_data['semester_happiness'])
+            _render_gaps(significance.get('semester_happiness'), "Kỳ {}")
     with col6:
         if 'gpa_happiness' in chart_data:
             _render_gpa_happiness(chart_data['gpa_happiness'])
+            _render_gaps(significance.get('gpa_happiness'), "GPA {}")
     if 'gpa_ahs_scatter' in chart_data:
         _render_gpa_ahs_scatter(chart_data['gpa_ahs_scatter'])
 
-    # ========== CHƯƠNG 4: ĐỘNG LỰC – NHÂN TỐ NÀO TÁC ĐỘNG? ==========
-    st.markdown("### 🎯 Các nhân tố ảnh hưởng đến hạnh phúc")
+
+# ========== CHƯƠNG 4: ĐỘNG LỰC – NHÂN TỐ NÀO TÁC ĐỘNG? ==========
+def _render_drivers_chapter(chart_data, filtered_data):
     col7, col8 = st.columns(2)
     with col7:
         if 'factor_by_major' in chart_data:
@@ -54,14 +128,21 @@ def render_charts(chart_data, filtered_data=None):
     with col8:
         if 'factor_by_major' in chart_data:
             _render_grouped_bar_factors(chart_data['factor_by_major'])
+    for factor, gaps in chart_data.get('significance', {}).get('factor_by_major', {}).items():
+        _render_gaps(gaps, "{}", title=_FACTOR_LABELS.get(factor, factor))
     if 'correlation_matrix' in chart_data:
         _render_correlation_heatmap(chart_data['correlation_matrix'])
+    if 'reliability' in chart_data:
+        _render_reliability(chart_data['reliability'])
 
-    # ========== CHƯƠNG 5: TIẾNG NÓI – SINH VIÊN ƯỚC MONG GÌ? ==========
-    st.markdown("### 💬 Tiếng nói sinh viên – Điều ước & mức độ hài lòng")
+
+# ========== CHƯƠNG 5: TIẾNG NÓI – SINH VIÊN ƯỚC MONG GÌ? ==========
+def _render_voice_chapter(chart_data, filtered_data, wordcloud=None):
     col9, col10 = st.columns(2)
     with col9:
-        if 'wish_word_counts' in chart_data:
+        if wordcloud is not None and wordcloud["cache"].available:
+            _render_word_cloud(wordcloud, chart_data.get('wish_word_counts'))
+        elif 'wish_word_counts' in chart_data:
             _render_word_cloud_bar(chart_data['wish_word_counts'])
     with col10:
         if 'likert_dist' in chart_data:
@@ -70,12 +151,14 @@ def render_charts(chart_data, filtered_data=None):
     if filtered_data is not None:
         _render_feedback_stream(filtered_data)
 
-    # ========== CHƯƠNG 6: PHỤ LỤC – DỮ LIỆU PHẢN HỒI ==========
-    st.markdown("### 📅 Xu hướng phản hồi")
+
+# ========== CHƯƠNG 6: PHỤ LỤC – DỮ LIỆU PHẢN HỒI ==========
+def _render_trend_chapter(chart_data, filtered_data):
     if 'response_trend' in chart_data:
         _render_response_trend(chart_data['response_trend'])
 
 
+@profiled
 def _render_kpi(kpi):
     # st.subheader("📈 Chỉ số tổng hợp")
     c1, c2, c3 = st.columns(3)
@@ -87,48 +170,81 @@ def _render_kpi(kpi):
         st.metric("Tổng phản hồi", kpi.get('total', 0), help=f"Promoters: {kpi.get('promoters',0)}, Detractors: {kpi.get('detractors',0)}")
 
 
-def _render_major_dist(data):
-    st.subheader("📊 Phân bố theo Chuyên ngành")
+@cached_figure
+def _fig_major_dist(data):
     df = pd.DataFrame(list(data.items()), columns=["Ngành", "Số lượng"])
     fig = px.bar(df, x="Ngành", y="Số lượng", color="Số lượng", color_continuous_scale="Blues")
     fig.update_layout(showlegend=False, xaxis_tickangle=-45)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_semester_dist(data):
-    st.subheader("📚 Phân bố theo Kỳ học")
+@profiled
+def _render_major_dist(data):
+    st.subheader("📊 Phân bố theo Chuyên ngành")
+    plotly_chart(_fig_major_dist(data), use_container_width=True)
+
+
+@cached_figure
+def _fig_semester_dist(data):
     df = pd.DataFrame(list(data.items()), columns=["Kỳ", "Số lượng"])
     fig = px.bar(df, x="Kỳ", y="Số lượng")
     fig.update_layout(showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
+@profiled
+def _render_semester_dist(data):
+    st.subheader("📚 Phân bố theo Kỳ học")
+    plotly_chart(_fig_semester_dist(data), use_container_width=True)
+
+
+@cached_figure
+def _fig_gpa_dist(data):
+    # Số phản hồi theo bin; bin bị ẩn (ô nhỏ) mang giá trị None
+    bins, counts = data.get("bins", []), data.get("counts", [])
+    df = pd.DataFrame({
+        "GPA": [(lo + hi) / 2 for lo, hi in zip(bins[:-1], bins[1:])],
+        "Số phản hồi": counts,
+    }).dropna()
+    if df.empty or not df["Số phản hồi"].sum():
+        return None
+    fig = px.bar(df, x="GPA", y="Số phản hồi", range_x=[bins[0], bins[-1]])
+    fig.update_layout(bargap=0.05)
+    fig.add_vline(x=data.get("mean", 0), line_dash="dash", line_color="red", annotation_text=f"TB: {data.get('mean',0):.2f}")
+    fig.update_layout(showlegend=False)
+    return fig
+
+
+@profiled
 def _render_gpa_dist(data):
     st.subheader("📐 Phân phối GPA")
-    df = pd.DataFrame({"GPA": data.get("values", [])})
-    if df.empty:
+    fig = _fig_gpa_dist(data)
+    if fig is None:
         return
-    fig = px.histogram(df, x="GPA", nbins=10, range_x=[4, 10])
-    fig.add_vline(x=data.get("mean", 0), line_dash="dash", line_color="red", annotation_text=f"TB: {data.get('mean',0):.2f}")
-    fig.update_layout(showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 
-def _render_residence_dist(data):
-    st.subheader("🏠 Phân bố Nơi ở")
+@cached_figure
+def _fig_residence_dist(data):
     df = pd.DataFrame(list(data.items()), columns=["Nơi ở", "Số lượng"])
     fig = px.pie(df, values="Số lượng", names="Nơi ở")
     fig.update_traces(textposition="inside", textinfo="percent+label")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_radar_factors(factor_by_major):
-    st.subheader("🕸️ Radar: Điểm nhân tố theo Ngành")
+@profiled
+def _render_residence_dist(data):
+    st.subheader("🏠 Phân bố Nơi ở")
+    plotly_chart(_fig_residence_dist(data), use_container_width=True)
+
+
+@cached_figure
+def _fig_radar_factors(factor_by_major):
     df = pd.DataFrame(factor_by_major)
     if df.empty or not all(c in df.columns for c in ['aca', 'env', 'soc', 'fin', 'hap']):
-        return
+        return None
     categories = ['aca', 'env', 'soc', 'fin', 'hap']
-    labels = {'aca': 'Học thuật', 'env': 'Môi trường', 'soc': 'Xã hội', 'fin': 'Tài chính', 'hap': 'Hạnh phúc'}
+    labels = _FACTOR_LABELS
     fig = go.Figure()
     colors = px.colors.qualitative.Set1[: len(df)]
     for i, row in df.iterrows():
@@ -138,79 +254,232 @@ def _render_radar_factors(factor_by_major):
             fill='toself', name=row['major'], line_color=colors[i % len(colors)]
         ))
     fig.update_layout(polar=dict(radialaxis=dict(visible=True, range=[1, 5])), showlegend=True, height=400)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_grouped_bar_factors(factor_by_major):
-    st.subheader("📊 Điểm nhân tố theo Ngành (Grouped Bar)")
+@profiled
+def _render_radar_factors(factor_by_major):
+    st.subheader("🕸️ Radar: Điểm nhân tố theo Ngành")
+    fig = _fig_radar_factors(factor_by_major)
+    if fig is None:
+        return
+    plotly_chart(fig, use_container_width=True)
+
+
+@cached_figure
+def _fig_grouped_bar_factors(factor_by_major):
     df = pd.DataFrame(factor_by_major)
     if df.empty:
-        return
+        return None
     df_melt = df.melt(id_vars=['major'], value_vars=['aca', 'env', 'soc', 'fin', 'hap'], var_name='Nhân tố', value_name='Điểm')
-    label_map = {'aca': 'Học thuật', 'env': 'Môi trường', 'soc': 'Xã hội', 'fin': 'Tài chính', 'hap': 'Hạnh phúc'}
+    label_map = _FACTOR_LABELS
     df_melt['Nhân tố'] = df_melt['Nhân tố'].map(label_map)
     fig = px.bar(df_melt, x='major', y='Điểm', color='Nhân tố', barmode='group')
     fig.update_layout(xaxis_title="Chuyên ngành", yaxis_range=[1, 5])
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_semester_curve(data):
-    st.subheader("📈 Đường cong Hạnh phúc theo Kỳ học")
+@profiled
+def _render_grouped_bar_factors(factor_by_major):
+    st.subheader("📊 Điểm nhân tố theo Ngành (Grouped Bar)")
+    fig = _fig_grouped_bar_factors(factor_by_major)
+    if fig is None:
+        return
+    plotly_chart(fig, use_container_width=True)
+
+
+@cached_figure
+def _fig_semester_curve(data):
     df = pd.DataFrame(list(data.items()), columns=["Kỳ", "AHS"])
     fig = px.line(df, x="Kỳ", y="AHS", markers=True)
     fig.update_traces(line=dict(color="#f97316", width=3))
     fig.update_layout(yaxis_range=[1, 5], showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_gpa_happiness(data):
-    st.subheader("🔗 GPA vs Hạnh phúc (theo nhóm)")
+@profiled
+def _render_semester_curve(data):
+    st.subheader("📈 Đường cong Hạnh phúc theo Kỳ học")
+    plotly_chart(_fig_semester_curve(data), use_container_width=True)
+
+
+@cached_figure
+def _fig_gpa_happiness(data):
     df = pd.DataFrame(list(data.items()), columns=["Nhóm GPA", "AHS"])
     fig = px.bar(df, x="Nhóm GPA", y="AHS", color="AHS", color_continuous_scale="Viridis")
     fig.update_layout(yaxis_range=[1, 5], showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+@profiled
+def _render_gpa_happiness(data):
+    st.subheader("🔗 GPA vs Hạnh phúc (theo nhóm)")
+    plotly_chart(_fig_gpa_happiness(data), use_container_width=True)
+
+
+def _render_gaps(gaps, label="{}", title=None):
+    """Chú thích các khoảng cách có ý nghĩa thống kê (đã hiệu chỉnh đa so sánh) giữa các nhóm của biểu đồ."""
+    if not gaps:
+        return
+    shown = [
+        f"{label.format(g['b'])} {'cao' if g['diff'] > 0 else 'thấp'} hơn {label.format(g['a'])} "
+        f"{abs(g['diff']):.2f} điểm (p={g['p_adj']:.2g})"
+        for g in gaps[:_MAX_GAPS_SHOWN]
+    ]
+    more = f" · và {len(gaps) - _MAX_GAPS_SHOWN} cặp khác" if len(gaps) > _MAX_GAPS_SHOWN else ""
+    prefix = f"**{title}:** " if title else ""
+    st.caption(f"📐 {prefix}" + "; ".join(shown) + more)
+
+
+@cached_figure
+def _fig_gpa_ahs_scatter(data):
+    # Mỗi điểm là một ô lưới GPA × AHS, kích thước theo số phản hồi trong ô
+    df = pd.DataFrame({"GPA": data.get("gpa", []), "AHS": data.get("ahs", []), "Số phản hồi": data.get("count", [])})
+    if df.empty:
+        return None
+    fig = px.scatter(df, x="GPA", y="AHS", size="Số phản hồi", size_max=30)
+    trend = data.get("trend")
+    if trend:
+        x = [df["GPA"].min(), df["GPA"].max()]
+        fig.add_scatter(x=x, y=[trend["slope"] * v + trend["intercept"] for v in x],
+                        mode="lines", name="OLS", showlegend=False)
+    fig.update_layout(xaxis_title="GPA", yaxis_title="Điểm Hạnh phúc (AHS)", yaxis_range=[1, 5])
+    return fig
 
 
+@profiled
 def _render_gpa_ahs_scatter(data):
     st.subheader("📉 Phân tán GPA vs Điểm Hạnh phúc")
-    df = pd.DataFrame({"GPA": data.get("gpa", []), "AHS": data.get("ahs", [])})
-    if df.empty:
+    fig = _fig_gpa_ahs_scatter(data)
+    if fig is None:
         return
-    fig = px.scatter(df, x="GPA", y="AHS", trendline="ols")
-    fig.update_layout(xaxis_title="GPA", yaxis_title="Điểm Hạnh phúc (AHS)", yaxis_range=[1, 5])
-    st.plotly_chart(fig, use_container_width=True)
+    plotly_chart(fig, use_container_width=True)
 
 
-def _render_correlation_heatmap(data):
-    st.subheader("🔥 Heatmap Tương quan")
+@cached_figure
+def _fig_correlation_heatmap(data):
     cols = data.get("columns", [])
     matrix = data.get("matrix", [])
     if not cols or not matrix:
-        return
+        return None
     fig = go.Figure(data=go.Heatmap(z=matrix, x=cols, y=cols, colorscale="RdBu", zmid=0))
     fig.update_layout(height=500)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_response_trend(data):
+@profiled
+def _render_correlation_heatmap(data):
+    st.subheader("🔥 Heatmap Tương quan")
+    fig = _fig_correlation_heatmap(data)
+    if fig is None:
+        return
+    plotly_chart(fig, use_container_width=True)
+
+
+@cached_figure
+def _fig_item_total(factors):
+    rows = [
+        {"Câu hỏi": item, "Nhân tố": _RELIABILITY_LABELS.get(factor, factor), "r": r}
+        for factor, stats in factors.items()
+        for item, r in stats.get("items", {}).items()
+        if r is not None
+    ]
+    if not rows:
+        return None
+    fig = px.bar(pd.DataFrame(rows), x="r", y="Câu hỏi", color="Nhân tố", orientation="h")
+    fig.add_vline(x=Config.RELIABILITY_ITEM_TOTAL_MIN, line_dash="dash", line_color="red")
+    fig.update_layout(xaxis_title="Tương quan biến-tổng (hiệu chỉnh)", yaxis_title=None, xaxis_range=[-0.2, 1], height=500)
+    return fig
+
+
+@profiled
+def _render_reliability(data):
+    st.subheader("🧮 Độ tin cậy thang đo (Cronbach's alpha)")
+    factors = data.get("factors", {})
+    alpha = pd.DataFrame({"Tất cả": {f: v["alpha"] for f, v in factors.items()}, **data.get("alpha_by_major", {})})
+    if alpha.empty:
+        return
+    alpha.index = [_RELIABILITY_LABELS.get(f, f) for f in alpha.index]
+    st.dataframe(alpha, use_container_width=True)
+    st.caption(
+        f"Alpha ≥ {Config.RELIABILITY_ALPHA_ACCEPTABLE} là chấp nhận được; ô trống khi nhóm có dưới "
+        f"{Config.RELIABILITY_MIN_ROWS} phản hồi. Câu có tương quan biến-tổng dưới "
+        f"{Config.RELIABILITY_ITEM_TOTAL_MIN} (vạch đỏ) ít gắn kết với các câu còn lại trong nhóm."
+    )
+    fig = _fig_item_total(factors)
+    if fig is not None:
+        plotly_chart(fig, use_container_width=True)
+
+
+@cached_figure
+def _fig_response_trend(data):
     df = pd.DataFrame(data)
     if df.empty or 'date' not in df.columns:
-        return
+        return None
     fig = px.line(df, x="date", y="count", markers=True)
     fig.update_layout(xaxis_title="Ngày", yaxis_title="Số phản hồi")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
 
 
-def _render_word_cloud_bar(data):
-    st.subheader("💭 Top từ khóa trong Điều ước")
-    if not data:
+@profiled
+def _render_response_trend(data):
+    fig = _fig_response_trend(data)
+    if fig is None:
         return
+    plotly_chart(fig, use_container_width=True)
+
+
+@cached_figure
+def _fig_word_cloud_bar(data):
     df = pd.DataFrame(list(data.items()), columns=["Từ", "Số lần"])
     fig = px.bar(df, x="Từ", y="Số lần")
     fig.update_layout(xaxis_tickangle=-45, showlegend=False)
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+@profiled
+def _render_word_cloud_bar(data):
+    st.subheader("💭 Top từ khóa trong Điều ước")
+    if not data:
+        return
+    plotly_chart(_fig_word_cloud_bar(data), use_container_width=True)
 
 
+@profiled
+def _render_word_cloud(wordcloud, fallback_counts=None):
+    """Word cloud PNG do tiến trình nền vẽ; chưa có ảnh thì hiện placeholder và tự kiểm tra lại."""
+    st.subheader("💭 Đám mây 'Điều ước'")
+    if not wordcloud["words"]:
+        st.info("Không có điều ước nào để hiển thị.")
+        return
+    cache, version, segment = wordcloud["cache"], wordcloud["version"], wordcloud["segment"]
+    path = cache.request(version, segment, wordcloud["words"])
+    if path is not None:
+        st.image(str(path), use_container_width=True)
+    elif cache.status(version, segment) == FAILED:
+        if fallback_counts:
+            plotly_chart(_fig_word_cloud_bar(fallback_counts), use_container_width=True)
+    else:
+        _word_cloud_placeholder(cache, version, segment)
+
+
+@st.fragment(run_every=Config.WORDCLOUD_POLL_SECONDS)
+def _word_cloud_placeholder(cache, version, segment):
+    # Chỉ fragment này chạy lại định kỳ; khi ảnh sẵn sàng thì rerun cả trang để hiển thị ảnh
+    if cache.status(version, segment) in (READY, FAILED):
+        st.rerun()
+    st.info("⏳ Đang vẽ word cloud cho bộ lọc này...")
+
+
+@st.fragment(run_every=Config.ANALYSIS_POLL_SECONDS)
+def _analysis_placeholder(executor, job):
+    # Như word cloud: chỉ fragment này chạy lại định kỳ, khi phân tích nền xong thì rerun cả trang
+    if executor.status(*job) != PENDING:
+        st.rerun()
+    st.info("⏳ Đang phân tích chi tiết cho bộ lọc này (từ khóa, tương quan, độ tin cậy)... Biểu đồ sẽ tự cập nhật.")
+
+
+@profiled
 def _render_feedback_stream(filtered_data):
     """Luồng Phản hồi Trực tiếp – bảng phản hồi chi tiết có tìm kiếm."""
     if filtered_data.empty or "wish" not in filtered_data.columns:
@@ -222,21 +491,31 @@ def _render_feedback_stream(filtered_data):
         key="feedback_search"
     )
     feedback_data = filtered_data[["major", "semester", "wish", "wishSent", "wishCat"]].copy()
-    feedback_data["Sinh viên"] = feedback_data["major"] + " / Kỳ " + feedback_data["semester"].astype(str)
+    # Kỳ học bị ẩn (None) khi ô nhóm ngành × kỳ quá nhỏ (src/analytics/privacy.py)
+    semester = feedback_data["semester"]
+    feedback_data["Sinh viên"] = feedback_data["major"].where(
+        semester.isna(), feedback_data["major"] + " / Kỳ " + semester.astype(str)
+    )
     feedback_data.rename(columns={"wish": "Phản hồi", "wishSent": "Sắc thái", "wishCat": "Chủ đề"}, inplace=True)
     display_cols = ["Sinh viên", "Phản hồi", "Sắc thái", "Chủ đề"]
     if search_query:
-        feedback_data = feedback_data[feedback_data["Phản hồi"].str.contains(search_query, case=False, na=False)]
+        feedback_data = feedback_data[contains(feedback_data["Phản hồi"], search_query)]
     st.dataframe(feedback_data[display_cols], use_container_width=True, height=400)
 
 
-def _render_likert_stacked(data):
-    st.subheader("📊 Phân phối mức độ Hạnh phúc (Likert)")
-    if not data:
-        return
+@cached_figure
+def _fig_likert_stacked(data):
     df = pd.DataFrame(data)
     label_map = {1: "Hoàn toàn không đồng ý", 2: "Không đồng ý", 3: "Trung lập", 4: "Đồng ý", 5: "Hoàn toàn đồng ý"}
     df["Mức độ"] = df["level"].map(label_map)
     fig = px.bar(df, x="variable", y="count", color="Mức độ", barmode="stack")
     fig.update_layout(xaxis_title="Chỉ số", yaxis_title="Số lượng")
-    st.plotly_chart(fig, use_container_width=True)
+    return fig
+
+
+@profiled
+def _render_likert_stacked(data):
+    st.subheader("📊 Phân phối mức độ Hạnh phúc (Likert)")
+    if not data:
+        return
+    plotly_chart(_fig_likert_stacked(data), use_container_width=True)
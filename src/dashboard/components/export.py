@@ -0,0 +1,64 @@
+from urllib.parse import urlencode
+
+import numpy as np
+import streamlit as st
+
+from src.config import Config
+from src.etl.export import FORMATS, export_file_name, iter_export
+
+_LABELS = {"csv": "⬇️ CSV", "parquet": "⬇️ Parquet"}
+
+
+def _deferred(dataset, positions, fmt):
+    # Chỉ chạy khi người dùng bấm tải (thread riêng của Streamlit, không chặn script);
+    # dữ liệu được đọc và mã hóa theo từng khối từ frame mmap dùng chung
+    return lambda: b"".join(iter_export(dataset, positions, fmt))
+
+
+def _api_url(fmt, major, semester, waves):
+    """Link tải qua endpoint stream /api/export của HTTP API (src/api/server.py)."""
+    base = Config.EXPORT_API_BASE_URL
+    query = {"format": fmt, "major": major, "semester": semester}
+    if waves:
+        query["waves"] = ",".join(waves)
+    return f"{base.rstrip('/')}/api/export?{urlencode(query)}"
+
+
+def render_export(dataset, mask, major="all", semester="all", waves=(), protected=False):
+    """
+    Nút tải các dòng đang lọc (đã ẩn danh) trong sidebar; tắt khi phân khúc dưới k phản hồi.
+    Lát cắt lớn hơn Config.EXPORT_INLINE_MAX_ROWS dòng được tải qua /api/export (stream theo
+    khối) thay vì dựng cả file trong tiến trình Streamlit, nhưng chỉ khi đã cấu hình
+    Config.EXPORT_API_BASE_URL (địa chỉ trình duyệt của người xem truy cập được); nếu chưa thì
+    vẫn tải trong tiến trình như lát cắt nhỏ.
+    """
+    positions = np.flatnonzero(np.asarray(mask))
+    large = len(positions) > Config.EXPORT_INLINE_MAX_ROWS
+    streamed = large and bool(Config.EXPORT_API_BASE_URL)
+    with st.sidebar:
+        st.write("")  # Spacer
+        st.markdown(f"**Tải dữ liệu đã lọc** ({len(positions):,} phản hồi, đã ẩn danh)")
+        for column, fmt in zip(st.columns(len(FORMATS)), FORMATS):
+            with column:
+                if streamed:
+                    st.link_button(
+                        _LABELS[fmt],
+                        _api_url(fmt, major, semester, waves),
+                        disabled=protected,
+                        width="stretch",
+                    )
+                    continue
+                st.download_button(
+                    _LABELS[fmt],
+                    data=_deferred(dataset, positions, fmt),
+                    file_name=export_file_name(fmt, major, semester, waves),
+                    mime=FORMATS[fmt],
+                    on_click="ignore",
+                    disabled=protected or not len(positions),
+                    key=f"export_{fmt}",
+                    width="stretch",
+                )
+        if streamed:
+            st.caption("Lát cắt lớn được tải trực tiếp qua HTTP API (`python -m src.api.server`).")
+        elif large:
+            st.caption("Lát cắt lớn: file được dựng khi bấm tải và có thể mất một lúc.")
@@ -0,0 +1,134 @@
+"""Đo thời gian từng bước chuẩn bị dữ liệu / từng hàm `_render_*` của Dashboard (chế độ debug)."""
+import functools
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+_DEFAULT_LOG_PATH = _PROJECT_ROOT / "logs" / "dashboard_metrics.jsonl"
+
+# Bật bằng biến môi trường DASHBOARD_PROFILE=1 hoặc checkbox trong sidebar
+PROFILE_ENV = "DASHBOARD_PROFILE"
+PROFILE_TOGGLE_KEY = "profile_toggle"
+_STATE_KEY = "_render_profiler"
+
+
+class RenderProfiler:
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.records = []
+        self._stack = []
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def section(self, name, kind="data"):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        parent = self._stack[-1] if self._stack else None
+        record = {
+            "name": name if parent is None else f"{parent['name']} › {name}",
+            "kind": kind,
+            "start_ms": (start - self._origin) * 1000,
+            "duration_ms": 0.0,
+            "payload_kb": 0.0,
+        }
+        self.records.append(record)
+        self._stack.append(record)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            record["duration_ms"] = (time.perf_counter() - start) * 1000
+
+    def add_timings(self, name, timings):
+        """Ghi lại các mốc thời gian con (giây) do hàm khác đo sẵn, ví dụ từng section của get_chart_data."""
+        if not self.enabled or not timings:
+            return
+        parent = next((r for r in reversed(self.records) if r["name"] == name), None)
+        offset = parent["start_ms"] if parent else (time.perf_counter() - self._origin) * 1000
+        for key, seconds in timings.items():
+            self.records.append({
+                "name": f"{name} › {key}",
+                "kind": "data",
+                "start_ms": offset,
+                "duration_ms": seconds * 1000,
+                "payload_kb": 0.0,
+            })
+            offset += seconds * 1000
+
+    def record_figure(self, fig):
+        if not self.enabled:
+            return
+        size_kb = len(fig.to_json()) / 1024
+        if self._stack:
+            self._stack[-1]["payload_kb"] += size_kb
+
+    def total_ms(self):
+        return (time.perf_counter() - self._origin) * 1000
+
+    def to_frame(self):
+        df = pd.DataFrame(self.records, columns=["name", "kind", "start_ms", "duration_ms", "payload_kb"])
+        return df.round({"start_ms": 1, "duration_ms": 1, "payload_kb": 1})
+
+    def append_log(self, context=None, path=None):
+        """Ghi một dòng JSON cho lần rerun này để tổng hợp qua nhiều phiên."""
+        path = Path(path or os.environ.get("DASHBOARD_METRICS_LOG", _DEFAULT_LOG_PATH))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "ts": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "context": context or {},
+            "total_ms": round(self.total_ms(), 1),
+            "records": self.to_frame().to_dict("records"),
+        }
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def render(self):
+        """Hiển thị bảng (có thể sắp xếp) và biểu đồ thác nước của lần rerun hiện tại."""
+        df = self.to_frame()
+        if df.empty:
+            return
+        with st.expander(f"🛠️ Profiling: {self.total_ms():.0f} ms cho lần chạy này", expanded=True):
+            st.dataframe(df, use_container_width=True, hide_index=True)
+            fig = px.bar(
+                df.iloc[::-1], x="duration_ms", y="name", base="start_ms", color="kind",
+                orientation="h", hover_data=["payload_kb"],
+            )
+            fig.update_layout(xaxis_title="ms kể từ đầu lần chạy", yaxis_title="", height=max(300, 22 * len(df)))
+            st.plotly_chart(fig, use_container_width=True)
+
+
+def start_profiling():
+    """Tạo profiler mới cho lần rerun hiện tại của phiên Streamlit."""
+    enabled = os.environ.get(PROFILE_ENV) == "1" or bool(st.session_state.get(PROFILE_TOGGLE_KEY, False))
+    profiler = RenderProfiler(enabled=enabled)
+    st.session_state[_STATE_KEY] = profiler
+    return profiler
+
+
+def get_profiler():
+    profiler = st.session_state.get(_STATE_KEY)
+    return profiler if profiler is not None else RenderProfiler(enabled=False)
+
+
+def profiled(func):
+    """Decorator đo thời gian một hàm render."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with get_profiler().section(func.__name__, kind="render"):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def plotly_chart(fig, **kwargs):
+    """Thay cho st.plotly_chart: ghi thêm kích thước payload của figure khi đang profiling."""
+    get_profiler().record_figure(fig)
+    return st.plotly_chart(fig, **kwargs)
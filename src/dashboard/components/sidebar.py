@@ -1,9 +1,11 @@
 import streamlit as st
 from pathlib import Path
 
+from components.profiler import PROFILE_TOGGLE_KEY
+
 _ICON_PATH = Path(__file__).resolve().parent.parent.parent / "assets" / "teamlogo.jpg"
 
-def render_sidebar(reset_filters_callback):
+def render_sidebar(reset_filters_callback, waves=None):
     """Renders the sidebar for the dashboard, including logos, titles, and filters."""
     with st.sidebar:
         if _ICON_PATH.exists():
@@ -39,7 +41,20 @@ def render_sidebar(reset_filters_callback):
             on_change=lambda: st.session_state.update(current_semester=st.session_state.semester_radio)
         )
 
+        # Survey wave filter (chỉ hiện khi kho phân vùng có từ 2 đợt trở lên)
+        if waves and len(waves) > 1:
+            st.write("") # Spacer
+            st.multiselect(
+                "**Đợt khảo sát**",
+                options=waves,
+                key="wave_select",
+                placeholder="Tất cả các đợt",
+            )
+
         st.write("") # Spacer
         st.button("Xoá bộ lọc", on_click=reset_filters_callback, use_container_width=True)
 
+        st.write("") # Spacer
+        st.checkbox("🛠️ Chế độ debug (đo thời gian render)", key=PROFILE_TOGGLE_KEY)
+
         return major_options, semester_options
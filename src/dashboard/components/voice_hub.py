@@ -3,8 +3,13 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 
-def render_voice_hub(filtered_data):
-    """Renders the student voice hub with word cloud, theme chart, and feedback stream."""
+from src.analytics.text import contains
+
+def render_voice_hub(filtered_data, keyword_index):
+    """
+    Renders the student voice hub with word cloud, theme chart, and feedback stream.
+    `keyword_index` là chỉ mục dùng chung của phiên bản dữ liệu (get_keyword_index), không tách từ lại.
+    """
     st.header("💬 Diễn đàn Tiếng nói Sinh viên")
 
     col1_ai, col2_ai = st.columns(2)
@@ -12,19 +17,13 @@ def render_voice_hub(filtered_data):
         st.subheader("💭 Đám mây 'Điều ước'")
         # Ensure 'wish' column exists and is not empty
         if "wish" in filtered_data and not filtered_data.wish.dropna().empty:
-            keywords_data = filtered_data["wish"].str.extractall(r'([A-Za-zÀ-ỹ]+)').iloc[:, 0].value_counts()
-            
-            # Filter common stopwords and short words
-            stopwords = ["và", "là", "có", "để", "cho", "hơn", "em", "mình", "của", "ạ", "rất", "mong", "trường"]
-            keywords_data = keywords_data[~keywords_data.index.isin(stopwords)]
-            keywords_data = keywords_data[keywords_data.index.str.len() > 2]
-            
-            keywords_data = keywords_data.head(15) # Limit to top 15 keywords
+            # Top 15 từ khóa / cụm từ, cùng quy tắc với báo cáo (src/analytics/keywords.py)
+            keywords_data = pd.Series(keyword_index.top_k(15, index=filtered_data.index), dtype=int)
             
             keywords = []
             if not keywords_data.empty:
                 max_size = keywords_data.max()
-                color_map = {"Deadline": "#ef4444", "Học phí": "#f59e0b", "Máy lạnh": "#3b82f6", "Giảng viên": "#10b981", "CLB": "#10b981", "LMS": "#ef4444"}
+                color_map = {"deadline": "#ef4444", "học phí": "#f59e0b", "máy lạnh": "#3b82f6", "giảng viên": "#10b981", "clb": "#10b981", "lms": "#ef4444"}
                 size_map = {5: "3.5rem", 4: "3rem", 3: "2.5rem", 2: "2rem", 1: "1.5rem"}
                 
                 for word, count in keywords_data.items():
@@ -60,6 +59,6 @@ def render_voice_hub(filtered_data):
     display_cols = ["Sinh viên", "Phản hồi", "Sắc thái", "Chủ đề AI"]
 
     if search_query:
-        feedback_data = feedback_data[feedback_data["Phản hồi"].str.contains(search_query, case=False, na=False)]
+        feedback_data = feedback_data[contains(feedback_data["Phản hồi"], search_query)]
 
     st.dataframe(feedback_data[display_cols], use_container_width=True, height=400)
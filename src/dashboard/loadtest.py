@@ -0,0 +1,218 @@
+"""
+Load-test không giao diện cho Dashboard.
+
+Mỗi phiên người dùng được mô phỏng bằng một `streamlit.testing.v1.AppTest` chạy trên một
+thread của cùng một tiến trình, giống các phiên trên một server Streamlit: st.cache_resource,
+thread theo dõi phiên bản và executor phân tích được dùng chung. Mỗi phiên mở trang, đổi bộ lọc
+ngành / giai đoạn học, mở/đóng các chương biểu đồ và gõ tìm kiếm phản hồi.
+Báo cáo p50/p95/p99 thời gian rerun, throughput, số lần trang gặp exception và bộ nhớ tiến
+trình tăng thêm (tổng và chia đều cho mỗi phiên).
+
+Ví dụ:
+    python -m src.dashboard.loadtest --sessions 8 --rows 50000 --actions 20
+    python -m src.dashboard.loadtest --baseline bench/loadtest.json --tolerance 0.25
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows không có module resource
+    resource = None
+
+_APP_PATH = Path(__file__).resolve().parent / "app.py"
+_PROJECT_ROOT = _APP_PATH.parent.parent.parent
+if str(_PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(_PROJECT_ROOT))
+
+sys.path.insert(0, str(_APP_PATH.parent))
+
+from components.charts import CHAPTERS  # noqa: E402
+from src.analytics.segments import MAJOR_KEYS, SEMESTER_KEYS  # noqa: E402
+from src.etl.synthetic import write_processed  # noqa: E402
+
+SEARCH_TERMS = ["deadline", "học phí", "wifi", "máy lạnh", "giảng viên", "câu lạc bộ", ""]
+
+
+def _rss_mb():
+    """RSS hiện tại của tiến trình (MB); không có /proc thì dùng đỉnh ru_maxrss."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is None:
+        return 0.0
+    # ru_maxrss: KB trên Linux, byte trên macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _act(at, action, rng):
+    """Đặt giá trị widget cho một thao tác; False nếu thao tác không áp dụng được lúc này."""
+    if action == "chapter":
+        key, _, _ = rng.choice(CHAPTERS)
+        toggle = at.toggle(key=f"chapter_{key}")
+        toggle.set_value(not toggle.value)
+    elif action == "major":
+        at.radio(key="major_radio").set_value(rng.choice(MAJOR_KEYS))
+    elif action == "semester":
+        at.radio(key="semester_radio").set_value(rng.choice(SEMESTER_KEYS))
+    else:
+        try:
+            at.text_input(key="feedback_search").input(rng.choice(SEARCH_TERMS))
+        except KeyError:
+            # Ô tìm kiếm chỉ xuất hiện khi chương "Tiếng nói" đang mở và bộ lọc có dữ liệu
+            return False
+    return True
+
+
+def run_session(session_id, actions, seed, timeout):
+    """
+    Chạy một phiên mô phỏng, trả về danh sách latency (ms) và số lỗi. Trang gặp exception
+    (kể cả khi widget cần thao tác biến mất vì trang dừng giữa chừng) được đếm vào `errors`
+    và phiên chạy tiếp.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed + session_id)
+    latencies = []
+    errors = 0
+
+    at = AppTest.from_file(str(_APP_PATH), default_timeout=timeout)
+    for step in range(actions + 1):
+        if step:
+            action = rng.choice(["major", "semester", "chapter", "search"])
+            try:
+                if not _act(at, action, rng):
+                    continue
+            except KeyError:
+                errors += 1  # widget không có: lần chạy trước đã dừng vì exception, chạy lại trang
+        start = time.perf_counter()
+        try:
+            at.run()
+        except Exception:  # timeout / lỗi của AppTest: ghi nhận rồi tiếp tục
+            errors += 1
+            traceback.print_exc()
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        errors += len(at.exception)
+
+    return {"session": session_id, "latencies_ms": latencies, "errors": errors}
+
+
+def summarize(results, wall_seconds, memory_mb):
+    latencies = np.concatenate([r["latencies_ms"] for r in results] + [np.zeros(0)])
+    if not latencies.size:
+        latencies = np.array([np.nan])
+    return {
+        "sessions": len(results),
+        "reruns": int(latencies.size),
+        "errors": int(sum(r["errors"] for r in results)),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 1),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 1),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 1),
+        "max_ms": round(float(latencies.max()), 1),
+        "throughput_rps": round(latencies.size / wall_seconds, 2),
+        "memory_total_mb": round(memory_mb, 1),
+        "memory_per_session_mb": round(memory_mb / max(len(results), 1), 1),
+        "wall_seconds": round(wall_seconds, 2),
+    }
+
+
+def check_regression(summary, args):
+    """Trả về danh sách lỗi nếu vượt ngưỡng (dùng làm regression gate trong CI)."""
+    failures = []
+    if summary["errors"]:
+        failures.append(f"{summary['errors']} lần rerun gặp exception")
+    if args.max_p95 and summary["p95_ms"] > args.max_p95:
+        failures.append(f"p95 {summary['p95_ms']} ms > ngưỡng {args.max_p95} ms")
+    if args.baseline and Path(args.baseline).exists() and not args.save_baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))["summary"]
+        for metric in ("p95_ms", "memory_per_session_mb"):
+            limit = baseline[metric] * (1 + args.tolerance)
+            if summary[metric] > limit:
+                failures.append(f"{metric} {summary[metric]} > baseline {baseline[metric]} (+{args.tolerance:.0%})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-session load-test cho Dashboard.")
+    parser.add_argument("--sessions", type=int, default=4, help="Số phiên chạy đồng thời")
+    parser.add_argument("--rows", type=int, default=10_000, help="Số phản hồi trong dữ liệu giả lập")
+    parser.add_argument("--actions", type=int, default=10, help="Số thao tác mỗi phiên sau lần tải đầu")
+    parser.add_argument("--data", help="Dùng file đã xử lý có sẵn thay vì sinh dữ liệu giả lập")
+    parser.add_argument("--with-snapshots", action="store_true", help="Tạo snapshot ETL cho dữ liệu giả lập trước khi chạy")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=120, help="Timeout cho mỗi rerun (giây)")
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file")
+    parser.add_argument("--max-p95", type=float, help="Thất bại nếu p95 (ms) vượt ngưỡng")
+    parser.add_argument("--baseline", help="File kết quả trước đó để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Sai lệch cho phép so với baseline")
+    parser.add_argument("--save-baseline", action="store_true", help="Ghi kết quả lần này làm baseline")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory(prefix="fpoly_loadtest_") as tmp:
+        if args.data:
+            data_path = Path(args.data).resolve()
+        else:
+            data_path = write_processed(args.rows, Path(tmp) / "fpoly_survey_processed.csv", seed=args.seed)
+            print(f"🧪 Đã sinh {args.rows} phản hồi giả lập: {data_path}")
+            if args.with_snapshots:
+                from src.etl.snapshot import SnapshotBuilder
+                SnapshotBuilder(data_path).build()
+        os.environ["FPOLY_DATA_PATH"] = str(data_path)
+
+        print(f"🚦 Chạy {args.sessions} phiên × {args.actions} thao tác...")
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        # Các phiên là thread của cùng tiến trình: một "server", cache và executor dùng chung
+        with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+            futures = [
+                pool.submit(run_session, i, args.actions, args.seed, args.timeout)
+                for i in range(args.sessions)
+            ]
+            results = []
+            for i, future in enumerate(futures):
+                try:
+                    results.append(future.result())
+                except Exception:
+                    traceback.print_exc()
+                    results.append({"session": i, "latencies_ms": [], "errors": 1})
+        wall = time.perf_counter() - start
+        memory_mb = _rss_mb() - rss_before
+
+    summary = summarize(results, wall, memory_mb)
+    summary.update({"rows": args.rows if not args.data else None, "actions": args.actions})
+    for key, value in summary.items():
+        print(f"  {key:<24} {value}")
+
+    failures = check_regression(summary, args)
+    payload = {"summary": summary, "sessions": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+    if args.baseline and args.save_baseline:
+        Path(args.baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.baseline).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+        print(f"💾 Đã lưu baseline: {args.baseline}")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ {failure}")
+        return 1
+    print("✅ Load-test đạt ngưỡng.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
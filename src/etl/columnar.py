@@ -0,0 +1,262 @@
+"""
+Bộ dữ liệu dạng cột chỉ đọc, ánh xạ bộ nhớ (mmap), dùng chung giữa các phiên Streamlit
+và các tiến trình worker.
+
+Mỗi phiên bản dữ liệu được ghi một lần vào `<processed>/columns/<phiên bản>/`:
+- cột số / bool / thời gian: một file .npy
+- cột chuỗi: byte UTF-8 nối liền + offset + bitmap null (bố cục của Arrow large_string)
+- cột chiều `dim_*` (Categorical, src/analytics/dimensions.py): mã nguyên .npy, từ điển
+  nhãn lưu trong meta.json
+
+Khi mở, các file được np.load(mmap_mode="r") và ghép thành DataFrame mà không sao chép:
+cột số là view của vùng mmap, cột chuỗi là mảng Arrow dựng trên cùng vùng nhớ. Mọi tiến
+trình mở cùng phiên bản dùng chung trang nhớ của hệ điều hành nên dữ liệu chỉ nằm trong
+RAM một lần mỗi máy; vùng nhớ chỉ đọc nên không phiên nào sửa được dữ liệu dùng chung
+(lọc / thêm cột luôn tạo bản sao riêng, chỉ bằng kích thước kết quả).
+"""
+import json
+import os
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+from src.config import Config
+
+_META_NAME = "meta.json"
+
+
+def columnar_root(processed_path) -> Path:
+    return Path(processed_path).parent / Config.COLUMNAR_DIR_NAME
+
+
+def _save(directory, name, values):
+    np.save(directory / f"{name}.npy", np.ascontiguousarray(values), allow_pickle=False)
+
+
+def _load(directory, name):
+    return np.load(directory / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+
+
+def _string_buffers(series):
+    """(validity | None, offsets int64, data uint8) của cột chuỗi theo bố cục Arrow large_string."""
+    values = series.where(series.isna(), series.astype(str))
+    array = pa.array(values.to_numpy(dtype=object), type=pa.large_string(), from_pandas=True)
+    validity, offsets, data = array.buffers()
+    n = len(array)
+    offsets = np.frombuffer(offsets, dtype=np.int64)[: n + 1]
+    data = np.frombuffer(data, dtype=np.uint8)[: offsets[-1]] if data is not None else np.zeros(0, np.uint8)
+    if validity is not None:
+        validity = np.frombuffer(validity, dtype=np.uint8)[: (n + 7) // 8]
+    return validity, offsets, data
+
+
+def write_columns(frame, directory):
+    """Ghi frame thành thư mục cột (ghi vào thư mục tạm rồi đổi tên, an toàn khi nhiều tiến trình cùng ghi)."""
+    directory = Path(directory)
+    tmp = directory.with_name(f".{directory.name}.{os.getpid()}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    meta = {"rows": len(frame), "columns": []}
+    index = frame.index
+    if isinstance(index, pd.RangeIndex):
+        meta["index"] = {"start": index.start, "step": index.step}
+    else:
+        meta["index"] = None
+        _save(tmp, "index", index.to_numpy(dtype=np.int64))
+
+    for i, (name, series) in enumerate(frame.items()):
+        key = f"c{i}"
+        column = {"name": name, "key": key}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            kind = "category"
+            _save(tmp, key, series.cat.codes.to_numpy())
+            column["categories"] = series.cat.categories.tolist()
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            kind = "datetime"
+            _save(tmp, key, series.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]").view(np.int64))
+        elif pd.api.types.is_bool_dtype(series.dtype) and not series.hasnans:
+            kind = "numeric"
+            _save(tmp, key, series.to_numpy(dtype=bool))
+        elif pd.api.types.is_numeric_dtype(series.dtype):
+            kind = "numeric"
+            if series.hasnans or isinstance(series.dtype, pd.api.extensions.ExtensionDtype):
+                _save(tmp, key, series.to_numpy(dtype=np.float64, na_value=np.nan))
+            else:
+                _save(tmp, key, series.to_numpy())
+        else:
+            kind = "string"
+            validity, offsets, data = _string_buffers(series)
+            _save(tmp, f"{key}.offsets", offsets)
+            _save(tmp, f"{key}.data", data)
+            if validity is not None:
+                _save(tmp, f"{key}.validity", validity)
+        meta["columns"].append({**column, "kind": kind})
+
+    with open(tmp / _META_NAME, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    try:
+        tmp.rename(directory)
+    except OSError:  # tiến trình khác đã ghi xong cùng phiên bản
+        shutil.rmtree(tmp, ignore_errors=True)
+    return directory
+
+
+class SharedDataset:
+    """Một phiên bản dữ liệu dạng cột đã ghi; `frame` là DataFrame chỉ đọc trên vùng mmap."""
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        # Chạm mtime khi mở: evict_versions xóa thư mục ít được dùng nhất, không phải cũ nhất
+        try:
+            os.utime(self.directory)
+        except PermissionError:  # thư mục chỉ đọc: chỉ ảnh hưởng thứ tự dọn
+            pass
+        with open(self.directory / _META_NAME, encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.rows = self.meta["rows"]
+        self.frame = self._frame()
+
+    def _column(self, column):
+        key = column["key"]
+        if column["kind"] == "datetime":
+            return _load(self.directory, key).view("datetime64[ns]")
+        if column["kind"] == "numeric":
+            return _load(self.directory, key)
+        if column["kind"] == "category":
+            return pd.Categorical.from_codes(_load(self.directory, key), categories=column["categories"])
+        offsets = _load(self.directory, f"{key}.offsets")
+        data = _load(self.directory, f"{key}.data")
+        validity = None
+        if (self.directory / f"{key}.validity.npy").exists():
+            validity = pa.py_buffer(_load(self.directory, f"{key}.validity"))
+        array = pa.LargeStringArray.from_buffers(self.rows, pa.py_buffer(offsets), pa.py_buffer(data), validity)
+        return pd.arrays.ArrowExtensionArray(array)
+
+    def _frame(self):
+        spec = self.meta["index"]
+        if spec is not None:
+            index = pd.RangeIndex(spec["start"], spec["start"] + spec["step"] * self.rows, spec["step"])
+        else:
+            index = pd.Index(_load(self.directory, "index"))
+        columns = {c["name"]: self._column(c) for c in self.meta["columns"]}
+        # copy=False: mỗi cột giữ nguyên mảng mmap của nó (không gộp thành khối 2D mới)
+        return pd.DataFrame(columns, index=index, copy=False)
+
+    def nbytes(self):
+        return sum(p.stat().st_size for p in self.directory.glob("*.npy"))
+
+
+def _waves_key(directory):
+    """Phần tổ hợp đợt khảo sát trong tên thư mục ('' cho bộ dữ liệu chính)."""
+    return directory.name.partition("__")[2]
+
+
+def evict_versions(root, keep=None, protect=()):
+    """
+    Giữ lại `keep` phiên bản dùng gần nhất (mtime được chạm khi mở) cho mỗi tổ hợp đợt khảo sát,
+    xóa các thư mục còn lại. Bộ dữ liệu chính và từng tổ hợp đợt được dọn riêng nên mở nhiều tổ
+    hợp đợt không đẩy bộ dữ liệu chính ra ngoài; thư mục trong `protect` không bao giờ bị xóa.
+    """
+    root = Path(root)
+    if not root.exists():
+        return
+    keep = keep or Config.COLUMNAR_MAX_VERSIONS
+    protect = {Path(p) for p in protect}
+    groups = {}
+    for path in root.iterdir():
+        if not path.is_dir() or path.name.startswith("."):
+            continue
+        try:
+            groups.setdefault(_waves_key(path), []).append((path.stat().st_mtime, path))
+        except FileNotFoundError:  # vừa bị tiến trình khác xóa
+            continue
+    for versions in groups.values():
+        versions.sort(reverse=True)
+        for _, old in versions[keep:]:
+            if old not in protect:
+                shutil.rmtree(old, ignore_errors=True)
+
+
+def load_processed(processed_path, waves=()):
+    """
+    Frame đầy đủ cho phân tích: file đã xử lý (hoặc các đợt `waves` trong kho phân vùng),
+    kèm nhãn điều ước (phân loại tại chỗ nếu file từ phiên bản ETL cũ), cột phân khúc và các
+    cột chiều mã hóa từ điển `dim_*`.
+    """
+    from src.analytics.dimensions import add_dimension_columns
+    from src.analytics.segments import add_segment_columns
+    from src.etl.store import PartitionedStore, store_root
+    from src.etl.wish_classifier import add_wish_labels
+
+    if waves:
+        frame = PartitionedStore(store_root(processed_path)).read(waves=list(waves))
+    else:
+        frame = pd.read_csv(processed_path)
+    if not {"wish_category", "wish_sentiment", "retention_risk"}.issubset(frame.columns):
+        frame = add_wish_labels(frame)
+    return add_dimension_columns(add_segment_columns(frame))
+
+
+class StaleVersionError(RuntimeError):
+    """Dữ liệu nguồn đã đổi so với phiên bản được yêu cầu: không được ghi nội dung mới dưới nhãn cũ."""
+
+
+def current_version(processed_path, waves=()):
+    """Phiên bản hiện tại của nguồn: kho phân vùng khi chọn đợt `waves`, ngược lại là file đã xử lý."""
+    if waves:
+        from src.etl.store import PartitionedStore, store_root
+        return PartitionedStore(store_root(processed_path)).version()
+    from src.etl.snapshot import data_version  # import muộn: snapshot -> analyzer -> ...
+    return data_version(processed_path)
+
+
+def shared_dataset(processed_path, version=None, waves=()):
+    """
+    Mở bộ dữ liệu dạng cột của phiên bản `version` (mặc định: phiên bản của file đã xử lý)
+    và các đợt `waves`; lần đầu ghi từ load_processed().
+
+    ETL có thể ghi file mới giữa lúc tính phiên bản và lúc đọc dữ liệu, nên phiên bản nguồn
+    được kiểm tra lại trước và sau khi đọc; lệch thì ném StaleVersionError thay vì ghi dữ liệu
+    mới vào thư mục mang nhãn cũ. write_columns ghi vào thư mục tạm rồi mới đổi tên.
+    """
+    if version is None:
+        version = current_version(processed_path, waves)
+    directory = dataset_directory(processed_path, version, waves)
+    for attempt in range(2):
+        if not (directory / _META_NAME).exists():
+            _check_version(processed_path, version, waves)
+            frame = load_processed(processed_path, waves)
+            _check_version(processed_path, version, waves)
+            write_columns(frame, directory)
+            evict_versions(directory.parent, protect=_current_directories(processed_path, directory))
+        try:
+            return SharedDataset(directory)
+        except FileNotFoundError:  # bị dọn giữa lúc đọc meta và np.load: ghi lại một lần
+            if attempt:
+                raise
+
+
+def _current_directories(processed_path, directory):
+    """Thư mục vừa mở và bộ dữ liệu chính của phiên bản hiện tại: không được dọn."""
+    try:
+        return {directory, dataset_directory(processed_path)}
+    except FileNotFoundError:
+        return {directory}
+
+
+def _check_version(processed_path, version, waves):
+    current = current_version(processed_path, waves)
+    if current != version:
+        raise StaleVersionError(f"Dữ liệu đã đổi: yêu cầu phiên bản {version}, hiện tại {current}")
+
+
+def dataset_directory(processed_path, version=None, waves=()) -> Path:
+    """Thư mục của bộ dữ liệu dạng cột phiên bản `version` (mặc định: phiên bản hiện tại của nguồn)."""
+    if version is None:
+        version = current_version(processed_path, waves)
+    # Tên thư mục gồm phiên bản định dạng: đổi bố cục cột thì các bản ghi cũ tự bị bỏ qua / dọn
+    return columnar_root(processed_path) / "__".join([f"v{Config.COLUMNAR_FORMAT_VERSION}-{version}", *waves])
@@ -0,0 +1,191 @@
+"""
+Xuất các dòng phản hồi đã lọc (đã ẩn danh) ra CSV / Parquet theo luồng.
+
+Đọc thẳng từ bộ dữ liệu dạng cột mmap (src/etl/columnar.py): bộ lọc ngành × giai đoạn
+học chỉ tạo mảng vị trí dòng (np.flatnonzero của mask), rồi mỗi lần chỉ lấy
+`Config.EXPORT_CHUNK_ROWS` dòng của các cột được xuất, ẩn danh và mã hóa khối đó. Bộ
+nhớ dùng tối đa cỡ một khối dù xuất hàng triệu dòng; byte đầu tiên (BOM + header CSV)
+được trả ra trước khi đọc dòng dữ liệu nào.
+
+Ẩn danh: bỏ các cột trong Config.EXPORT_DROP_COLUMNS (câu trả lời tự do có thể chứa tên
+riêng, cột rác "Column N"), cột mã hóa nội bộ `dim_*` và index gốc; thời gian nộp bài
+chỉ giữ đến Config.EXPORT_TIMESTAMP_UNIT.
+
+Ví dụ:
+    python -m src.etl.export --major IT --semester senior -o it_senior.csv
+    python -m src.etl.export --format parquet --waves 2025-FA,2026-SP -o waves.parquet
+    python -m src.etl.export --major Biz > biz.csv
+"""
+import argparse
+import re
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from src.analytics.dimensions import PREFIX as DIMENSION_PREFIX
+from src.analytics.segments import MAJOR_KEYS, SEMESTER_KEYS, segment_mask
+from src.config import Config
+from src.etl.columnar import shared_dataset
+from src.etl.store import PartitionedStore, store_root
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_DATA_PATH = _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"
+
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+_JUNK_COLUMN = re.compile(r"^(Column \d+|Unnamed: \d+)$")
+
+
+# ==================== CHỌN DÒNG / CỘT ====================
+def export_rows(frame, major="all", semester="all"):
+    """Vị trí (iloc) các dòng thuộc phân khúc, theo thứ tự trong frame."""
+    return np.flatnonzero(segment_mask(frame, major, semester).to_numpy())
+
+
+def export_columns(frame):
+    """Các cột được phép xuất (đã bỏ cột định danh / nội bộ)."""
+    return [
+        c for c in frame.columns
+        if c not in Config.EXPORT_DROP_COLUMNS and not c.startswith(DIMENSION_PREFIX) and not _JUNK_COLUMN.match(c)
+    ]
+
+
+def anonymize(chunk):
+    """Ẩn danh một khối dòng: thời gian nộp bài làm tròn xuống theo Config.EXPORT_TIMESTAMP_UNIT."""
+    if "timestamp" in chunk.columns:
+        chunk["timestamp"] = pd.to_datetime(chunk["timestamp"], errors="coerce").dt.floor(Config.EXPORT_TIMESTAMP_UNIT)
+    return chunk
+
+
+def iter_chunks(frame, positions, columns=None, chunk_rows=None):
+    """Các DataFrame con (index 0..n-1 liên tục) gồm `chunk_rows` dòng đã ẩn danh."""
+    columns = export_columns(frame) if columns is None else columns
+    chunk_rows = chunk_rows or Config.EXPORT_CHUNK_ROWS
+    for start in range(0, len(positions), chunk_rows):
+        rows = positions[start:start + chunk_rows]
+        # take riêng từng cột mmap: frame[columns] / frame.iloc[rows, columns] chép toàn bộ các cột
+        chunk = pd.DataFrame({c: frame[c].array.take(rows) for c in columns})
+        yield anonymize(chunk)
+
+
+# ==================== MÃ HÓA THEO LUỒNG ====================
+def iter_csv(frame, positions, chunk_rows=None):
+    """Các khối byte của file CSV UTF-8 (có BOM như file đã xử lý, Excel đọc đúng tiếng Việt)."""
+    columns = export_columns(frame)
+    yield "\ufeff".encode("utf-8") + pd.DataFrame(columns=columns).to_csv(index=False).encode("utf-8")
+    for chunk in iter_chunks(frame, positions, columns, chunk_rows):
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+
+class _ChunkSink:
+    """File chỉ ghi mà ParquetWriter ghi vào; phần byte đã ghi được lấy ra sau mỗi row group."""
+
+    def __init__(self):
+        self._parts = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _arrow_schema(frame, columns):
+    """Schema cố định cho mọi row group (cột chuỗi toàn null ở khối đầu không bị suy ra kiểu null)."""
+    sample = next(iter_chunks(frame, np.arange(min(len(frame), Config.EXPORT_CHUNK_ROWS)), columns), None)
+    if sample is None:
+        sample = pd.DataFrame({c: frame[c].iloc[:0] for c in columns})
+    schema = pa.Schema.from_pandas(sample, preserve_index=False)
+    for i, field in enumerate(schema):
+        if pa.types.is_null(field.type):
+            schema = schema.set(i, field.with_type(pa.string()))
+    return schema.remove_metadata()
+
+
+def iter_parquet(frame, positions, chunk_rows=None):
+    """Các khối byte của file Parquet; mỗi khối dòng là một row group được gửi ngay khi ghi xong."""
+    columns = export_columns(frame)
+    schema = _arrow_schema(frame, columns)
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, schema, compression="zstd") as writer:
+        yield sink.drain()  # magic bytes "PAR1"
+        for chunk in iter_chunks(frame, positions, columns, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()  # footer
+
+
+def iter_export(frame, positions, fmt="csv", chunk_rows=None):
+    """Luồng byte của bản xuất `fmt` ('csv' | 'parquet') gồm các dòng `positions` (xem export_rows)."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Định dạng xuất không hợp lệ: {fmt!r} (chỉ nhận {', '.join(FORMATS)}).")
+    encode = iter_csv if fmt == "csv" else iter_parquet
+    return (data for data in encode(frame, positions, chunk_rows) if data)
+
+
+def export_file_name(fmt, major="all", semester="all", waves=()):
+    return f"fpoly_survey_{'__'.join([major, semester, *waves])}.{fmt}"
+
+
+# ==================== CLI ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Xuất các dòng phản hồi đã lọc (ẩn danh) ra CSV / Parquet.")
+    parser.add_argument("--data", default=str(DEFAULT_DATA_PATH), help="File dữ liệu đã xử lý")
+    parser.add_argument("--major", default="all", choices=MAJOR_KEYS)
+    parser.add_argument("--semester", default="all", choices=SEMESTER_KEYS)
+    parser.add_argument("--waves", default="", help="Các đợt khảo sát, cách nhau bởi dấu phẩy (cần kho phân vùng)")
+    parser.add_argument("--format", default=None, choices=list(FORMATS),
+                        help="Mặc định theo đuôi file của --output, hoặc csv")
+    parser.add_argument("-o", "--output", default="-", help="File đích ('-' = stdout)")
+    parser.add_argument("--chunk-rows", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    suffix = Path(args.output).suffix.lstrip(".")
+    fmt = args.format or (suffix if suffix in FORMATS else "csv")
+    waves = tuple(sorted({w for w in args.waves.split(",") if w}))
+    version = None
+    if waves:
+        store = PartitionedStore(store_root(args.data))
+        unknown = sorted(set(waves) - set(store.waves() if store.exists() else []))
+        if unknown:
+            print(f"❌ Đợt khảo sát không tồn tại: {', '.join(unknown)}", file=sys.stderr)
+            return 1
+        version = store.version()
+    frame = shared_dataset(args.data, version, waves).frame
+
+    positions = export_rows(frame, args.major, args.semester)
+    stream = iter_export(frame, positions, fmt, args.chunk_rows)
+    if args.output == "-":
+        for data in stream:
+            sys.stdout.buffer.write(data)
+        sys.stdout.buffer.flush()
+    else:
+        with open(args.output, "wb") as f:
+            for data in stream:
+                f.write(data)
+        print(f"💾 Đã xuất {len(positions)} dòng ({fmt}) -> {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,427 @@
+"""
+Chạy pipeline ETL → phân tích → snapshot dưới dạng DAG các stage, có cache theo nội dung.
+
+Mỗi stage (làm sạch, chỉ mục từ khóa, bộ dữ liệu dạng cột, kho phân vùng, report,
+snapshot) được lưu tại `data/processed/pipeline_cache/<stage>/<khóa>/` với khóa là
+SHA-256 của:
+- đầu vào: nội dung file thô (stage `clean`) hoặc digest đầu ra của các stage phụ thuộc
+- phiên bản mã: nội dung các module của stage và các module `src.*` chúng import ở cấp module
+- các mục Config liên quan: những `Config.XXX` được nhắc tới trong các module đó
+
+Stage có khóa trùng với một lần chạy trước (và sản phẩm của nó còn trên đĩa) được bỏ qua,
+nên đổi một hằng số Config hay một method của analyzer chỉ chạy lại các stage dùng tới nó.
+Digest đầu ra của `clean` là hash nội dung file đã xử lý: ETL chạy lại mà ra cùng dữ liệu
+thì các stage sau vẫn trúng cache. Các stage độc lập chạy song song trên một thread pool.
+
+Ví dụ:
+    python -m src.etl.pipeline --raw data/raw/fpoly_survey.csv
+    python -m src.etl.pipeline --from-processed --stages report
+    python -m src.etl.pipeline --force keywords --json
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import traceback
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+import pandas as pd
+
+from src.analytics.analyzer import DataAnalyzer
+from src.analytics.keywords import keyword_index_path, load_or_build
+from src.config import Config
+from src.etl.columnar import dataset_directory, shared_dataset
+from src.etl.processor import DataProcessor
+from src.etl.snapshot import SnapshotBuilder, _to_builtin, snapshot_root
+from src.etl.store import PartitionedStore, store_root
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_RAW_PATH = _PROJECT_ROOT / "data" / "raw" / "fpoly_survey.csv"
+DEFAULT_DATA_PATH = _PROJECT_ROOT / "data" / "processed" / "fpoly_survey_processed.csv"
+_STOPWORDS_FILE = "docs/vietnamese_stopwords.txt"
+
+CLEAN_FILE_NAME = "processed.csv"
+REPORT_FILE_NAME = "report.json"
+_META_NAME = "meta.json"
+_OWNERS_NAME = "owners.json"
+
+# run(pipeline, entry_dir) -> dict đầu ra (JSON) | restore(pipeline, entry_dir, output) -> True nếu sản phẩm còn dùng được.
+# Đầu ra có "path" là sản phẩm ghi ngoài cache (đặt tên theo phiên bản dữ liệu, không theo khóa): chỉ trúng
+# cache khi lần ghi gần nhất vào path đó là của chính khóa này (owners.json của stage)
+Stage = namedtuple("Stage", ["name", "deps", "modules", "files", "run", "restore"])
+# status: "hit" (cache), "run", "input" (file đã xử lý có sẵn), "failed", "skipped" (stage phụ thuộc lỗi)
+StageResult = namedtuple("StageResult", ["name", "status", "key", "seconds", "output"])
+
+_TOP_LEVEL_IMPORT = re.compile(r"^(?:from|import)\s+(src(?:\.\w+)+)", re.MULTILINE)
+_CONFIG_REF = re.compile(r"\bConfig\.([A-Z][A-Z0-9_]*)")
+
+
+# ==================== FINGERPRINT ====================
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _module_path(name) -> Path:
+    path = _PROJECT_ROOT.joinpath(*name.split("."))
+    return path / "__init__.py" if path.is_dir() else path.with_suffix(".py")
+
+
+def module_closure(modules):
+    """{tên module: mã nguồn} của `modules` và các module src.* chúng import ở cấp module (trừ src.config)."""
+    sources, queue = {}, list(modules)
+    while queue:
+        name = queue.pop()
+        if name in sources or name == "src.config":
+            continue
+        sources[name] = _module_path(name).read_text(encoding="utf-8")
+        queue.extend(_TOP_LEVEL_IMPORT.findall(sources[name]))
+    return dict(sorted(sources.items()))
+
+
+def config_section(sources):
+    """Các giá trị Config được nhắc tới trong mã nguồn của stage (Config tách khỏi phiên bản mã)."""
+    names = sorted({name for source in sources.values() for name in _CONFIG_REF.findall(source)})
+    return {name: getattr(Config, name) for name in names if hasattr(Config, name)}
+
+
+def stage_key(stage, inputs):
+    """Khóa cache của stage = hash(đầu vào, phiên bản mã, mục Config liên quan)."""
+    sources = module_closure(stage.modules)
+    code = hashlib.sha256()
+    for name, source in sources.items():
+        code.update(name.encode() + b"\0" + source.encode("utf-8") + b"\0")
+    for name in stage.files:
+        code.update(name.encode() + b"\0" + (_PROJECT_ROOT / name).read_bytes() + b"\0")
+    payload = {
+        "stage": stage.name,
+        "inputs": inputs,
+        "code": code.hexdigest(),
+        "config": config_section(sources),
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=repr)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+# ==================== CÁC STAGE ====================
+def _publish(source, target, digest=None):
+    """Chép `source` sang `target` (thay nguyên khối); bỏ qua nếu nội dung đã giống hệt."""
+    target = Path(target)
+    if target.exists() and file_digest(target) == (digest or file_digest(source)):
+        return False  # giữ nguyên mtime: watcher / data_version không phải băm lại
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    shutil.copyfile(source, tmp)
+    os.replace(tmp, target)
+    print(f"📂 Đã cập nhật file đã xử lý: {target}")
+    return True
+
+
+def _run_clean(pipeline, entry):
+    data = DataProcessor(pipeline.raw_path).clean()
+    cached = entry / CLEAN_FILE_NAME
+    data.to_csv(cached, index=False, encoding="utf-8-sig")  # cùng định dạng với DataProcessor.save_data
+    _publish(cached, pipeline.output_path)
+    return {"digest": file_digest(cached), "rows": int(len(data))}
+
+
+def _restore_clean(pipeline, entry, output):
+    cached = entry / CLEAN_FILE_NAME
+    if not cached.exists():
+        return False
+    _publish(cached, pipeline.output_path, output["digest"])
+    return True
+
+
+def _run_keywords(pipeline, entry):
+    path = keyword_index_path(pipeline.output_path)
+    path.unlink(missing_ok=True)  # mã / Config đổi: dựng lại dù phiên bản dữ liệu không đổi
+    index = load_or_build(pipeline.output_path)
+    return {"path": str(path), "terms": int(len(index.vocab))}
+
+
+def _run_columns(pipeline, entry):
+    directory = dataset_directory(pipeline.output_path)
+    shutil.rmtree(directory, ignore_errors=True)
+    dataset = shared_dataset(pipeline.output_path)
+    return {"path": str(directory), "rows": int(len(dataset.frame))}
+
+
+def _restore_path(pipeline, entry, output):
+    return Path(output["path"]).exists()
+
+
+def _run_store(pipeline, entry):
+    root = store_root(pipeline.output_path)
+    manifest = PartitionedStore(root).write(pd.read_csv(pipeline.output_path))
+    return {"path": str(root), "store_version": manifest["version"]}
+
+
+def _restore_store(pipeline, entry, output):
+    # Kho là ghi thêm: lần ghi khác (cơ sở / đợt khác) đổi version thì ghi lại các phân vùng của lô này
+    store = PartitionedStore(store_root(pipeline.output_path))
+    return store.exists() and store.version() == output["store_version"]
+
+
+def _run_report(pipeline, entry):
+    report = DataAnalyzer(file_path=pipeline.output_path).analysis()
+    with open(entry / REPORT_FILE_NAME, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2, default=_to_builtin)
+    return {"sections": len(report)}
+
+
+def _restore_report(pipeline, entry, output):
+    return (entry / REPORT_FILE_NAME).exists()
+
+
+def _run_snapshots(pipeline, entry):
+    manifest = SnapshotBuilder(pipeline.output_path, max_workers=pipeline.snapshot_workers).build()
+    directory = snapshot_root(pipeline.output_path) / manifest["data_version"]
+    return {"path": str(directory), "segments": len(manifest["segments"])}
+
+
+def _restore_snapshots(pipeline, entry, output):
+    return (Path(output["path"]) / "manifest.json").exists()
+
+
+STAGES = (
+    Stage("clean", (), ("src.etl.processor",), (), _run_clean, _restore_clean),
+    Stage("keywords", ("clean",), ("src.analytics.keywords",), (_STOPWORDS_FILE,), _run_keywords, _restore_path),
+    Stage("columns", ("clean",),
+          ("src.etl.columnar", "src.analytics.dimensions", "src.analytics.segments", "src.etl.wish_classifier"),
+          (), _run_columns, _restore_path),
+    Stage("store", ("clean",), ("src.etl.store",), (), _run_store, _restore_store),
+    Stage("report", ("clean",), ("src.analytics.analyzer",), (_STOPWORDS_FILE,), _run_report, _restore_report),
+    # Snapshot đọc chỉ mục từ khóa của phiên bản dữ liệu nên chạy sau stage keywords
+    Stage("snapshots", ("clean", "keywords"), ("src.etl.snapshot",), (_STOPWORDS_FILE,),
+          _run_snapshots, _restore_snapshots),
+)
+
+
+# ==================== RUNNER ====================
+class Pipeline:
+    def __init__(self, raw_path=None, output_path=None, stages=STAGES, max_workers=None,
+                 force=(), snapshot_workers=None, cache_dir=None):
+        """
+        `raw_path=None`: dùng file đã xử lý có sẵn làm đầu vào (bỏ qua stage clean).
+        `force`: tên các stage luôn chạy lại ('all' = mọi stage).
+        """
+        self.raw_path = Path(raw_path) if raw_path else None
+        self.output_path = Path(output_path or DEFAULT_DATA_PATH).resolve()
+        self.stages = {stage.name: stage for stage in stages}
+        self.max_workers = max_workers or Config.PIPELINE_MAX_WORKERS
+        self.force = set(force)
+        self.snapshot_workers = snapshot_workers
+        self.cache_dir = Path(cache_dir) if cache_dir else self.output_path.parent / Config.PIPELINE_DIR_NAME
+
+    def _select(self, targets):
+        """Các stage cần cho `targets` (kèm mọi stage phụ thuộc), theo thứ tự khai báo."""
+        if not targets:
+            return list(self.stages.values())
+        unknown = sorted(set(targets) - set(self.stages))
+        if unknown:
+            raise ValueError(f"Stage không tồn tại: {', '.join(unknown)} (chỉ có {', '.join(self.stages)}).")
+        needed, queue = set(), list(targets)
+        while queue:
+            name = queue.pop()
+            if name not in needed:
+                needed.add(name)
+                queue.extend(self.stages[name].deps)
+        return [stage for name, stage in self.stages.items() if name in needed]
+
+    def entry_dir(self, name, key) -> Path:
+        return self.cache_dir / name / key[:16]
+
+    def _owners(self, name):
+        path = self.cache_dir / name / _OWNERS_NAME
+        if not path.exists():
+            return {}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def _set_owner(self, name, artifact, key):
+        owners = self._owners(name)
+        owners[artifact] = key
+        path = self.cache_dir / name / _OWNERS_NAME
+        tmp = path.with_name(f".{_OWNERS_NAME}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(owners, f, indent=2)
+        tmp.replace(path)
+
+    def _inputs(self, stage, results):
+        if stage.deps:
+            return {dep: results[dep].output["digest"] for dep in stage.deps}
+        return {"raw": file_digest(self.raw_path)}
+
+    def _cached(self, stage, key, entry):
+        """Đầu ra đã cache của khóa `key` nếu còn dùng được, ngược lại None (cache hỏng / thiếu coi như miss)."""
+        try:
+            with open(entry / _META_NAME, encoding="utf-8") as f:
+                output = json.load(f)["output"]
+            if "path" in output and self._owners(stage.name).get(output["path"]) != key:
+                return None
+            return output if stage.restore(self, entry, output) else None
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def _execute(self, stage, inputs):
+        start = time.perf_counter()
+        key = stage_key(stage, inputs)
+        entry = self.entry_dir(stage.name, key)
+        forced = "all" in self.force or stage.name in self.force
+        try:
+            output = None if forced else self._cached(stage, key, entry)
+            if output is not None:
+                os.utime(entry)  # dọn cache theo lần dùng gần nhất
+                return StageResult(stage.name, "hit", key, time.perf_counter() - start, output)
+
+            tmp = entry.with_name(f".{entry.name}.{os.getpid()}.tmp")
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir(parents=True)
+            output = stage.run(self, tmp)
+            output.setdefault("digest", key)  # stage ghi ra ngoài cache: đầu ra đổi khi khóa đổi
+            seconds = time.perf_counter() - start
+            meta = {
+                "stage": stage.name,
+                "key": key,
+                "inputs": inputs,
+                "config": sorted(config_section(module_closure(stage.modules))),
+                "output": output,
+                "seconds": round(seconds, 3),
+                "created_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+            }
+            with open(tmp / _META_NAME, "w", encoding="utf-8") as f:
+                json.dump(meta, f, ensure_ascii=False, indent=2)
+            shutil.rmtree(entry, ignore_errors=True)
+            tmp.rename(entry)
+            if "path" in output:
+                self._set_owner(stage.name, output["path"], key)
+            self._evict(stage.name)
+            return StageResult(stage.name, "run", key, seconds, output)
+        except Exception:
+            traceback.print_exc()
+            return StageResult(stage.name, "failed", key, time.perf_counter() - start, None)
+
+    def _evict(self, name):
+        """Mỗi stage chỉ giữ Config.PIPELINE_MAX_ENTRIES bản cache dùng gần nhất."""
+        entries = sorted(
+            (p for p in (self.cache_dir / name).iterdir() if p.is_dir() and not p.name.startswith(".")),
+            key=lambda p: p.stat().st_mtime, reverse=True,
+        )
+        for old in entries[Config.PIPELINE_MAX_ENTRIES:]:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def run(self, targets=None):
+        """Chạy các stage cần cho `targets` (mặc định: tất cả); trả về {stage: StageResult}."""
+        selected = self._select(targets)
+        results = {}
+        if self.raw_path is None and "clean" in self.stages:
+            # Không có file thô: file đã xử lý hiện tại chính là đầu ra của stage clean
+            results["clean"] = StageResult("clean", "input", None, 0.0, {"digest": file_digest(self.output_path)})
+            selected = [stage for stage in selected if stage.name != "clean"]
+
+        print(f"🧩 Pipeline: {len(selected)} stage, {self.max_workers} luồng (cache: {self.cache_dir})")
+        start = time.perf_counter()
+        pending, running = list(selected), {}
+        with ThreadPoolExecutor(self.max_workers, thread_name_prefix="pipeline") as pool:
+            while pending or running:
+                for stage in list(pending):
+                    deps = [results.get(dep) for dep in stage.deps]
+                    if any(r is None for r in deps):
+                        continue
+                    pending.remove(stage)
+                    if any(r.status in ("failed", "skipped") for r in deps):
+                        results[stage.name] = StageResult(stage.name, "skipped", None, 0.0, None)
+                        continue
+                    try:
+                        inputs = self._inputs(stage, results)
+                    except FileNotFoundError as e:
+                        print(f"❌ Không đọc được đầu vào của stage {stage.name}: {e}")
+                        results[stage.name] = StageResult(stage.name, "failed", None, 0.0, None)
+                        continue
+                    running[pool.submit(self._execute, stage, inputs)] = stage
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    results[stage.name] = future.result()
+
+        ordered = {name: results[name] for name in self.stages if name in results}
+        print_summary(ordered, time.perf_counter() - start)
+        return ordered
+
+    def load_report(self, results):
+        """Report (dict) của lần chạy `results`, đọc từ cache của stage report."""
+        result = results["report"]
+        with open(self.entry_dir("report", result.key) / REPORT_FILE_NAME, encoding="utf-8") as f:
+            return json.load(f)
+
+
+_STATUS_LABELS = {
+    "hit": "✅ cache",
+    "run": "🔁 chạy",
+    "input": "📄 có sẵn",
+    "failed": "❌ lỗi",
+    "skipped": "⏭️ bỏ qua",
+}
+
+
+def print_summary(results, elapsed):
+    hits = sum(r.status == "hit" for r in results.values())
+    runs = sum(r.status == "run" for r in results.values())
+    print(f"📋 Pipeline xong trong {elapsed:.1f}s: {hits} stage trúng cache, {runs} stage chạy lại")
+    for r in results.values():
+        print(f"   {r.name:<10} {_STATUS_LABELS[r.status]:<10} {r.seconds:>8.2f}s  {(r.key or '-')[:12]}")
+
+
+# ==================== CLI ====================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Chạy pipeline ETL → phân tích → snapshot, chỉ chạy lại stage đã đổi.")
+    parser.add_argument("--raw", default=str(DEFAULT_RAW_PATH), help="File khảo sát thô (CSV)")
+    parser.add_argument("--from-processed", action="store_true",
+                        help="Không chạy ETL: dùng file đã xử lý có sẵn (--data) làm đầu vào")
+    parser.add_argument("--data", default=str(DEFAULT_DATA_PATH), help="File dữ liệu đã xử lý (đầu ra của ETL)")
+    parser.add_argument("--stages", default="",
+                        help=f"Chỉ chạy các stage này và các stage chúng cần ({', '.join(s.name for s in STAGES)})")
+    parser.add_argument("--force", default="", help="Luôn chạy lại các stage này ('all' = tất cả)")
+    parser.add_argument("--workers", type=int, default=None, help="Số stage chạy song song")
+    parser.add_argument("--snapshot-workers", type=int, default=None, help="Số tiến trình tính snapshot")
+    parser.add_argument("--report-out", default=None, help="Ghi report (JSON) ra file này")
+    parser.add_argument("--json", action="store_true", help="In kết quả từng stage dạng JSON")
+    args = parser.parse_args(argv)
+
+    pipeline = Pipeline(
+        raw_path=None if args.from_processed else args.raw,
+        output_path=args.data,
+        max_workers=args.workers,
+        force=[s for s in args.force.split(",") if s],
+        snapshot_workers=args.snapshot_workers,
+    )
+    try:
+        results = pipeline.run([s for s in args.stages.split(",") if s])
+    except (FileNotFoundError, ValueError) as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if args.report_out and results.get("report") and results["report"].status in ("hit", "run"):
+        Path(args.report_out).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.report_out, "w", encoding="utf-8") as f:
+            json.dump(pipeline.load_report(results), f, ensure_ascii=False, indent=2)
+        print(f"💾 Đã ghi report -> {args.report_out}")
+    if args.json:
+        print(json.dumps({name: r._asdict() for name, r in results.items()}, ensure_ascii=False, indent=2))
+    return 1 if any(r.status in ("failed", "skipped") for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
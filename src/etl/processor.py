@@ -1,7 +1,10 @@
 import pandas as pd
 import re
 
+from src.analytics.text import clean_batch
 from src.config import Config
+from src.etl.quality import apply_quality_policy, map_likert
+from src.etl.wish_classifier import add_wish_labels
 
 
 class DataProcessor:
@@ -44,27 +47,19 @@ class DataProcessor:
         if hasattr(Config, 'COLUMN_MAPPING'):
             self.data.rename(columns=Config.COLUMN_MAPPING, inplace=True)
 
-        # 2. Lọc phản hồi rác (Trap Question) - CỰC KỲ QUAN TRỌNG
-        if 'qc_trap_answer' in self.data.columns:
-            initial_count = len(self.data)
-            # Chỉ giữ lại những người chọn đúng số 2
-            self.data = self.data[self.data['qc_trap_answer'] == 2].copy()
-            removed_count = initial_count - len(self.data)
-            if removed_count > 0:
-                print(f"🧹 Đã loại bỏ {removed_count} bản ghi vi phạm câu hỏi bẫy.")
-
-        # 3. Chuyển đổi Timestamp
+        # 2. Chuyển đổi Timestamp
         if 'timestamp' in self.data.columns:
             self.data['timestamp'] = self.data['timestamp'].str.replace(r'\s[A-Z]{2}\sGMT\+\d+$', '', regex=True)
             self.data['timestamp'] = pd.to_datetime(self.data['timestamp'], errors='coerce')
 
-        # 4. Chuyển đổi Likert Scale (Text -> Int)
-        likert_columns = list(self.likert_scale_mapping.keys())
-        for col in self.data.columns:
-            if self.data[col].dtype == 'object':
-                # Kiểm tra nếu 80% dữ liệu thuộc thang đo Likert thì mới map
-                if self.data[col].isin(likert_columns).mean() > 0.8:
-                    self.data[col] = self.data[col].map(self.likert_scale_mapping)
+        # 3. Chuyển đổi Likert Scale (Text -> Int) cho mọi cột Likert (chọn theo tiền tố tên cột)
+        # Ô đã trả lời nhưng không map được (nhãn lạ, mã ngoài thang đo) được ghi lại để gắn cờ
+        self.data, out_of_range = map_likert(self.data, self.likert_scale_mapping)
+
+        # 4. Chấm chất lượng phản hồi (straight-lining, mã ngoài thang đo, gửi dồn)
+        # Thực hiện trên điểm thô, trước khi đảo ngược; loại / gắn cờ theo Config.QUALITY_POLICY
+        self.data, quality = apply_quality_policy(self.data, out_of_range=out_of_range)
+        print(f"🧪 Chất lượng phản hồi: {quality}")
 
         # 5. Xử lý câu hỏi đảo ngược (Reverse Coding)
         # Chỉ thực hiện sau khi đã chuyển sang dạng số
@@ -78,9 +73,17 @@ class DataProcessor:
         if 'dem_gpa' in self.data.columns and hasattr(Config, 'GPA_MAPPING'):
             self.data['dem_gpa'] = self.data['dem_gpa'].map(Config.GPA_MAPPING)
 
-        # 7. Loại bỏ trùng lặp
+        # 7. Chuẩn hóa văn bản điều ước (NFC, khoảng trắng) trước khi loại trùng & phân loại
+        if 'wish' in self.data.columns:
+            self.data['wish'] = clean_batch(self.data['wish'])
+
+        # 8. Loại bỏ trùng lặp
         self.data.drop_duplicates(inplace=True)
 
+        # 9. Phân loại điều ước (chủ đề, sắc thái) & rủi ro nghỉ học - tính một lần, lưu thành cột
+        self.data = add_wish_labels(self.data)
+        print("🏷️ Đã phân loại điều ước và gắn cờ rủi ro nghỉ học.")
+
         print(f"✅ Hoàn tất ETL. Dữ liệu sạch sẵn sàng: {len(self.data)} dòng.")
         return self.data
 
@@ -100,10 +103,47 @@ class DataProcessor:
             print(f"❌ Lỗi khi lưu dữ liệu: {e}")
         return self
 
-    def process(self, output_path: str):
+    def save_store(self, output_path: str, campus=None):
+        """Ghi thêm vào kho phân vùng theo đợt khảo sát (data/processed/store)."""
+        from src.etl.store import PartitionedStore, store_root
+        PartitionedStore(store_root(output_path)).write(self.data, campus=campus)
+        return self
+
+    def build_keyword_index(self, output_path: str):
+        """Dựng chỉ mục từ khóa điều ước cho phiên bản dữ liệu vừa lưu (data/processed/keywords)."""
+        from src.analytics.keywords import load_or_build
+        # Nhãn dòng phải khớp với file CSV đọc lại (RangeIndex)
+        load_or_build(output_path, self.data.reset_index(drop=True))
+        print("🔑 Đã dựng chỉ mục từ khóa điều ước.")
+        return self
+
+    def build_columns(self, output_path: str):
+        """Ghi bộ dữ liệu dạng cột mmap dùng chung cho Dashboard / API (data/processed/columns)."""
+        from src.etl.columnar import shared_dataset
+        shared_dataset(output_path)
+        print("🧱 Đã ghi bộ dữ liệu dạng cột dùng chung.")
+        return self
+
+    def build_snapshots(self, output_path: str, max_workers=None):
+        """Tính trước dữ liệu biểu đồ cho mọi tổ hợp bộ lọc của Dashboard."""
+        from src.etl.snapshot import SnapshotBuilder
+        SnapshotBuilder(output_path, max_workers=max_workers).build()
+        return self
+
+    def clean(self):
+        """Các bước làm sạch & biến đổi (không ghi gì ra đĩa); trả về DataFrame đã xử lý."""
         self.load_data()
         self._rename_columns()
         self._clean_data()
-        self._transform_data()
+        return self._transform_data()
+
+    def process(self, output_path: str, build_snapshots: bool = True, build_store: bool = True):
+        self.clean()
         self.save_data(output_path)
+        self.build_keyword_index(output_path)
+        self.build_columns(output_path)
+        if build_store:
+            self.save_store(output_path)
+        if build_snapshots:
+            self.build_snapshots(output_path)
         return self.data.head()
\ No newline at end of file
@@ -0,0 +1,187 @@
+"""
+Chấm chất lượng từng phản hồi trên ma trận Likert (vector hóa, không lặp theo dòng).
+
+Các cột Likert (theo tiền tố tên cột) được đổi từ nhãn sang điểm bằng `map_likert`, hàm này
+đồng thời ghi nhận các ô đã trả lời nhưng không đổi được (nhãn lạ, mã ngoài thang đo).
+
+Các cờ:
+- out_of_range: có câu Likert đã trả lời nhưng giá trị thô không phải nhãn thang đo hay số nguyên
+  1-5. Câu bỏ trống không bị tính là ngoài thang đo; số dòng có câu bỏ trống được báo riêng
+  (`missing`).
+- straightline: chọn cùng một mức cho mọi câu (phương sai 0), xét trên điểm thô trước khi đảo.
+- burst: cùng một bộ đáp án Likert được gửi nhiều lần trong một khoảng ngắn (spam / gửi lặp).
+
+Mỗi cờ được xử lý theo Config.QUALITY_POLICY: loại dòng ("drop"), giữ dòng kèm cột
+`qc_<cờ>` ("flag") hoặc bỏ qua ("ignore"). Phép tính đi theo từng cột nên chỉ giữ vài
+mảng độ dài n trong bộ nhớ, thời gian tăng tuyến tính theo số dòng.
+"""
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+
+FLAGS = ("out_of_range", "straightline", "burst")
+_ACTIONS = ("drop", "flag", "ignore")
+
+
+def likert_columns(df):
+    return [c for c in df.columns if c.startswith(Config.LIKERT_ITEM_PREFIXES)]
+
+
+def _scores(df, col):
+    """Cột Likert dạng float64, giá trị không phải số -> NaN."""
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=np.float64)
+
+
+def _raw_scores(df, col, reverse_coded):
+    """Điểm đúng như người trả lời đã chọn (hoàn tác đảo điểm nếu df đã được đảo)."""
+    values = _scores(df, col)
+    if reverse_coded and col in Config.REVERSE_COLS:
+        low, high = Config.LIKERT_RANGE
+        values = low + high - values
+    return values
+
+
+def _valid_scores(values):
+    low, high = Config.LIKERT_RANGE
+    with np.errstate(invalid="ignore"):
+        return (values >= low) & (values <= high) & (values == np.floor(values))
+
+
+def map_likert(df, mapping=None):
+    """
+    Đổi nhãn Likert sang điểm cho mọi cột Likert; ô đã là số nguyên trong thang đo giữ nguyên.
+    Trả về (bản sao df, mặt nạ dòng có ô đã trả lời nhưng không đổi được thành điểm hợp lệ).
+    Các ô đó thành NaN nên không lọt vào thống kê; ô bỏ trống vẫn là NaN và không bị gắn cờ.
+    """
+    mapping = Config.LIKERT_MAPPING if mapping is None else mapping
+    data = df.copy()
+    bad = np.zeros(len(df), dtype=bool)
+    for col in likert_columns(df):
+        raw = df[col]
+        if pd.api.types.is_numeric_dtype(raw):
+            values = raw.to_numpy(dtype=np.float64)
+        else:
+            labels = raw.astype(object).str.strip().map(mapping).astype(np.float64)
+            values = labels.fillna(pd.to_numeric(raw, errors="coerce")).to_numpy(dtype=np.float64)
+        valid = _valid_scores(values)
+        bad |= raw.notna().to_numpy() & ~valid
+        # Cột không có ô trống giữ kiểu nguyên như trước (file CSV đã xử lý ghi "4", không phải "4.0")
+        data[col] = values.astype(np.int64) if valid.all() else np.where(valid, values, np.nan)
+    return data, bad
+
+
+# ==================== CÁC CỜ ====================
+def out_of_range_flags(df, columns):
+    """Dòng có câu Likert đã trả lời nhưng mã không hợp lệ (chữ, số lẻ, ngoài thang đo) trên df chưa map."""
+    bad = np.zeros(len(df), dtype=bool)
+    for col in columns:
+        bad |= df[col].notna().to_numpy() & ~_valid_scores(_scores(df, col))
+    return bad
+
+
+def missing_answers(df, columns):
+    """Dòng bỏ trống ít nhất một câu Likert (chỉ thống kê, không phải cờ loại dòng)."""
+    return df[columns].isna().any(axis=1).to_numpy() if columns else np.zeros(len(df), dtype=bool)
+
+
+def straightline_flags(df, columns, reverse_coded=False):
+    n = len(df)
+    lowest, highest = np.full(n, np.inf), np.full(n, -np.inf)
+    answered = np.zeros(n, dtype=np.int64)
+    for col in columns:
+        values = _raw_scores(df, col, reverse_coded)
+        lowest, highest = np.fmin(lowest, values), np.fmax(highest, values)
+        answered += ~np.isnan(values)
+    return (answered >= min(Config.QUALITY_STRAIGHTLINE_MIN_ITEMS, len(columns))) & (lowest == highest)
+
+
+def _answer_patterns(df, columns):
+    """Mã số nguyên của bộ đáp án Likert mỗi dòng (gói theo cơ số nếu vừa int64, nếu không thì hash)."""
+    low, high = Config.LIKERT_RANGE
+    base = high - low + 2  # 0 dành cho ô thiếu / ngoài thang đo
+    if len(columns) * np.log2(base) >= 63:
+        return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+    pattern = np.zeros(len(df), dtype=np.int64)
+    for col in columns:
+        values = _scores(df, col)
+        pattern = pattern * base + np.where(_valid_scores(values), values - low + 1, 0).astype(np.int64)
+    return pattern
+
+
+def burst_flags(df, columns):
+    """
+    Dòng thuộc một đợt >= QUALITY_BURST_MIN_RESPONSES bài có cùng đáp án Likert gửi trong
+    QUALITY_BURST_WINDOW_SECONDS giây. Sắp xếp theo (bộ đáp án, thời điểm) rồi dùng
+    searchsorted để đếm số bài trong cửa sổ kết thúc tại mỗi dòng.
+    """
+    flags = np.zeros(len(df), dtype=bool)
+    if "timestamp" not in df.columns or not columns or df.empty:
+        return flags
+    timestamps = pd.to_datetime(df["timestamp"], errors="coerce")
+    valid = np.flatnonzero(timestamps.notna().to_numpy())
+    if not len(valid):
+        return flags
+    seconds = timestamps.to_numpy()[valid].astype("datetime64[s]").astype(np.int64)
+    seconds -= seconds.min()
+    window = Config.QUALITY_BURST_WINDOW_SECONDS
+    codes, _ = pd.factorize(_answer_patterns(df, columns)[valid])
+    # Khoảng cách giữa hai nhóm đáp án lớn hơn cửa sổ nên cửa sổ không vượt sang nhóm khác
+    combined = codes.astype(np.int64) * (int(seconds.max()) + window + 1) + seconds
+    order = np.argsort(combined, kind="stable")
+    keys = combined[order]
+    positions = np.arange(len(keys))
+    starts = np.searchsorted(keys, keys - window, side="left")
+    full = positions - starts + 1 >= Config.QUALITY_BURST_MIN_RESPONSES
+    # Đánh dấu mọi dòng trong [starts, i] của các cửa sổ đủ ngưỡng (mảng hiệu + cumsum)
+    delta = np.bincount(starts[full], minlength=len(keys) + 1) - np.bincount(positions[full] + 1, minlength=len(keys) + 1)
+    flags[valid[order]] = np.cumsum(delta)[: len(keys)] > 0
+    return flags
+
+
+# ==================== CHÍNH SÁCH ====================
+def _resolve_policy(policy=None):
+    policy = {**Config.QUALITY_POLICY, **(policy or {})}
+    unknown = {a for a in policy.values() if a not in _ACTIONS}
+    if unknown:
+        raise ValueError(f"Chính sách chất lượng không hợp lệ: {sorted(unknown)} (chỉ nhận {_ACTIONS}).")
+    return policy
+
+
+def quality_flags(df, flags=FLAGS, reverse_coded=False, out_of_range=None):
+    """
+    DataFrame cờ (bool, cùng index với df) cho các loại cờ được yêu cầu. `out_of_range` là
+    mặt nạ từ map_likert khi df đã được map (lúc đó giá trị thô không còn trong df).
+    """
+    columns = likert_columns(df)
+    compute = {
+        "out_of_range": lambda: out_of_range_flags(df, columns) if out_of_range is None else np.asarray(out_of_range),
+        "straightline": lambda: straightline_flags(df, columns, reverse_coded),
+        "burst": lambda: burst_flags(df, columns),
+    }
+    return pd.DataFrame({name: compute[name]() for name in flags}, index=df.index)
+
+
+def apply_quality_policy(df, policy=None, reverse_coded=False, out_of_range=None):
+    """
+    Áp chính sách chất lượng lên df. Trả về (df đã loại dòng "drop" và thêm cột qc_* cho
+    cờ "flag", {cờ: số dòng bị gắn, 'missing': số dòng có câu bỏ trống, 'dropped': số dòng bị
+    loại}). `reverse_coded=True` khi df đã đảo điểm; `out_of_range` là mặt nạ của map_likert.
+    """
+    policy = _resolve_policy(policy)
+    active = [name for name in FLAGS if policy.get(name, "ignore") != "ignore"]
+    flags = quality_flags(df, active, reverse_coded, out_of_range)
+    data = df.copy()
+    drop = np.zeros(len(df), dtype=bool)
+    for name in active:
+        if policy[name] == "drop":
+            drop |= flags[name].to_numpy()
+        else:
+            data[f"qc_{name}"] = flags[name].to_numpy().astype(np.int8)
+    summary = {name: int(flags[name].sum()) for name in active}
+    missing = missing_answers(df, likert_columns(df))
+    if out_of_range is not None:  # ô không map được đã thành NaN: đã tính vào out_of_range
+        missing &= ~np.asarray(out_of_range)
+    summary["missing"] = int(missing.sum())
+    summary["dropped"] = int(drop.sum())
+    return data[~drop].copy(), summary
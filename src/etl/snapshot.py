@@ -0,0 +1,181 @@
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.analytics.analyzer import DataAnalyzer
+from src.analytics.keywords import load_or_build
+from src.analytics.segments import add_segment_columns, filter_segment, iter_segments, segment_id
+from src.config import Config
+
+# Các key có khóa là số kỳ học - JSON chuyển thành chuỗi nên cần khôi phục khi đọc
+_INT_KEYED = ("semester_dist", "semester_happiness")
+
+_VERSION_CACHE = {}
+
+
+def data_version(path) -> str:
+    """
+    Phiên bản dữ liệu = 12 ký tự đầu SHA-256 nội dung file.
+    Kết quả được nhớ theo (mtime, size) nên chỉ băm lại khi file thay đổi.
+    """
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    if key not in _VERSION_CACHE:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        _VERSION_CACHE[key] = digest.hexdigest()[:12]
+    return _VERSION_CACHE[key]
+
+
+def snapshot_root(processed_path) -> Path:
+    return Path(processed_path).parent / Config.SNAPSHOT_DIR_NAME
+
+
+def _to_builtin(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, pd.Interval)):
+        return str(value)
+    raise TypeError(f"Không thể tuần tự hóa kiểu {type(value).__name__}")
+
+
+def _restore_keys(chart_data):
+    for key in _INT_KEYED:
+        if key in chart_data:
+            chart_data[key] = {int(k): v for k, v in chart_data[key].items()}
+    return chart_data
+
+
+def load_snapshot(processed_path, major="all", semester="all"):
+    """
+    Đọc snapshot khớp với phiên bản hiện tại của file dữ liệu đã xử lý.
+    Trả về dict {'chart_data', 'report', ...} hoặc None nếu chưa có snapshot.
+    """
+    try:
+        version = data_version(processed_path)
+    except FileNotFoundError:
+        return None
+    path = snapshot_root(processed_path) / version / f"{segment_id(major, semester)}.json.gz"
+    if not path.exists():
+        return None
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        payload = json.load(f)
+    if payload.get("format") != Config.SNAPSHOT_FORMAT_VERSION:
+        return None
+    _restore_keys(payload["chart_data"])
+    return payload
+
+
+# ==================== WORKER ====================
+_WORKER_FRAME = None
+_WORKER_KEYWORDS = None
+
+
+def _init_worker(frame, keyword_index=None):
+    global _WORKER_FRAME, _WORKER_KEYWORDS
+    _WORKER_FRAME = frame
+    _WORKER_KEYWORDS = keyword_index
+
+
+def _compute_segment(segment):
+    major, semester = segment
+    subset = filter_segment(_WORKER_FRAME, major, semester)
+    if subset.empty:
+        return segment, {}, {}
+    analyzer = DataAnalyzer(df=subset, keyword_index=_WORKER_KEYWORDS)
+    chart_data = analyzer.get_chart_data()
+    report = analyzer.analysis()
+    return segment, chart_data, report
+
+
+class SnapshotBuilder:
+    """
+    Tính trước chart data + report cho mọi tổ hợp bộ lọc của Dashboard
+    và ghi thành các file JSON nén theo phiên bản dữ liệu.
+    """
+
+    def __init__(self, processed_path, output_dir=None, max_workers=None, keep_versions=2):
+        self.processed_path = Path(processed_path)
+        self.output_dir = Path(output_dir) if output_dir else snapshot_root(processed_path)
+        self.max_workers = max_workers or min(os.cpu_count() or 1, len(iter_segments()))
+        self.keep_versions = keep_versions
+
+    def build(self):
+        print("📸 Đang tạo snapshot dữ liệu biểu đồ...")
+        start = time.perf_counter()
+        version = data_version(self.processed_path)
+        raw = pd.read_csv(self.processed_path)
+        keyword_index = load_or_build(self.processed_path, raw)
+        frame = add_segment_columns(raw)
+        segments = iter_segments()
+
+        if self.max_workers > 1:
+            initargs = (frame, keyword_index)
+            # spawn: pipeline gọi build() từ thread pool, fork khi đang có nhiều thread có thể khóa chết tiến trình con
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                self.max_workers, mp_context=context, initializer=_init_worker, initargs=initargs
+            ) as pool:
+                results = list(pool.map(_compute_segment, segments))
+        else:
+            _init_worker(frame, keyword_index)
+            results = [_compute_segment(s) for s in segments]
+
+        version_dir = self.output_dir / version
+        tmp_dir = self.output_dir / f".{version}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        manifest = {
+            "format": Config.SNAPSHOT_FORMAT_VERSION,
+            "data_version": version,
+            "source": self.processed_path.name,
+            "created_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+            "segments": {},
+        }
+        for (major, semester), chart_data, report in results:
+            sid = segment_id(major, semester)
+            payload = {
+                "format": Config.SNAPSHOT_FORMAT_VERSION,
+                "data_version": version,
+                "major": major,
+                "semester": semester,
+                "chart_data": chart_data,
+                "report": report,
+            }
+            raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=_to_builtin)
+            with gzip.open(tmp_dir / f"{sid}.json.gz", "wt", encoding="utf-8") as f:
+                f.write(raw)
+            manifest["segments"][sid] = {"rows": chart_data.get("kpi", {}).get("total", 0)}
+
+        with open(tmp_dir / "manifest.json", "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        # Thay thế nguyên khối để Dashboard không bao giờ đọc snapshot dở dang
+        shutil.rmtree(version_dir, ignore_errors=True)
+        tmp_dir.rename(version_dir)
+        self._prune(keep=version)
+
+        elapsed = time.perf_counter() - start
+        print(f"✅ Đã ghi {len(results)} snapshot (phiên bản {version}) trong {elapsed:.1f}s.")
+        return manifest
+
+    def _prune(self, keep):
+        """Chỉ giữ lại `keep_versions` phiên bản snapshot mới nhất."""
+        versions = [p for p in self.output_dir.iterdir() if p.is_dir() and not p.name.startswith(".")]
+        versions.sort(key=lambda p: p.stat().st_mtime, reverse=True)
+        for old in versions[self.keep_versions:]:
+            if old.name != keep:
+                shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,151 @@
+"""
+Kho dữ liệu đã xử lý, phân vùng theo đợt khảo sát (wave) và cơ sở (campus).
+
+Cấu trúc thư mục:
+    store/
+    ├── manifest.json                       # danh sách phân vùng + min/max timestamp + số dòng
+    └── wave=2026-SP/campus=HCM/part.parquet
+
+Mỗi lần ETL chỉ ghi đè các phân vùng có trong lô dữ liệu mới, các đợt cũ được giữ
+nguyên để so sánh xu hướng qua nhiều năm. Truy vấn theo wave / khoảng thời gian chỉ
+đọc những phân vùng khớp (partition pruning) dựa trên manifest.
+"""
+import hashlib
+import json
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+
+MANIFEST_NAME = "manifest.json"
+UNKNOWN_WAVE = "unknown"
+
+
+def wave_of(timestamps: pd.Series) -> pd.Series:
+    """Gán nhãn wave ("2026-SP") cho từng timestamp; timestamp lỗi nhận 'unknown'."""
+    ts = pd.to_datetime(timestamps, errors="coerce")
+    month = ts.dt.month
+    term = pd.Series(UNKNOWN_WAVE, index=ts.index, dtype=object)
+    for name, (first, last) in Config.SURVEY_WAVE_TERMS.items():
+        term[(month >= first) & (month <= last)] = name
+    labels = ts.dt.year.astype("Int64").astype(str) + "-" + term
+    return labels.where(ts.notna(), UNKNOWN_WAVE)
+
+
+def store_root(processed_path) -> Path:
+    return Path(processed_path).parent / Config.STORE_DIR_NAME
+
+
+class PartitionedStore:
+    def __init__(self, root):
+        self.root = Path(root)
+
+    # ==================== MANIFEST ====================
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / MANIFEST_NAME
+
+    def exists(self) -> bool:
+        return self.manifest_path.exists()
+
+    def manifest(self) -> dict:
+        if not self.exists():
+            return {"format": 1, "version": None, "partitions": []}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def waves(self):
+        return sorted({p["wave"] for p in self.manifest()["partitions"]})
+
+    def campuses(self):
+        return sorted({p["campus"] for p in self.manifest()["partitions"]})
+
+    def version(self):
+        return self.manifest()["version"]
+
+    # ==================== GHI ====================
+    def write(self, df: pd.DataFrame, campus=None):
+        """Ghi (hoặc ghi đè) các phân vùng xuất hiện trong df, cập nhật manifest."""
+        data = df.copy()
+        data["timestamp"] = pd.to_datetime(data["timestamp"], errors="coerce")
+        data["survey_wave"] = wave_of(data["timestamp"])
+        if "campus" not in data.columns or campus is not None:
+            data["campus"] = campus or Config.DEFAULT_CAMPUS
+
+        manifest = self.manifest()
+        partitions = {(p["wave"], p["campus"]): p for p in manifest["partitions"]}
+        for (wave, camp), part in data.groupby(["survey_wave", "campus"], sort=True):
+            rel_dir = Path(f"wave={wave}") / f"campus={camp}"
+            tmp_dir = self.root / f".{wave}.{camp}.tmp"
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            part.to_parquet(tmp_dir / "part.parquet", index=False)
+            shutil.rmtree(self.root / rel_dir, ignore_errors=True)
+            (self.root / rel_dir).parent.mkdir(parents=True, exist_ok=True)
+            tmp_dir.rename(self.root / rel_dir)
+
+            ts = part["timestamp"].dropna()
+            partitions[(wave, camp)] = {
+                "wave": wave,
+                "campus": camp,
+                "path": (rel_dir / "part.parquet").as_posix(),
+                "rows": int(len(part)),
+                "ts_min": ts.min().isoformat() if not ts.empty else None,
+                "ts_max": ts.max().isoformat() if not ts.empty else None,
+            }
+
+        manifest["partitions"] = sorted(partitions.values(), key=lambda p: (p["wave"], p["campus"]))
+        manifest["updated_at"] = pd.Timestamp.now().isoformat(timespec="seconds")
+        digest = hashlib.sha256(json.dumps(manifest["partitions"], sort_keys=True).encode()).hexdigest()
+        manifest["version"] = digest[:12]
+
+        tmp_manifest = self.manifest_path.with_suffix(".tmp")
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        tmp_manifest.replace(self.manifest_path)
+        print(f"🗂️ Đã ghi {len(data)} dòng vào {data.groupby(['survey_wave', 'campus']).ngroups} phân vùng ({self.root}).")
+        return manifest
+
+    # ==================== ĐỌC ====================
+    def partitions(self, waves=None, campus=None, start=None, end=None):
+        """Các phân vùng khớp điều kiện, chỉ dựa vào manifest (không đọc dữ liệu)."""
+        waves = [waves] if isinstance(waves, str) else waves
+        campus = [campus] if isinstance(campus, str) else campus
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        selected = []
+        for p in self.manifest()["partitions"]:
+            if waves and p["wave"] not in waves:
+                continue
+            if campus and p["campus"] not in campus:
+                continue
+            if start is not None and (p["ts_max"] is None or pd.Timestamp(p["ts_max"]) < start):
+                continue
+            if end is not None and (p["ts_min"] is None or pd.Timestamp(p["ts_min"]) > end):
+                continue
+            selected.append(p)
+        return selected
+
+    def read(self, waves=None, campus=None, start=None, end=None, columns=None):
+        """
+        Đọc dữ liệu của các phân vùng khớp điều kiện. Khoảng thời gian [start, end]
+        được lọc lại theo từng dòng sau khi đã loại các phân vùng nằm ngoài khoảng.
+        """
+        parts = self.partitions(waves, campus, start, end)
+        frames = [pd.read_parquet(self.root / p["path"], columns=columns) for p in parts]
+        if not frames:
+            return pd.DataFrame(columns=columns) if columns else pd.DataFrame()
+        data = pd.concat(frames, ignore_index=True)
+        if (start is not None or end is not None) and "timestamp" in data.columns:
+            ts = data["timestamp"]
+            mask = np.ones(len(data), dtype=bool)
+            if start is not None:
+                mask &= (ts >= pd.Timestamp(start)).to_numpy()
+            if end is not None:
+                mask &= (ts <= pd.Timestamp(end)).to_numpy()
+            data = data[mask].reset_index(drop=True)
+        return data
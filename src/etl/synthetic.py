@@ -0,0 +1,62 @@
+"""Sinh dữ liệu giả lập cùng định dạng với file đã xử lý ETL (dùng cho load-test, benchmark)."""
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.config import Config
+
+RESIDENCES = ["KTX", "Nhà riêng", "Ở trọ", "Ở với gia đình"]
+
+WISH_SAMPLES = [
+    "Trường cần siết chặt hơn về đánh giá năng lực để cho điểm phù hợp.",
+    "Có nhiều cuộc thi hơn cho ngành CNTT để sinh viên thử sức với dự án thực tế.",
+    "Ước gì học phí ít hơn.",
+    "Lịch học bất tiện, khó chọn lớp vào giờ cao điểm, mong trường khắc phục.",
+    "Mong có nhiều buổi thực hành tại doanh nghiệp và đi tour thực tế hơn.",
+    "Cải thiện cơ sở vật chất, chất lượng giảng dạy và môi trường học tập.",
+    "Wifi cần mạnh hơn và nên có thêm máy lọc nước cho sinh viên.",
+    "Giảm deadline để sinh viên bớt áp lực.",
+    "Tổ chức nhiều hoạt động tập thể và phát triển các câu lạc bộ.",
+    "Giảm học phí hoặc có nhiều chương trình học bổng hơn cho sinh viên.",
+    "Máy lạnh trong phòng học hay bị hỏng, mong nhà trường sửa sớm.",
+    "Giảng viên nhiệt tình, em rất vui khi học ở đây.",
+]
+
+
+def likert_columns():
+    """Các cột Likert theo đúng thứ tự của file đã xử lý."""
+    prefixes = ("hap_", "aca_", "env_", "soc_", "fin_")
+    return [c for c in Config.COLUMN_MAPPING.values() if c.startswith(prefixes)]
+
+
+def generate_processed(n_rows: int, seed: int = 0, start="2026-01-20", days=30):
+    """
+    Tạo DataFrame giả lập n_rows phản hồi. Các câu Likert phụ thuộc vào một
+    biến tiềm ẩn "hạnh phúc" để tương quan giữa các nhóm nhân tố có ý nghĩa.
+    """
+    rng = np.random.default_rng(seed)
+    start_ts = pd.Timestamp(start).value // 10**9
+    seconds = np.sort(rng.integers(0, days * 86400, size=n_rows))
+    data = {
+        "timestamp": pd.to_datetime(start_ts + seconds, unit="s"),
+        "dem_major": rng.choice(list(Config.MAJOR_GROUP_MAPPING.keys()), size=n_rows),
+        "dem_semester": rng.integers(1, 10, size=n_rows),
+        "dem_gpa": rng.choice(list(Config.GPA_MAPPING.values()), size=n_rows),
+        "dem_residence": rng.choice(RESIDENCES, size=n_rows),
+    }
+    latent = rng.normal(3.6, 0.6, size=n_rows)
+    for col in likert_columns():
+        noise = rng.normal(0, 0.8, size=n_rows)
+        data[col] = np.clip(np.rint(latent + noise), 1, 5).astype(int)
+    wishes = np.array(WISH_SAMPLES, dtype=object)[rng.integers(0, len(WISH_SAMPLES), size=n_rows)]
+    wishes[rng.random(n_rows) < 0.4] = None
+    data["wish"] = wishes
+    return pd.DataFrame(data)
+
+
+def write_processed(n_rows: int, output_path, seed: int = 0):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    generate_processed(n_rows, seed=seed).to_csv(output_path, index=False, encoding="utf-8-sig")
+    return output_path
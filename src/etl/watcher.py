@@ -0,0 +1,139 @@
+"""
+Theo dõi phiên bản dữ liệu đã xử lý để Dashboard tự làm mới khi ETL ghi dữ liệu mới.
+
+Mỗi tiến trình server chỉ có một `VersionWatcher` (Dashboard giữ nó bằng st.cache_resource):
+một thread nền stat() file đã xử lý và manifest của kho phân vùng mỗi
+Config.WATCH_INTERVAL_SECONDS giây. Chỉ khi (mtime, kích thước) đổi và giữ nguyên
+trong Config.WATCH_SETTLE_SECONDS (ETL đã ghi xong) thì mới băm lại nội dung để lấy
+phiên bản mới. Phiên bản mới được "làm ấm" đúng một lần (ghi bộ dữ liệu dạng cột, chỉ
+mục từ khóa, cache dùng chung của Dashboard qua `on_change`) rồi mới được công bố bằng
+cách tăng `generation`. Các phiên Streamlit chỉ so `generation` trong bộ nhớ và rerun khi
+nó đổi, nên chi phí làm mới không tăng theo số phiên đang mở.
+"""
+import threading
+import time
+import traceback
+from collections import namedtuple
+from pathlib import Path
+
+from src.analytics.keywords import load_or_build
+from src.config import Config
+from src.etl.columnar import StaleVersionError, shared_dataset
+from src.etl.snapshot import data_version
+from src.etl.store import PartitionedStore, store_root
+
+# generation tăng mỗi lần công bố phiên bản mới; store_version = None khi chưa có kho phân vùng
+WatchState = namedtuple("WatchState", ["generation", "version", "store_version", "updated_at"])
+
+
+def _signature(path):
+    try:
+        stat = Path(path).stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def warm_caches(data_path, version):
+    """Dựng sẵn trên đĩa các bản dùng chung của phiên bản mới (bộ dữ liệu mmap, chỉ mục từ khóa)."""
+    frame = shared_dataset(data_path, version).frame
+    load_or_build(data_path, frame)
+
+
+class VersionWatcher:
+    def __init__(self, data_path, on_change=None, interval=None, settle=None):
+        self.data_path = Path(data_path)
+        self.store = PartitionedStore(store_root(self.data_path))
+        self.on_change = on_change
+        self.interval = Config.WATCH_INTERVAL_SECONDS if interval is None else interval
+        self.settle = Config.WATCH_SETTLE_SECONDS if settle is None else settle
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._signature = self._current_signature()
+        self._changed_at = None
+        self._state = WatchState(0, *self._read_versions(), time.time())
+        self.stats = {"polls": 0, "hashes": 1, "changes": 0, "warm_failures": 0, "warm_seconds": 0.0}
+
+    # ==================== TRẠNG THÁI ====================
+    def state(self) -> WatchState:
+        with self._lock:
+            return self._state
+
+    @property
+    def generation(self):
+        return self.state().generation
+
+    def _current_signature(self):
+        return _signature(self.data_path), _signature(self.store.manifest_path)
+
+    def _read_versions(self):
+        try:
+            version = data_version(self.data_path)
+        except FileNotFoundError:
+            version = None
+        return version, self.store.version() if self.store.exists() else None
+
+    # ==================== POLLING ====================
+    def poll(self, now=None):
+        """Một lượt kiểm tra; trả về True nếu vừa công bố phiên bản mới."""
+        now = time.monotonic() if now is None else now
+        self.stats["polls"] += 1
+        signature = self._current_signature()
+        if signature != self._signature:
+            # File đang được ghi: chờ tới khi (mtime, size) đứng yên đủ lâu
+            self._signature, self._changed_at = signature, now
+            return False
+        if self._changed_at is None or now - self._changed_at < self.settle:
+            return False
+        self._changed_at = None
+
+        self.stats["hashes"] += 1
+        version, store_version = self._read_versions()
+        current = self.state()
+        if (version, store_version) == (current.version, current.store_version):
+            return False  # chạm file nhưng nội dung không đổi
+        try:
+            self._warm(version, store_version)
+        except StaleVersionError:
+            # ETL ghi tiếp trong lúc làm ấm: chưa công bố, chờ file đứng yên rồi băm lại
+            self._signature, self._changed_at = self._current_signature(), now
+            return False
+        with self._lock:
+            self._state = WatchState(current.generation + 1, version, store_version, time.time())
+        self.stats["changes"] += 1
+        print(f"🔄 Dữ liệu mới: {current.version} -> {version} (thế hệ {current.generation + 1})")
+        return True
+
+    def _warm(self, version, store_version):
+        start = time.perf_counter()
+        try:
+            if version is not None:
+                warm_caches(self.data_path, version)
+            if self.on_change is not None:
+                self.on_change(version, store_version)
+        except StaleVersionError:
+            raise
+        except Exception:  # vẫn công bố phiên bản mới: các phiên sẽ tự dựng phần còn thiếu
+            self.stats["warm_failures"] += 1
+            traceback.print_exc()
+        self.stats["warm_seconds"] += time.perf_counter() - start
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                traceback.print_exc()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="version-watcher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
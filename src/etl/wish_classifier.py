@@ -0,0 +1,124 @@
+"""Phân loại chủ đề / sắc thái điều ước bằng từ điển, chạy theo lô (vector hóa) trong ETL."""
+import numpy as np
+import pandas as pd
+
+from src.analytics.text import normalize, tokenize_batch
+from src.config import Config
+
+
+def _ngram_keys(ids, starts, n, base):
+    """Mã n-gram bắt đầu tại các vị trí `starts` (phép nhân uint64, tràn số sẽ quay vòng)."""
+    keys = ids[starts].copy()
+    for j in range(1, n):
+        keys = keys * base + ids[starts + j]
+    return keys
+
+
+class WishClassifier:
+    """
+    Khớp đồng thời mọi cụm từ khóa (1-3 âm tiết) của từ điển bằng tra cứu trên mã n-gram
+    (mảng mã đã sắp xếp), thay vì quét regex cho từng cụm từ.
+    """
+
+    def __init__(self, topics=None, sentiments=None):
+        self.topics = topics or Config.WISH_TOPIC_KEYWORDS
+        sentiments = sentiments or Config.WISH_SENTIMENT_KEYWORDS
+        self.sentiments = {"Positive": sentiments["Positive"], "Negative": sentiments["Negative"]}
+        self.topic_names = np.array(list(self.topics.keys()), dtype=object)
+
+    def _lexicon_table(self, lexicon, vocab, base):
+        """
+        {n: (mã n-gram đã sắp xếp, ma trận thành viên mã × nhóm, mặt nạ âm tiết đầu theo vocab)}
+        cho các từ khóa 1-3 âm tiết có đủ âm tiết trong dữ liệu.
+        """
+        members = {}
+        for group, words in enumerate(lexicon.values()):
+            for word in words:
+                parts = normalize(word).split()
+                pos = vocab.get_indexer(parts)
+                if not 1 <= len(parts) <= 3 or (pos < 0).any():
+                    continue
+                key = np.uint64(0)
+                for p in pos.astype(np.uint64):
+                    key = key * base + p
+                members.setdefault(len(parts), {}).setdefault(key, set()).add((group, pos[0]))
+        table = {}
+        for n, by_key in members.items():
+            keys = np.array(sorted(by_key), dtype=np.uint64)
+            member = np.zeros((len(keys), len(lexicon)), dtype=np.int64)
+            first = np.zeros(len(vocab), dtype=bool)
+            for i, key in enumerate(keys):
+                for group, head in by_key[key]:
+                    member[i, group] = 1
+                    first[head] = True
+            table[n] = keys, member, first
+        return table
+
+    def _count_hits(self, lexicon, ids, vocab, rows, base, n_texts):
+        """
+        Ma trận (n_texts × số nhóm) đếm số lần khớp từ khóa của mỗi nhóm. Chỉ các vị trí có
+        âm tiết đầu thuộc một từ khóa (tra bảng theo mã token) mới được mã hóa n-gram và tra
+        bằng một lần searchsorted cho mọi nhóm.
+        """
+        hits = np.zeros((n_texts, len(lexicon)), dtype=np.int64)
+        for n, (keys, member, first) in self._lexicon_table(lexicon, vocab, base).items():
+            m = len(ids) - n + 1
+            if m <= 0:
+                continue
+            starts = np.flatnonzero(first[ids[:m]])
+            grams = _ngram_keys(ids, starts, n, base)
+            slot = np.minimum(np.searchsorted(keys, grams), len(keys) - 1)
+            matched = keys[slot] == grams
+            text, slot = rows[starts[matched]], slot[matched]
+            for group in range(len(lexicon)):
+                hits[:, group] += np.bincount(text, weights=member[slot, group], minlength=n_texts).astype(np.int64)
+        return hits
+
+    def classify(self, wishes: pd.Series) -> pd.DataFrame:
+        """
+        Trả về DataFrame (cùng index) gồm `wish_category` và `wish_sentiment`.
+        Mỗi điều ước khác nhau chỉ được xử lý một lần; điều ước rỗng nhận giá trị NaN.
+        """
+        if wishes.empty:
+            return pd.DataFrame({"wish_category": [], "wish_sentiment": []}, index=wishes.index, dtype=object)
+        codes, uniques = pd.factorize(wishes, sort=False)  # ô trống -> mã -1
+        n_texts = len(uniques)
+        if n_texts == 0:
+            return pd.DataFrame({"wish_category": None, "wish_sentiment": None}, index=wishes.index, dtype=object)
+
+        tokens = tokenize_batch(uniques)
+        ids, vocab, rows = tokens.ids.astype(np.uint64), tokens.vocab, tokens.rows
+        base = np.uint64(len(vocab) + 1)
+
+        topic_hits = self._count_hits(self.topics, ids, vocab, rows, base, n_texts)
+        # argmax lấy chủ đề đầu tiên khi hòa -> thứ tự trong Config là thứ tự ưu tiên
+        category = np.where(
+            topic_hits.max(axis=1) > 0, self.topic_names[topic_hits.argmax(axis=1)], Config.WISH_DEFAULT_TOPIC
+        ).astype(object)
+
+        sentiment_hits = self._count_hits(self.sentiments, ids, vocab, rows, base, n_texts)
+        score = sentiment_hits[:, 0] - sentiment_hits[:, 1]
+        sentiment = np.select([score > 0, score < 0], ["Positive", "Negative"], "Neutral").astype(object)
+
+        is_empty = np.bincount(rows[tokens.ids != tokens.sep_id], minlength=n_texts) == 0
+        category[is_empty] = None
+        sentiment[is_empty] = None
+        # Phần tử None thêm vào cuối cho mã -1 (ô trống)
+        category, sentiment = np.append(category, None), np.append(sentiment, None)
+
+        return pd.DataFrame(
+            {"wish_category": category[codes], "wish_sentiment": sentiment[codes]},
+            index=wishes.index,
+        )
+
+
+def add_wish_labels(df, classifier=None):
+    """Thêm các cột `wish_category`, `wish_sentiment` và `retention_risk` (0/1) vào bản sao của df."""
+    data = df.copy()
+    if "wish" in data.columns:
+        labels = (classifier or WishClassifier()).classify(data["wish"])
+        data["wish_category"] = labels["wish_category"]
+        data["wish_sentiment"] = labels["wish_sentiment"]
+    if "hap_loyalty_choice" in data.columns:
+        data["retention_risk"] = (data["hap_loyalty_choice"] <= Config.RETENTION_RISK_MAX_SCORE).astype(int)
+    return data